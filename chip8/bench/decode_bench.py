@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Display import Display
+from Keyboard import Keyboard
+from Memory import Memory
+from Sound import Sound
+
+ROMS_DIRECTORY = 'roms'
+REPETITIONS = 200
+
+def decode_opcode_linear_scan(cpu, opcodes_functions_map, opcode):
+    """ Decoding as done before the dispatch table: scan the masks and wrap the handler. """
+    opcode_function = None
+    for opcode_mask in cpu.opcodes_masks:
+        if opcode & opcode_mask['mask'] == opcode_mask['opcode']:
+            opcode_function = opcodes_functions_map[opcode_mask['opcode']]
+            break
+
+    if opcode_function is None:
+        return None
+
+    return lambda: opcode_function(opcode)
+
+def read_rom_opcodes(filename):
+    with open(filename, 'rb') as f:
+        rom = f.read()
+    return [(rom[i] << 8) | rom[i + 1] for i in range(0, len(rom) - 1, 2)]
+
+def measure(decode, opcodes):
+    start = time.perf_counter()
+    for _ in range(REPETITIONS):
+        for opcode in opcodes:
+            decode(opcode)
+    elapsed = time.perf_counter() - start
+    return elapsed / (REPETITIONS * len(opcodes)) * 1e9
+
+def main():
+    memory = Memory()
+    cpu = Cpu(memory, Display(), Keyboard(), Sound(mocked=True))
+    opcodes_functions_map = Cpu.opcodes_functions_map(cpu.quirks)
+
+    print(f'{"ROM":<24}{"opcodes":>8}{"scan (ns)":>12}{"table (ns)":>12}{"speedup":>9}')
+    for rom_name in sorted(os.listdir(ROMS_DIRECTORY)):
+        opcodes = read_rom_opcodes(os.path.join(ROMS_DIRECTORY, rom_name))
+        if len(opcodes) == 0:
+            continue
+
+        scan_ns = measure(lambda opcode: decode_opcode_linear_scan(cpu, opcodes_functions_map, opcode), opcodes)
+        table_ns = measure(cpu.decode_opcode, opcodes)
+        print(f'{rom_name:<24}{len(opcodes):>8}{scan_ns:>12.1f}{table_ns:>12.1f}{scan_ns / table_ns:>8.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import sys
+import time
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Display import Display
+from Keyboard import Keyboard
+from Memory import Memory
+from Recompiler import Recompiler
+from Sound import Sound
+
+# ROMs that run without waiting for a key press
+ROMS = ['MAZE', 'OUTLAW', 'PONG', 'SPACE_INVADERS', 'TANK', 'TETRIS', 'flags_test.ch8', 'heart_monitor.ch8', 'test_opcode.ch8']
+INSTRUCTIONS = 200000
+
+def create_cpu(rom_name):
+    memory = Memory()
+    cpu = Cpu(memory, Display(), Keyboard(), Sound(mocked=True))
+
+    with open(f'roms/{rom_name}', 'rb') as f:
+        rom = f.read()
+    for i, byte in enumerate(rom):
+        memory.write_8bit(Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS + i, byte)
+
+    return cpu
+
+def interpret(cpu):
+    start = time.perf_counter()
+    for _ in range(INSTRUCTIONS):
+        cpu.execute_cpu_cycle()
+    return INSTRUCTIONS / (time.perf_counter() - start)
+
+def recompile(cpu):
+    recompiler = Recompiler(cpu)
+    start = time.perf_counter()
+    executed = recompiler.run(INSTRUCTIONS)
+    return executed / (time.perf_counter() - start)
+
+def main():
+    print(f'{"ROM":<24}{"interpreter (ips)":>20}{"recompiler (ips)":>20}{"speedup":>9}')
+    for rom_name in ROMS:
+        interpreter_ips = interpret(create_cpu(rom_name))
+        recompiler_ips = recompile(create_cpu(rom_name))
+        print(f'{rom_name:<24}{interpreter_ips:>20,.0f}{recompiler_ips:>20,.0f}{recompiler_ips / interpreter_ips:>8.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import sys
+import time
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Display import Display
+from Keyboard import Keyboard
+from Lockstep import Lockstep
+from Memory import Memory
+from Sound import Sound
+
+ROM = 'PONG'
+MACHINES = [1, 10, 100, 1000, 10000]
+STEPS = 600
+
+def read_rom():
+    with open(f'roms/{ROM}', 'rb') as f:
+        return f.read()
+
+def interpret(rom):
+    memory = Memory()
+    cpu = Cpu(memory, Display(headless=True), Keyboard(), Sound(headless=True), headless=True)
+    memory.write_range(Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS, rom)
+
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        cpu.execute_cpu_cycle()
+    return STEPS / (time.perf_counter() - start)
+
+def lockstep(rom, number_machines):
+    engine = Lockstep(number_machines, seed=0)
+    engine.load_rom(rom)
+
+    start = time.perf_counter()
+    engine.run_frames(STEPS // 10, 10)
+    return engine.instructions_executed / (time.perf_counter() - start)
+
+def main():
+    rom = read_rom()
+    interpreter_ips = interpret(rom)
+
+    print(f'{ROM}: one Cpu interpreter runs {interpreter_ips:,.0f} instructions/s')
+    print(f'{"machines":>10}{"aggregate (ips)":>20}{"per machine (ips)":>20}{"vs interpreter":>16}')
+    for number_machines in MACHINES:
+        ips = lockstep(rom, number_machines)
+        print(f'{number_machines:>10}{ips:>20,.0f}{ips / number_machines:>20,.0f}{ips / interpreter_ips:>15.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import random
+import sys
+import time
+
+sys.path.append('src')
+
+from Emulator import Emulator
+
+# a scripted session recorded and replayed by each engine, the replay must be bit-identical
+# (the recompiler compiles its regions during the replay, a short session hardly pays for their compilation)
+ROMS = ['PONG', 'TETRIS', 'SPACE_INVADERS', 'TANK']
+FRAMES = 1800 # 30 seconds at 60Hz
+SEED = 1234
+
+def create_emulator(rom_name, engine='interpreter'):
+    emulator = Emulator(headless=True, engine=engine)
+    emulator.load_rom(f'roms/{rom_name}', verbose=False)
+    return emulator
+
+def record_session(rom_name, engine):
+    """ Record a movie holding random keys for a few frames at a time. """
+
+    emulator = create_emulator(rom_name, engine)
+    keys = random.Random(SEED)
+    state = { 'mask': 0, 'frames': 0 }
+
+    def handle_events():
+        if state['frames'] == 0:
+            state['mask'] = 1 << keys.randrange(0x10) if keys.random() < 0.7 else 0
+            state['frames'] = keys.randrange(1, 30)
+        state['frames'] -= 1
+        emulator.keyboard.set_pressed_keys_mask(state['mask'])
+
+    movie = emulator.record_movie(SEED, handle_events)
+    emulator.run_frames(FRAMES)
+    return movie, emulator.snapshot()
+
+def replay(rom_name, engine, movie):
+    emulator = create_emulator(rom_name, engine)
+    start = time.perf_counter()
+    emulator.replay(movie)
+    return len(movie) / (time.perf_counter() - start), emulator.snapshot()
+
+def main():
+    print(f'{"ROM":<16}{"engine":<14}{"frames/s":>12}{"speed":>9}{"identical":>11}')
+    for rom_name in ROMS:
+        for engine in Emulator.ENGINES:
+            movie, expected = record_session(rom_name, engine)
+            fps, snapshot = replay(rom_name, engine, movie)
+            print(f'{rom_name:<16}{engine:<14}{fps:>12,.0f}{fps / 60:>8.1f}x{str(snapshot == expected):>11}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import os
+import random
+import sys
+import time
+
+# render without opening a window
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+sys.path.append('src')
+
+from Display import *
+
+FRAMES = 300
+
+def render_loop(display: Display):
+    """ Previous renderer: one rect per pixel and a full screen update. """
+
+    py_x = 0
+    py_y = 0
+    scale = display.pixel_scale
+
+    for byte_row in display.framebuffer():
+        for i in range(8):
+            pixel_color = PIXEL_OFF
+            if byte_row > 0 and (byte_row & 1 << (7 - i)) > 0:
+                pixel_color = PIXEL_ON
+
+            rect = pygame.Rect(py_x, py_y, scale, scale)
+            pygame.draw.rect(display.screen, pixel_color, rect)
+
+            py_x = py_x + scale
+
+        if py_x >= SCREEN_SCALED_WIDTH:
+            py_x = 0
+            py_y = py_y + scale
+
+    pygame.display.update()
+
+def draw_random_screen(display: Display):
+    display.buffer[:display.size] = bytes(random.getrandbits(8) for _ in range(display.size))
+    display.mark_all_dirty()
+
+def draw_random_sprite(display: Display):
+    sprite = bytes(random.getrandbits(8) for _ in range(5))
+    display.draw_sprite(random.randrange(display.width), random.randrange(display.height), sprite)
+
+def scroll_down(display: Display):
+    display.scroll_down(1)
+    display.draw_sprite(random.randrange(display.width), 0, bytes([random.getrandbits(8)]))
+
+def measure(display: Display, draw, render):
+    elapsed = 0
+    for _ in range(FRAMES):
+        draw(display)
+        start = time.perf_counter()
+        render(display)
+        elapsed += time.perf_counter() - start
+    return elapsed / FRAMES * 1000
+
+def main():
+    display = Display()
+    display.initialize()
+
+    scenarios = [
+        ('full screen changed', draw_random_screen),
+        ('one sprite changed', draw_random_sprite),
+        ('scrolled down', scroll_down),
+        ('nothing changed', lambda display: None),
+    ]
+
+    print(f'{"frame":<32}{"loop (ms)":>12}{"numpy (ms)":>12}{"speedup":>9}')
+    for hires in (False, True):
+        display.set_hires(hires)
+        for name, draw in scenarios:
+            name = f'{name}{" (hi-res)" if hires else ""}'
+            loop_ms = measure(display, draw, render_loop)
+            display.dirty_rows.clear()
+            numpy_ms = measure(display, draw, Display.render)
+            print(f'{name:<32}{loop_ms:>12.3f}{numpy_ms:>12.3f}{loop_ms / max(numpy_ms, 1e-6):>8.0f}x')
+
+    pygame.quit()
+
+if __name__ == '__main__':
+    main()
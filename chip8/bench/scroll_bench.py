@@ -0,0 +1,55 @@
+import random
+import sys
+import time
+
+sys.path.append('src')
+
+from Display import *
+
+REPETITIONS = 500
+
+def get_pixel(display: Display, x, y):
+    return (display.buffer[y * display.row_bytes + x // PIXELS_PER_BYTE] >> (7 - x % PIXELS_PER_BYTE)) & 1
+
+def set_pixel(display: Display, x, y, value):
+    offset = y * display.row_bytes + x // PIXELS_PER_BYTE
+    mask = 0x80 >> (x % PIXELS_PER_BYTE)
+    display.buffer[offset] = (display.buffer[offset] | mask) if value else (display.buffer[offset] & ~mask)
+
+def scroll_down_per_pixel(display: Display, number_rows):
+    """ Scroll moving one pixel at a time, as a framebuffer of bits in memory would be scrolled. """
+
+    for y in range(display.height - 1, -1, -1):
+        for x in range(display.width):
+            set_pixel(display, x, y, get_pixel(display, x, y - number_rows) if y >= number_rows else 0)
+
+def scroll_right_per_pixel(display: Display, number_pixels):
+    for y in range(display.height):
+        for x in range(display.width - 1, -1, -1):
+            set_pixel(display, x, y, get_pixel(display, x - number_pixels, y) if x >= number_pixels else 0)
+
+def measure(display: Display, scroll, repetitions):
+    display.buffer[:display.size] = bytes(random.getrandbits(8) for _ in range(display.size))
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        scroll(display)
+    return (time.perf_counter() - start) / repetitions * 1e6
+
+def main():
+    display = Display(headless=True)
+    scenarios = [
+        ('00CN (down 4 rows)', lambda display: scroll_down_per_pixel(display, 4), lambda display: display.scroll_down(4)),
+        ('00FB (right 4 pixels)', lambda display: scroll_right_per_pixel(display, 4), lambda display: display.scroll_right(4)),
+    ]
+
+    print(f'{"scroll":<32}{"per pixel (us)":>16}{"bulk (us)":>12}{"speedup":>9}')
+    for hires in (False, True):
+        display.set_hires(hires)
+        for name, per_pixel, bulk in scenarios:
+            name = f'{name}{" (hi-res)" if hires else ""}'
+            per_pixel_us = measure(display, per_pixel, REPETITIONS // 50)
+            bulk_us = measure(display, bulk, REPETITIONS)
+            print(f'{name:<32}{per_pixel_us:>16.1f}{bulk_us:>12.1f}{per_pixel_us / bulk_us:>8.0f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import sys
+import time
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Emulator import Emulator
+
+REPETITIONS = 2000
+
+def full_snapshot(emulator: Emulator):
+    """ Previous layout: the whole memory copied after the state, for its size. """
+    return emulator.snapshot()[:Cpu.SNAPSHOT_STATE_SIZE] + bytes(emulator.memory.memory)
+
+def measure(function, repetitions=REPETITIONS):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        function()
+    return (time.perf_counter() - start) / repetitions * 1e6
+
+def main():
+    print(f'{"profile":<16}{"memory":>8}{"full (bytes)":>14}{"paged (bytes)":>15}{"snapshot (us)":>15}{"restore (us)":>14}')
+    for profile in ('cosmac_vip', 'xochip'):
+        emulator = Emulator(headless=True, quirks=profile)
+        emulator.load_rom('roms/PONG', verbose=False)
+        emulator.run_frames(60)
+
+        full = full_snapshot(emulator)
+        paged = emulator.snapshot()
+        paged_us = measure(emulator.snapshot)
+        restore_us = measure(lambda: emulator.restore(paged))
+        print(f'{profile:<16}{emulator.memory.size // 1024:>6}KB{len(full):>14}{len(paged):>15}'
+              f'{paged_us:>15.1f}{restore_us:>14.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,38 @@
 import pygame
-import random
-import time
+import struct
 import sys
 
+from functools import partial
+
 from Display import *
 from Memory import Memory
+from IdleLoop import IdleLoop
 from Keyboard import Keyboard
-from Sound import Sound
+from Quirks import Quirks
+from RandomBytes import RandomBytes
+from Sound import Sound, AUDIO_PATTERN_SIZE, DEFAULT_AUDIO_PATTERN, DEFAULT_PITCH
 
 class Cpu:
     """ CPU with registers and cycles """
 
     TIMERS_CLOCK_SPEED = 60 #hz
-    CLOCK_SPEED = 120 #hz
+    CLOCK_SPEED = 600 #hz
 
     """ Memory area reserved for program opcodes of 2 bytes long """
     MEMORY_PROGRAM_CODE_AREA_START_ADDRESS = 0x200
     MEMORY_PROGRAM_CODE_AREA_END_ADDRESS = 0xE9F
 
-    """ Memory area reserved for stack (size of 12 x 2-byte) """
+    """ Memory area reserved for stack (size of 12 x 2-byte)
+
+    The stack and the registers mirror are at the top of the first 4 KB. With the 64 KB
+    memory of XO-CHIP they are moved by `reserved_area_offset` to the top of the memory,
+    out of the way of the long programs.
+    """
     MEMORY_STACK_START_ADDRESS = 0xEA0 # Addr 0xEA0 + REGISTER_SP_ADDRESS
     MEMORY_STACK_END_ADDRESS = 0xEBF # 16 levels of nested subroutines
 
-    # internal registers (implemented using the memory)
+    # internal registers are held by the Cpu, these addresses are where they
+    # are mirrored in memory to keep the COSMAC VIP layout visible
     REGISTER_PC_ADDRESS = 0xED0 # 16-bit program counter
     REGISTER_I_ADDRESS = 0xED2 # 16-bit
     REGISTER_SP_ADDRESS = 0xED4 # 8-bit stack pointer
@@ -37,97 +47,109 @@ class Cpu:
     # reserved data register VF
     REGISTER_DATA_VF_ADDRESS = 0xEFF
 
-    """ Memory area reserved for screen bits (248 bytes) """
-    MEMORY_DISPLAY_AREA_START_ADDRESS = 0xF00
-    MEMORY_DISPLAY_AREA_END_ADDRESS = 0xFFF
-
-    def __init__(self, memory: Memory, display: Display, keyboard: Keyboard, sound: Sound):
+    """ SUPER-CHIP 8x10 font, after the 8x5 one """
+    MEMORY_BIG_FONT_START_ADDRESS = 0x050 # see `Memory`
+    BIG_FONT_SPRITE_SIZE = 10
+
+    """ Snapshot blob (big-endian): header, registers, keyboard, audio, random generator, display and the memory """
+    SNAPSHOT_MAGIC = b'C8SS'
+    SNAPSHOT_VERSION = 6
+    SNAPSHOT_HEADER = struct.Struct('>4sH') # magic and version
+    SNAPSHOT_REGISTERS = struct.Struct('>HHBBBB16s') # PC, I, SP, DT, ST, random number and V0 to VF
+    SNAPSHOT_KEYBOARD = struct.Struct('>HBB') # pressed keys mask, latch and FX0A waiting register (0xFF when empty)
+    SNAPSHOT_AUDIO = struct.Struct(f'>B{AUDIO_PATTERN_SIZE}s') # pitch and audio pattern
+    SNAPSHOT_RANDOM = RandomBytes.STATE # see `RandomBytes.getstate`
+    SNAPSHOT_DISPLAY = Display.SNAPSHOT # hi-res flag, selected planes and planes
+    # size before the memory, whose snapshot only holds the used pages (see `Memory.snapshot`)
+    SNAPSHOT_STATE_SIZE = (SNAPSHOT_HEADER.size + SNAPSHOT_REGISTERS.size + SNAPSHOT_KEYBOARD.size + SNAPSHOT_AUDIO.size
+                           + SNAPSHOT_RANDOM.size + SNAPSHOT_DISPLAY.size)
+
+    # opcode patterns by mask, an opcode is decoded by the first mask it matches
+    opcodes_masks = [
+        { 'mask': 0xFFFF, 'opcode': 0x00E0 },
+        { 'mask': 0xFFFF, 'opcode': 0x00EE },
+        { 'mask': 0xFFF0, 'opcode': 0x00C0 },
+        { 'mask': 0xFFF0, 'opcode': 0x00D0 },
+        { 'mask': 0xFFFF, 'opcode': 0x00FB },
+        { 'mask': 0xFFFF, 'opcode': 0x00FC },
+        { 'mask': 0xFFFF, 'opcode': 0x00FE },
+        { 'mask': 0xFFFF, 'opcode': 0x00FF },
+        # { 'mask': 0xF000, 'opcode': 0x0000 },
+        { 'mask': 0xF000, 'opcode': 0x1000 },
+        { 'mask': 0xF000, 'opcode': 0x2000 },
+        { 'mask': 0xF000, 'opcode': 0x3000 },
+        { 'mask': 0xF000, 'opcode': 0x4000 },
+        { 'mask': 0xF00F, 'opcode': 0x5000 },
+        { 'mask': 0xF00F, 'opcode': 0x5002 },
+        { 'mask': 0xF00F, 'opcode': 0x5003 },
+        { 'mask': 0xF000, 'opcode': 0x6000 },
+        { 'mask': 0xF000, 'opcode': 0x7000 },
+        { 'mask': 0xF00F, 'opcode': 0x8000 },
+        { 'mask': 0xF00F, 'opcode': 0x8001 },
+        { 'mask': 0xF00F, 'opcode': 0x8002 },
+        { 'mask': 0xF00F, 'opcode': 0x8003 },
+        { 'mask': 0xF00F, 'opcode': 0x8004 },
+        { 'mask': 0xF00F, 'opcode': 0x8005 },
+        { 'mask': 0xF00F, 'opcode': 0x8006 },
+        { 'mask': 0xF00F, 'opcode': 0x8007 },
+        { 'mask': 0xF00F, 'opcode': 0x800E },
+        { 'mask': 0xF00F, 'opcode': 0x9000 },
+        { 'mask': 0xF000, 'opcode': 0xA000 },
+        { 'mask': 0xF000, 'opcode': 0xB000 },
+        { 'mask': 0xF000, 'opcode': 0xC000 },
+        { 'mask': 0xF000, 'opcode': 0xD000 },
+        { 'mask': 0xF0FF, 'opcode': 0xE09E },
+        { 'mask': 0xF0FF, 'opcode': 0xE0A1 },
+        { 'mask': 0xF0FF, 'opcode': 0xF000 },
+        { 'mask': 0xF0FF, 'opcode': 0xF001 },
+        { 'mask': 0xFFFF, 'opcode': 0xF002 },
+        { 'mask': 0xF0FF, 'opcode': 0xF007 },
+        { 'mask': 0xF0FF, 'opcode': 0xF00A },
+        { 'mask': 0xF0FF, 'opcode': 0xF015 },
+        { 'mask': 0xF0FF, 'opcode': 0xF018 },
+        { 'mask': 0xF0FF, 'opcode': 0xF01E },
+        { 'mask': 0xF0FF, 'opcode': 0xF029 },
+        { 'mask': 0xF0FF, 'opcode': 0xF030 },
+        { 'mask': 0xF0FF, 'opcode': 0xF033 },
+        { 'mask': 0xF0FF, 'opcode': 0xF03A },
+        { 'mask': 0xF0FF, 'opcode': 0xF055 },
+        { 'mask': 0xF0FF, 'opcode': 0xF065 },
+    ]
+
+    # dispatch tables by the quirks they depend on, see `get_dispatch_table`
+    dispatch_tables = {}
+
+    def __init__(self, memory: Memory, display: Display, keyboard: Keyboard, sound: Sound, mirror_registers=False, headless=False, seed=None,
+                 quirks: Quirks = None):
         self.memory = memory
+        # shift of the stack and registers mirror to the top of a memory larger than 4 KB
+        self.reserved_area_offset = memory.size - Memory.MEMORY_SIZE
         self.keyboard = keyboard
         self.display = display
         self.sound = sound
 
-        self.clock = pygame.time.Clock()
-
-        self.last_time = time.time()
-
-        self.opcodes_masks = [
-            { 'mask': 0xFFFF, 'opcode': 0x00E0 },
-            { 'mask': 0xFFFF, 'opcode': 0x00EE },
-            # { 'mask': 0xF000, 'opcode': 0x0000 },
-            { 'mask': 0xF000, 'opcode': 0x1000 },
-            { 'mask': 0xF000, 'opcode': 0x2000 },
-            { 'mask': 0xF000, 'opcode': 0x3000 },
-            { 'mask': 0xF000, 'opcode': 0x4000 },
-            { 'mask': 0xF00F, 'opcode': 0x5000 },
-            { 'mask': 0xF000, 'opcode': 0x6000 },
-            { 'mask': 0xF000, 'opcode': 0x7000 },
-            { 'mask': 0xF00F, 'opcode': 0x8000 },
-            { 'mask': 0xF00F, 'opcode': 0x8001 },
-            { 'mask': 0xF00F, 'opcode': 0x8002 },
-            { 'mask': 0xF00F, 'opcode': 0x8003 },
-            { 'mask': 0xF00F, 'opcode': 0x8004 },
-            { 'mask': 0xF00F, 'opcode': 0x8005 },
-            { 'mask': 0xF00F, 'opcode': 0x8006 },
-            { 'mask': 0xF00F, 'opcode': 0x8007 },
-            { 'mask': 0xF00F, 'opcode': 0x800E },
-            { 'mask': 0xF00F, 'opcode': 0x9000 },
-            { 'mask': 0xF000, 'opcode': 0xA000 },
-            { 'mask': 0xF000, 'opcode': 0xB000 },
-            { 'mask': 0xF000, 'opcode': 0xC000 },
-            { 'mask': 0xF000, 'opcode': 0xD000 },
-            { 'mask': 0xF0FF, 'opcode': 0xE09E },
-            { 'mask': 0xF0FF, 'opcode': 0xE0A1 },
-            { 'mask': 0xF0FF, 'opcode': 0xF000 },
-            { 'mask': 0xF0FF, 'opcode': 0xF007 },
-            { 'mask': 0xF0FF, 'opcode': 0xF00A },
-            { 'mask': 0xF0FF, 'opcode': 0xF015 },
-            { 'mask': 0xF0FF, 'opcode': 0xF018 },
-            { 'mask': 0xF0FF, 'opcode': 0xF01E },
-            { 'mask': 0xF0FF, 'opcode': 0xF029 },
-            { 'mask': 0xF0FF, 'opcode': 0xF033 },
-            { 'mask': 0xF0FF, 'opcode': 0xF055 },
-            { 'mask': 0xF0FF, 'opcode': 0xF065 },
-        ]
-
-        self.opcodes_functions_map = {
-            0x00E0: lambda _: self.opcode_00E0(),
-            0x00EE: lambda _: self.opcode_00EE(),
-            # 0x0000: lambda opcode: self.opcode_0NNN(self.get_opcode_value_NNN(opcode)),
-            0x1000: lambda opcode: self.opcode_1NNN(self.get_opcode_value_NNN(opcode)),
-            0x2000: lambda opcode: self.opcode_2NNN(self.get_opcode_value_NNN(opcode)),
-            0x3000: lambda opcode: self.opcode_3XKK(self.get_opcode_value_X(opcode), self.get_opcode_value_KK(opcode)),
-            0x4000: lambda opcode: self.opcode_4XKK(self.get_opcode_value_X(opcode), self.get_opcode_value_KK(opcode)),
-            0x5000: lambda opcode: self.opcode_5XY0(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x6000: lambda opcode: self.opcode_6XKK(self.get_opcode_value_X(opcode), self.get_opcode_value_KK(opcode)),
-            0x7000: lambda opcode: self.opcode_7XKK(self.get_opcode_value_X(opcode), self.get_opcode_value_KK(opcode)),
-            0x8000: lambda opcode: self.opcode_8XY0(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x8001: lambda opcode: self.opcode_8XY1(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x8002: lambda opcode: self.opcode_8XY2(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x8003: lambda opcode: self.opcode_8XY3(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x8004: lambda opcode: self.opcode_8XY4(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x8005: lambda opcode: self.opcode_8XY5(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x8006: lambda opcode: self.opcode_8XY6(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x8007: lambda opcode: self.opcode_8XY7(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x800E: lambda opcode: self.opcode_8XYE(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0x9000: lambda opcode: self.opcode_9XY0(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode)),
-            0xA000: lambda opcode: self.opcode_ANNN(self.get_opcode_value_NNN(opcode)),
-            0xB000: lambda opcode: self.opcode_BNNN(self.get_opcode_value_NNN(opcode)),
-            0xC000: lambda opcode: self.opcode_CXKK(self.get_opcode_value_X(opcode), self.get_opcode_value_KK(opcode)),
-            0xD000: lambda opcode: self.opcode_DXYK(self.get_opcode_value_X(opcode), self.get_opcode_value_Y(opcode), self.get_opcode_value_K(opcode)),
-            0xE09E: lambda opcode: self.opcode_EX9E(self.get_opcode_value_X(opcode)),
-            0xE0A1: lambda opcode: self.opcode_EXA1(self.get_opcode_value_X(opcode)),
-            0xF000: lambda opcode: self.opcode_FX00(self.get_opcode_value_X(opcode)),
-            0xF007: lambda opcode: self.opcode_FX07(self.get_opcode_value_X(opcode)),
-            0xF00A: lambda opcode: self.opcode_FX0A(self.get_opcode_value_X(opcode)),
-            0xF015: lambda opcode: self.opcode_FX15(self.get_opcode_value_X(opcode)),
-            0xF018: lambda opcode: self.opcode_FX18(self.get_opcode_value_X(opcode)),
-            0xF01E: lambda opcode: self.opcode_FX1E(self.get_opcode_value_X(opcode)),
-            0xF029: lambda opcode: self.opcode_FX29(self.get_opcode_value_X(opcode)),
-            0xF033: lambda opcode: self.opcode_FX33(self.get_opcode_value_X(opcode)),
-            0xF055: lambda opcode: self.opcode_FX55(self.get_opcode_value_X(opcode)),
-            0xF065: lambda opcode: self.opcode_FX65(self.get_opcode_value_X(opcode)),
-        }
+        # behaviours of the interpreter being emulated, see `select_quirks_handlers`
+        self.quirks = Quirks.get(quirks)
+
+        # data registers V0 to VF
+        self.V = bytearray(0x10)
+
+        # copy the registers into memory after each cycle
+        self.mirror_registers = mirror_registers
+
+        self.headless = headless
+
+        # generator used by CXKK, owned by the CPU so its state is part of the snapshots
+        self.random = RandomBytes(seed)
+
+        # decoded opcodes shared by the cpus with the same quirks, then bound to this cpu by address
+        self.opcodes_dispatch_table = Cpu.get_dispatch_table(self.quirks)
+        self.instruction_cache = [None] * memory.size
+        self.memory.add_write_listener(self.invalidate_instruction_cache)
+
+        # idle loop containing each address, False when there is none and None when not detected yet
+        self.idle_loops = [None] * memory.size
+        self.memory.add_write_listener(self.invalidate_idle_loops)
 
         self.initialize()
 
@@ -142,19 +164,32 @@ class Cpu:
         """
 
         # program start at memory address 0x200
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS)
+        self.PC = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
 
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS)
+        self.I = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
 
         # stack points start at reserved memory address
-        self.memory.write_8bit(Cpu.REGISTER_SP_ADDRESS, 0)
+        self.SP = 0
 
         # registers for delay and sound timers
-        self.memory.write_8bit(Cpu.REGISTER_DT_ADDRESS, 0x00)
-        self.memory.write_8bit(Cpu.REGISTER_ST_ADDRESS, 0x00)
+        self.DT = 0x00
+        self.ST = 0x00
 
-        # clear the screen
-        self.opcode_00E0()
+        # last random number generated by CXKK
+        self.random_number = 0x00
+
+        # register waiting for a key release (FX0A), None when running
+        self.waiting_key_register = None
+
+        # XO-CHIP audio registers played by the sound while ST > 0
+        self.pitch = DEFAULT_PITCH
+        self.audio_pattern = bytearray(DEFAULT_AUDIO_PATTERN)
+        self.update_sound()
+
+        self.V[:] = bytes(0x10)
+
+        # clear the screen in the 64x32 mode, drawing on the first plane
+        self.display.reset()
 
     def handle_pygame_events(self):
         for event in pygame.event.get():
@@ -163,129 +198,347 @@ class Cpu:
             if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
                 self.keyboard.handle_pygame_event(event)
 
-    def start(self, on_stop):
-        """ Start the CPU processing. """
-        # Steps:
-        # 1 - advance clock
-        #   - generate interrupts
-        #   - emulate graphics
-        #   - emulate sound
-        # 2 - increase PC
-        # 3 - check interruption (DT)
-        # 4 - check ST to beep
-
-        if on_stop != None:
-            self.on_stop = on_stop
-
-        while True:
-            self.handle_pygame_events()
-
-            self.execute_cpu_cycle()
-
-            # emulate graphics
-            self.display.render()
-
-            # simulate 60Hz refresh rate
-            time.sleep(1 / Cpu.CLOCK_SPEED)
-            # self.clock.tick(Cpu.CLOCK_SPEED)
+    def is_waiting_key(self):
+        """ Return `True` when FX0A waits and no key was released, so executing would not change the state. """
+        return self.waiting_key_register is not None and self.keyboard.last_key_pressed is None
 
     def stop(self):
-        if self.on_stop != None:
-            self.on_stop()
-
         pygame.quit()
         pygame.mixer.quit()
         sys.exit()
 
-    def update_timers(self):
-        current_time = time.time()
-        elapsed_time = current_time - self.last_time
+    def tick_timers(self, ticks=1):
+        """ Decrement the delay and sound timers by the given number of 60Hz ticks (stopping at 0).
+
+        The ticks are counted by the caller's clock (`Scheduler` frames or `TimerClock`).
+        The tone stops when the sound timer reaches 0.
+        """
 
-        # timer update at rate of 60Hz
-        if elapsed_time >= (1 / Cpu.TIMERS_CLOCK_SPEED):
-            self.last_time = current_time
+        # update delay timer
+        if self.DT > 0:
+            self.DT = max(self.DT - ticks, 0)
 
-            # update delay timer
-            if self.memory.read_8bit(self.REGISTER_DT_ADDRESS) > 0:
-                self.memory.write_8bit(self.REGISTER_DT_ADDRESS, self.memory.read_8bit(self.REGISTER_DT_ADDRESS) - 1)
+        # update sound timer
+        if self.ST > 0:
+            self.ST = max(self.ST - ticks, 0)
+            if self.ST == 0:
+                self.sound.gate(False)
 
-            # update sound timer
-            if self.memory.read_8bit(self.REGISTER_ST_ADDRESS) > 0:
-                self.sound.play()
+    def update_sound(self):
+        """ Set the sound from the audio registers and the sound timer. """
 
-                self.memory.write_8bit(self.REGISTER_ST_ADDRESS, self.memory.read_8bit(self.REGISTER_ST_ADDRESS) - 1)
+        self.sound.set_pattern(self.audio_pattern)
+        self.sound.set_pitch(self.pitch)
+        self.sound.gate(self.ST > 0)
 
     def execute_cpu_cycle(self):
         """ CPU cycle execution.
 
         Steps:
-        - fetch instruction
+        - fetch instruction (already decoded if this address was executed before)
         - step PC
         - decode instruction
         - execute
         """
 
-        # fetch the opcode
-        pc = self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS)
-        opcode = self.memory.read_16bit(pc)
-        # print(f'\tPC {hex(pc)}; Opcode {hex(opcode)}')
-        self.step_pc()
-
-        # empty memory just do nothing
-        if opcode == 0x0000:
-            return
+        # fetch the decoded opcode
+        pc = self.PC
+        decoded_opcode = self.instruction_cache[pc]
+        if decoded_opcode is None:
+            decoded_opcode = self.cache_instruction(pc)
+        self.PC = pc + 2
 
         try:
-            # decode it
-            decoded_opcode = self.decode_opcode(opcode)
-
             # execute it
-            if decoded_opcode is not None:
-                decoded_opcode()
+            decoded_opcode()
         except Exception as ex:
+            opcode = self.memory.read_16bit(pc)
             print('\n=== Debug Trace ===')
             print(f'PC {hex(pc)}; Opcode {hex(opcode)}; Error: {ex}\n')
             raise ex
 
+        if self.mirror_registers:
+            self.sync_registers_to_memory()
+
+    def find_idle_loop(self):
+        """ Return the idle loop containing PC (see `IdleLoop`), `False` if there is none. """
+
+        pc = self.PC
+        loop = self.idle_loops[pc]
+        if loop is None:
+            loop = IdleLoop.find(self.memory, pc) or False
+            self.idle_loops[pc] = loop
+        return loop
+
+    def fast_forward_idle_loop(self, loop: IdleLoop, number_instructions):
+        """ Run the idle loop at PC and skip the rest of the given number of instructions.
+
+        The instructions are executed up to the loop start and for one whole iteration.
+        If PC followed the loop the state is a fixed point, so the remaining instructions
+        are skipped, only moving PC where they would end. The timers and keys must not
+        change meanwhile.
+
+        Returns the number of instructions executed or skipped: all of them when the loop
+        was fast-forwarded, fewer when it was left (the caller executes the rest).
+        """
+
+        position = (self.PC - loop.start) // 2
+        needed = (loop.length - position) % loop.length + loop.length
+        if number_instructions <= needed:
+            return 0
+
+        for executed in range(needed):
+            if self.PC != loop.start + 2 * position:
+                return executed
+            self.execute_cpu_cycle()
+            position = (position + 1) % loop.length
+
+        if self.PC != loop.start:
+            return needed
+
+        self.PC = loop.start + 2 * ((number_instructions - needed) % loop.length)
+        if self.mirror_registers:
+            self.sync_registers_to_memory()
+        return number_instructions
+
+    def invalidate_idle_loops(self, address, number_bytes):
+        """ Drop the idle loops detected over the written memory range.
+
+        A loop is up to 3 instructions long, the addresses from 5 bytes before to
+        4 bytes after the range may be in a loop reading the written bytes.
+        """
+        start = max(address - 5, 0)
+        end = min(address + number_bytes + 4, self.memory.size)
+        self.idle_loops[start:end] = [None] * (end - start)
+
+    def cache_instruction(self, pc):
+        """ Fetch and decode the opcode at the given address, storing it in the instruction cache. """
+
+        opcode = self.memory.read_16bit(pc)
+        # print(f'\tPC {hex(pc)}; Opcode {hex(opcode)}')
+
+        # empty memory or unknown opcodes decode to None and do nothing
+        decoded_opcode = self.decode_opcode(opcode)
+        if decoded_opcode is None:
+            decoded_opcode = self.opcode_nop
+
+        self.instruction_cache[pc] = decoded_opcode
+        return decoded_opcode
+
+    def invalidate_instruction_cache(self, address, number_bytes):
+        """ Drop the cached instructions overlapping the written memory range.
+
+        An instruction is 2 bytes long, so the one starting at the byte before
+        the range is also affected.
+        """
+        start = max(address - 1, 0)
+        end = address + number_bytes
+        self.instruction_cache[start:end] = [None] * (end - start)
+
+    @staticmethod
+    def select_quirks_handlers(quirks: Quirks):
+        """ Return the handlers of the opcodes depending on the quirks, by opcode pattern.
+
+        The handlers are chosen once for the dispatch table, so the opcodes don't test
+        the quirks when executed. BNNN and F000 get the function decoding them, as the
+        `vx` quirk decodes BNNN as BXNN and the `long_load` quirk F000 as F000 NNNN.
+        The skips only read the next instruction with the `long_load` quirk.
+        """
+
+        if quirks.jump == Quirks.JUMP_VX:
+            jump = lambda opcode: (Cpu.opcode_BXNN, (Cpu.get_opcode_value_X(opcode), opcode & 0xFF))
+        else:
+            jump_handler = Cpu.opcode_BNNN if quirks.jump == Quirks.JUMP_V0_DOUBLED else Cpu.opcode_BNNN_V0
+            jump = lambda opcode: (jump_handler, (Cpu.get_opcode_value_NNN(opcode),))
+
+        store, load = {
+            Quirks.LOAD_STORE_INCREMENT: (Cpu.opcode_FX55, Cpu.opcode_FX65),
+            Quirks.LOAD_STORE_INCREMENT_X: (Cpu.opcode_FX55_increment_x, Cpu.opcode_FX65_increment_x),
+            Quirks.LOAD_STORE_UNCHANGED: (Cpu.opcode_FX55_keep_i, Cpu.opcode_FX65_keep_i),
+        }[quirks.load_store]
+
+        skips = {
+            0x3000: Cpu.opcode_3XKK,
+            0x4000: Cpu.opcode_4XKK,
+            0x5000: Cpu.opcode_5XY0,
+            0x9000: Cpu.opcode_9XY0,
+            0xE09E: Cpu.opcode_EX9E,
+            0xE0A1: Cpu.opcode_EXA1,
+        }
+        if quirks.long_load:
+            skips = { pattern: partial(Cpu.skip_over_long_load, skip_handler=skip) for pattern, skip in skips.items() }
+            # F000 NNNN is the long load, FX00 with another X sets the pitch
+            pitch = lambda opcode: (Cpu.opcode_FX00, (Cpu.get_opcode_value_X(opcode),)) \
+                                   if Cpu.get_opcode_value_X(opcode) else (Cpu.opcode_F000, ())
+        else:
+            pitch = lambda opcode: (Cpu.opcode_FX00, (Cpu.get_opcode_value_X(opcode),))
+
+        return {
+            **skips,
+            0x8001: Cpu.opcode_8XY1 if quirks.vf_reset else Cpu.opcode_8XY1_keep_vf,
+            0x8002: Cpu.opcode_8XY2 if quirks.vf_reset else Cpu.opcode_8XY2_keep_vf,
+            0x8003: Cpu.opcode_8XY3 if quirks.vf_reset else Cpu.opcode_8XY3_keep_vf,
+            0x8006: Cpu.opcode_8XY6 if quirks.shift_vy else Cpu.opcode_8XY6_shift_vx,
+            0x800E: Cpu.opcode_8XYE if quirks.shift_vy else Cpu.opcode_8XYE_shift_vx,
+            0xB000: jump,
+            0xF000: pitch,
+            0xF055: store,
+            0xF065: load,
+        }
+
+    @staticmethod
+    def opcodes_functions_map(quirks: Quirks):
+        """ Return the function decoding each opcode pattern into its handler and arguments.
+
+        The handlers are the functions of the class, the arguments are the decoded values
+        (X, Y, K, KK, NNN) they are called with after the cpu.
+        """
+
+        handlers = Cpu.select_quirks_handlers(quirks)
+        return {
+            0x00E0: lambda _: (Cpu.opcode_00E0, ()),
+            0x00EE: lambda _: (Cpu.opcode_00EE, ()),
+            0x00C0: lambda opcode: (Cpu.opcode_00CN, (Cpu.get_opcode_value_K(opcode),)),
+            0x00D0: lambda opcode: (Cpu.opcode_00DN, (Cpu.get_opcode_value_K(opcode),)),
+            0x00FB: lambda _: (Cpu.opcode_00FB, ()),
+            0x00FC: lambda _: (Cpu.opcode_00FC, ()),
+            0x00FE: lambda _: (Cpu.opcode_00FE, ()),
+            0x00FF: lambda _: (Cpu.opcode_00FF, ()),
+            # 0x0000: lambda opcode: (Cpu.opcode_0NNN, (Cpu.get_opcode_value_NNN(opcode),)),
+            0x1000: lambda opcode: (Cpu.opcode_1NNN, (Cpu.get_opcode_value_NNN(opcode),)),
+            0x2000: lambda opcode: (Cpu.opcode_2NNN, (Cpu.get_opcode_value_NNN(opcode),)),
+            0x3000: lambda opcode: (handlers[0x3000], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_KK(opcode))),
+            0x4000: lambda opcode: (handlers[0x4000], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_KK(opcode))),
+            0x5000: lambda opcode: (handlers[0x5000], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x5002: lambda opcode: (Cpu.opcode_5XY2, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x5003: lambda opcode: (Cpu.opcode_5XY3, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x6000: lambda opcode: (Cpu.opcode_6XKK, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_KK(opcode))),
+            0x7000: lambda opcode: (Cpu.opcode_7XKK, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_KK(opcode))),
+            0x8000: lambda opcode: (Cpu.opcode_8XY0, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x8001: lambda opcode: (handlers[0x8001], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x8002: lambda opcode: (handlers[0x8002], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x8003: lambda opcode: (handlers[0x8003], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x8004: lambda opcode: (Cpu.opcode_8XY4, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x8005: lambda opcode: (Cpu.opcode_8XY5, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x8006: lambda opcode: (handlers[0x8006], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x8007: lambda opcode: (Cpu.opcode_8XY7, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x800E: lambda opcode: (handlers[0x800E], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0x9000: lambda opcode: (handlers[0x9000], (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0xA000: lambda opcode: (Cpu.opcode_ANNN, (Cpu.get_opcode_value_NNN(opcode),)),
+            0xB000: handlers[0xB000],
+            0xC000: lambda opcode: (Cpu.opcode_CXKK, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_KK(opcode))),
+            # DXY0 draws a 16x16 sprite (SUPER-CHIP)
+            0xD000: lambda opcode: (Cpu.opcode_DXYK, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode), Cpu.get_opcode_value_K(opcode)))
+                                   if Cpu.get_opcode_value_K(opcode) else
+                                   (Cpu.opcode_DXY0, (Cpu.get_opcode_value_X(opcode), Cpu.get_opcode_value_Y(opcode))),
+            0xE09E: lambda opcode: (handlers[0xE09E], (Cpu.get_opcode_value_X(opcode),)),
+            0xE0A1: lambda opcode: (handlers[0xE0A1], (Cpu.get_opcode_value_X(opcode),)),
+            0xF000: handlers[0xF000],
+            0xF001: lambda opcode: (Cpu.opcode_FN01, (Cpu.get_opcode_value_X(opcode),)),
+            0xF002: lambda opcode: (Cpu.opcode_F002, ()),
+            0xF007: lambda opcode: (Cpu.opcode_FX07, (Cpu.get_opcode_value_X(opcode),)),
+            0xF00A: lambda opcode: (Cpu.opcode_FX0A, (Cpu.get_opcode_value_X(opcode),)),
+            0xF015: lambda opcode: (Cpu.opcode_FX15, (Cpu.get_opcode_value_X(opcode),)),
+            0xF018: lambda opcode: (Cpu.opcode_FX18, (Cpu.get_opcode_value_X(opcode),)),
+            0xF01E: lambda opcode: (Cpu.opcode_FX1E, (Cpu.get_opcode_value_X(opcode),)),
+            0xF029: lambda opcode: (Cpu.opcode_FX29, (Cpu.get_opcode_value_X(opcode),)),
+            0xF030: lambda opcode: (Cpu.opcode_FX30, (Cpu.get_opcode_value_X(opcode),)),
+            0xF033: lambda opcode: (Cpu.opcode_FX33, (Cpu.get_opcode_value_X(opcode),)),
+            0xF03A: lambda opcode: (Cpu.opcode_FX3A, (Cpu.get_opcode_value_X(opcode),)),
+            0xF055: lambda opcode: (handlers[0xF055], (Cpu.get_opcode_value_X(opcode),)),
+            0xF065: lambda opcode: (handlers[0xF065], (Cpu.get_opcode_value_X(opcode),)),
+        }
+
+    @staticmethod
+    def get_dispatch_table(quirks: Quirks):
+        """ Return the dispatch table of the quirks, built the first time it is needed.
+
+        The table only depends on the quirks selecting handlers, so all the cpus with
+        the same ones share it.
+        """
+
+        key = (quirks.vf_reset, quirks.shift_vy, quirks.load_store, quirks.jump, quirks.long_load)
+        dispatch_table = Cpu.dispatch_tables.get(key)
+        if dispatch_table is None:
+            dispatch_table = Cpu.dispatch_tables[key] = Cpu.build_dispatch_table(quirks)
+        return dispatch_table
+
+    @staticmethod
+    def build_dispatch_table(quirks: Quirks):
+        """ Precompute the handler and the decoded arguments of every 16-bit opcode.
+
+        Each opcode mask is expanded to all the opcodes it matches, so decoding is a
+        single list lookup. Masks earlier in `opcodes_masks` take precedence, as in a
+        linear scan. The entries are `(handler, arguments)`, `None` for the opcodes
+        that cannot be decoded.
+        """
+
+        dispatch_table = [None] * 0x10000
+        opcodes_functions_map = Cpu.opcodes_functions_map(quirks)
+        for opcode_mask in Cpu.opcodes_masks:
+            mask = opcode_mask['mask']
+            decode_opcode = opcodes_functions_map[opcode_mask['opcode']]
+
+            # enumerate every value of the bits not covered by the mask
+            free_bits = ~mask & 0xFFFF
+            bits = free_bits
+            while True:
+                opcode = opcode_mask['opcode'] | bits
+                if dispatch_table[opcode] is None:
+                    dispatch_table[opcode] = decode_opcode(opcode)
+                if bits == 0:
+                    break
+                bits = (bits - 1) & free_bits
+
+        return dispatch_table
+
     def decode_opcode(self, opcode):
-        opcode_function = None
-        for opcode_mask in self.opcodes_masks:
-            if opcode & opcode_mask['mask'] == opcode_mask['opcode']:
-                opcode_function = self.opcodes_functions_map[opcode_mask['opcode']]
-                break
+        """ Return the handler of the given opcode bound to this cpu and its arguments, `None` if it cannot be decoded. """
 
-        if opcode_function is None:
+        decoded_opcode = self.opcodes_dispatch_table[opcode]
+        if decoded_opcode is None:
             return None
-            # raise Exception('Opcode cannot be decoded: %s' % hex(opcode));
+        handler, arguments = decoded_opcode
+        return partial(handler, self, *arguments)
 
-        return lambda: opcode_function(opcode)
-
-    def get_opcode_value_X(self, opcode):
+    @staticmethod
+    def get_opcode_value_X(opcode):
         """ Extract value X from opcode with format 0X00. """
         return (opcode & 0x0F00) >> 8
 
-    def get_opcode_value_Y(self, opcode):
+    @staticmethod
+    def get_opcode_value_Y(opcode):
         """ Extract value Y from opcode with format 00Y0. """
         return (opcode & 0x00F0) >> 4
 
-    def get_opcode_value_K(self, opcode):
+    @staticmethod
+    def get_opcode_value_K(opcode):
         """ Extract value K from opcode with format 000K. """
         return opcode & 0xF
 
-    def get_opcode_value_KK(self, opcode):
+    @staticmethod
+    def get_opcode_value_KK(opcode):
         """ Extract value KK from opcode with format 00KK. """
         return opcode & 0xFF
 
-    def get_opcode_value_NNN(self, opcode):
+    @staticmethod
+    def get_opcode_value_NNN(opcode):
         """ Extract value NNN from opcode with format 0NNN. """
         return opcode & 0xFFF
 
     def step_pc(self):
         """ Increment PC by 2 bytes """
-        pc_value = self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS)
-        pc_value = pc_value + 0x2
         # TODO: check if is in even position
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, pc_value)
+        self.PC = (self.PC + 0x2) & 0xFFFF
+
+    def skip_over_long_load(self, *arguments, skip_handler):
+        """ Execute a skip opcode, skipping the XO-CHIP long load (F000 NNNN) steps over its address too. """
+
+        pc = self.PC
+        skip_handler(self, *arguments)
+        memory = self.memory.memory
+        if self.PC != pc and pc + 1 < len(memory) and memory[pc] == 0xF0 and memory[pc + 1] == 0x00:
+            self.PC += 2
 
     def is_valid_hexadecimal(self, value):
         return value >= 0 and value <= 0xF
@@ -297,16 +550,108 @@ class Cpu:
             raise Exception('Invalid register, use V0 to VF')
 
     def calculate_data_register_memory_address(self, register):
-        """ Return the memory position for the given register (0 to F). """
+        """ Return the memory position where the given register (0 to F) is mirrored. """
 
         self.validate_data_register(register)
-        return Cpu.MEMORY_REGISTERS_DATA_START_ADDRESS + register
+        return Cpu.MEMORY_REGISTERS_DATA_START_ADDRESS + self.reserved_area_offset + register
+
+    def sync_registers_to_memory(self):
+        """ Copy the registers into memory using the COSMAC VIP layout (0xED0 to 0xEFF, moved up in 64 KB). """
+
+        memory = self.memory
+        offset = self.reserved_area_offset
+        memory.write_16bit(Cpu.REGISTER_PC_ADDRESS + offset, self.PC)
+        memory.write_16bit(Cpu.REGISTER_I_ADDRESS + offset, self.I)
+        memory.write_8bit(Cpu.REGISTER_SP_ADDRESS + offset, self.SP)
+        memory.write_8bit(Cpu.REGISTER_DT_ADDRESS + offset, self.DT)
+        memory.write_8bit(Cpu.REGISTER_ST_ADDRESS + offset, self.ST)
+        memory.write_8bit(Cpu.REGISTER_RANDOM_NUMBER_ADDRESS + offset, self.random_number)
+        for register in range(0x10):
+            memory.write_8bit(Cpu.MEMORY_REGISTERS_DATA_START_ADDRESS + offset + register, self.V[register])
+
+    def load_registers_from_memory(self):
+        """ Set the registers from their mirror in memory (0xED0 to 0xEFF, moved up in 64 KB). """
+
+        memory = self.memory
+        offset = self.reserved_area_offset
+        self.PC = memory.read_16bit(Cpu.REGISTER_PC_ADDRESS + offset)
+        self.I = memory.read_16bit(Cpu.REGISTER_I_ADDRESS + offset)
+        self.SP = memory.read_8bit(Cpu.REGISTER_SP_ADDRESS + offset)
+        self.DT = memory.read_8bit(Cpu.REGISTER_DT_ADDRESS + offset)
+        self.ST = memory.read_8bit(Cpu.REGISTER_ST_ADDRESS + offset)
+        self.random_number = memory.read_8bit(Cpu.REGISTER_RANDOM_NUMBER_ADDRESS + offset)
+        for register in range(0x10):
+            self.V[register] = memory.read_8bit(Cpu.MEMORY_REGISTERS_DATA_START_ADDRESS + offset + register)
+
+    def snapshot(self) -> bytes:
+        """ Return the machine state as a versioned binary blob (see `SNAPSHOT_*`). """
+
+        keyboard = self.keyboard
+        latch = keyboard.last_key_pressed
+        waiting = self.waiting_key_register
+
+        return b''.join((
+            Cpu.SNAPSHOT_HEADER.pack(Cpu.SNAPSHOT_MAGIC, Cpu.SNAPSHOT_VERSION),
+            Cpu.SNAPSHOT_REGISTERS.pack(self.PC, self.I, self.SP, self.DT, self.ST, self.random_number, bytes(self.V)),
+            Cpu.SNAPSHOT_KEYBOARD.pack(keyboard.pressed_keys_mask(), 0xFF if latch is None else latch,
+                                       0xFF if waiting is None else waiting),
+            Cpu.SNAPSHOT_AUDIO.pack(self.pitch, bytes(self.audio_pattern)),
+            self.random.getstate(),
+            self.display.snapshot(),
+            self.memory.snapshot(),
+        ))
+
+    def restore(self, data):
+        """ Set the machine state from a blob returned by `snapshot`.
+
+        The memory pages that differ are written in place, so the write listeners (instruction
+        cache, compiled blocks and idle loops) are notified of them. The snapshot is validated before
+        any state is changed, an invalid one leaves the machine as it was.
+        """
+
+        if len(data) < Cpu.SNAPSHOT_STATE_SIZE:
+            raise Exception(f'Invalid snapshot size {len(data)}, expected at least {Cpu.SNAPSHOT_STATE_SIZE}')
+
+        view = memoryview(data)
+        magic, version = Cpu.SNAPSHOT_HEADER.unpack_from(view, 0)
+        if magic != Cpu.SNAPSHOT_MAGIC:
+            raise Exception('Invalid snapshot, wrong magic')
+        if version != Cpu.SNAPSHOT_VERSION:
+            raise Exception(f'Unsupported snapshot version {version}, expected {Cpu.SNAPSHOT_VERSION}')
+        pages = self.memory.read_snapshot(view[Cpu.SNAPSHOT_STATE_SIZE:])
+        # the random state is validated too, it's restored first
+        random_offset = Cpu.SNAPSHOT_STATE_SIZE - Cpu.SNAPSHOT_DISPLAY.size - Cpu.SNAPSHOT_RANDOM.size
+        self.random.setstate(view[random_offset:(random_offset + Cpu.SNAPSHOT_RANDOM.size)])
+        offset = Cpu.SNAPSHOT_HEADER.size
+
+        self.PC, self.I, self.SP, self.DT, self.ST, self.random_number, self.V[:] = Cpu.SNAPSHOT_REGISTERS.unpack_from(view, offset)
+        offset += Cpu.SNAPSHOT_REGISTERS.size
+
+        mask, latch, waiting = Cpu.SNAPSHOT_KEYBOARD.unpack_from(view, offset)
+        self.keyboard.set_pressed_keys_mask(mask)
+        self.keyboard.last_key_pressed = None if latch == 0xFF else latch
+        self.waiting_key_register = None if waiting == 0xFF else waiting
+        offset += Cpu.SNAPSHOT_KEYBOARD.size
+
+        self.pitch, self.audio_pattern[:] = Cpu.SNAPSHOT_AUDIO.unpack_from(view, offset)
+        self.update_sound()
+        offset += Cpu.SNAPSHOT_AUDIO.size
+
+        offset += Cpu.SNAPSHOT_RANDOM.size
+
+        self.display.restore(view[offset:(offset + Cpu.SNAPSHOT_DISPLAY.size)])
+
+        self.memory.write_pages(pages)
+
+    def get_stack_start_memory_address(self):
+        """ Return the address of the stack (the entry before the first pushed address). """
+
+        return Cpu.MEMORY_STACK_START_ADDRESS + self.reserved_area_offset
 
     def get_stack_current_memory_address(self):
         """ Return the current address pointed by register `SP`. """
 
-        sp_value = self.memory.read_8bit(Cpu.REGISTER_SP_ADDRESS)
-        return Cpu.MEMORY_STACK_START_ADDRESS + sp_value
+        return Cpu.MEMORY_STACK_START_ADDRESS + self.reserved_area_offset + self.SP
 
     def read_top_address_in_stack(self):
         """ Return the current address on top of stack. """
@@ -314,42 +659,43 @@ class Cpu:
         return self.memory.read_16bit(self.get_stack_current_memory_address())
 
     def pop_address_from_stack(self):
-        stack_counter = self.memory.read_8bit(Cpu.REGISTER_SP_ADDRESS)
-        if stack_counter == 0x00:
+        if self.SP == 0x00:
             raise Exception('No more address to pop')
 
         address = self.read_top_address_in_stack()
-        stack_counter = stack_counter - 2
-        self.memory.write_8bit(Cpu.REGISTER_SP_ADDRESS, stack_counter)
+        self.SP -= 2
 
         return address
 
     def push_address_into_stack(self, addr):
-        stack_counter = self.memory.read_8bit(Cpu.REGISTER_SP_ADDRESS)
-        if Cpu.MEMORY_STACK_START_ADDRESS + stack_counter + 2 > Cpu.MEMORY_STACK_END_ADDRESS:
+        if Cpu.MEMORY_STACK_START_ADDRESS + self.SP + 2 > Cpu.MEMORY_STACK_END_ADDRESS:
             raise Exception('Stack overflow')
 
-        stack_counter = stack_counter + 2
-        self.memory.write_8bit(Cpu.REGISTER_SP_ADDRESS, stack_counter)
-        stack_address = Cpu.MEMORY_STACK_START_ADDRESS + stack_counter
-        self.memory.write_16bit(stack_address, addr)
+        self.SP += 2
+        self.memory.write_16bit(self.get_stack_current_memory_address(), addr)
 
     def write_V(self, register, value):
         """ Store a value into one of registers V0-VF """
-        self.memory.write_8bit(self.calculate_data_register_memory_address(register), value)
+        self.validate_data_register(register)
+        self.V[register] = value & 0xFF
 
     def write_flag(self, value):
         """ Store a value into register flag VF """
-        self.memory.write_8bit(Cpu.REGISTER_DATA_VF_ADDRESS, value)
+        self.V[0xF] = value & 0xFF
 
     def read_V(self, register):
         """ Read a value from one of registers V0-VF """
-        return self.memory.read_8bit(self.calculate_data_register_memory_address(register))
+        self.validate_data_register(register)
+        return self.V[register]
 
     def write_register_pc(self, addr):
         """ Set register `PC` to the given address. """
 
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, addr)
+        self.PC = addr & 0xFFFF
+
+    def opcode_nop(self):
+        """ Do nothing, used for empty memory and opcodes that cannot be decoded. """
+        pass
 
     def opcode_0NNN(self, addr=None):
         """ Jump to a machine code routine at NNN.
@@ -362,9 +708,31 @@ class Cpu:
 
     def opcode_00E0(self):
         """ Clear the display. """
+        self.display.clear()
+
+    def opcode_00CN(self, n):
+        """ Scroll the display down by N rows (SUPER-CHIP). """
+        self.display.scroll_down(n)
+
+    def opcode_00DN(self, n):
+        """ Scroll the selected planes up by N rows (XO-CHIP). """
+        self.display.scroll_up(n)
+
+    def opcode_00FB(self):
+        """ Scroll the display right by 4 pixels (SUPER-CHIP). """
+        self.display.scroll_right(4)
+
+    def opcode_00FC(self):
+        """ Scroll the display left by 4 pixels (SUPER-CHIP). """
+        self.display.scroll_left(4)
 
-        for addr in range(self.MEMORY_DISPLAY_AREA_START_ADDRESS, self.MEMORY_DISPLAY_AREA_END_ADDRESS):
-            self.memory.write_8bit(addr, 0x0)
+    def opcode_00FE(self):
+        """ Switch to the 64x32 resolution, clearing the display (SUPER-CHIP). """
+        self.display.set_hires(False)
+
+    def opcode_00FF(self):
+        """ Switch to the 128x64 resolution, clearing the display (SUPER-CHIP). """
+        self.display.set_hires(True)
 
     def opcode_00EE(self):
         """ Return from a subroutine.
@@ -391,9 +759,8 @@ class Cpu:
         on the top of the stack. The PC is then set to NNN.
         """
 
-        current_addr = self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS)
-        self.push_address_into_stack(current_addr)
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, addr)
+        self.push_address_into_stack(self.PC)
+        self.PC = addr
 
     def opcode_3XKK(self, x, kk):
         """ Skip next instruction if VX == KK.
@@ -401,9 +768,8 @@ class Cpu:
         The interpreter compares register Vx to kk, and if they are equal,
         increments the program counter by 2.
         """
-        kk = kk & 0xFF
-        if self.read_V(x) is kk:
-            self.step_pc()
+        if self.V[x] == kk & 0xFF:
+            self.PC += 2
 
     def opcode_4XKK(self, x, kk):
         """ Skip next instruction if VX != KK.
@@ -411,9 +777,8 @@ class Cpu:
         The interpreter compares register Vx to kk, and if they are not equal,
         increments the program counter by 2.
         """
-        kk = kk & 0xFF
-        if self.read_V(x) is not kk:
-            self.step_pc()
+        if self.V[x] != kk & 0xFF:
+            self.PC += 2
 
     def opcode_5XY0(self, x, y):
         """ Skip next instruction if VX = VY.
@@ -421,32 +786,51 @@ class Cpu:
         The interpreter compares register Vx to register Vy, and if they are
         equal, increments the program counter by 2.
         """
-        if self.read_V(x) is self.read_V(y):
-            self.step_pc()
+        V = self.V
+        if V[x] == V[y]:
+            self.PC += 2
+
+    def opcode_5XY2(self, x, y):
+        """ Store VX through VY in memory starting at I, I is unchanged (XO-CHIP).
+
+        The registers are stored in reverse order when X > Y.
+        """
+        if x <= y:
+            self.memory.write_range(self.I, self.V[x:(y + 1)])
+        else:
+            self.memory.write_range(self.I, self.V[x:(y - 1 if y else None):-1])
+
+    def opcode_5XY3(self, x, y):
+        """ Read VX through VY from memory starting at I, I is unchanged (XO-CHIP).
+
+        The registers are read in reverse order when X > Y.
+        """
+        if x <= y:
+            self.V[x:(y + 1)] = self.memory.read_range(self.I, y - x + 1)
+        else:
+            self.V[x:(y - 1 if y else None):-1] = self.memory.read_range(self.I, x - y + 1)
 
     def opcode_6XKK(self, x, kk):
         """ Set VX = KK.
 
         The interpreter puts the value kk into register Vx.
         """
-        self.write_V(x, kk)
+        self.V[x] = kk & 0xFF
 
     def opcode_7XKK(self, x, kk):
         """ Set VX = VX + KK.
 
         Adds the value kk to the value of register VX, then stores the result in VX.
         """
-        x_value = self.read_V(x)
-        kk = kk & 0xFF
-        self.write_V(x, x_value + kk)
+        self.V[x] = (self.V[x] + kk) & 0xFF
 
     def opcode_8XY0(self, x, y):
         """ Set VX = VY.
 
         Stores the value of register VY in register VX.
         """
-        y_value = self.read_V(y)
-        self.write_V(x, y_value)
+        V = self.V
+        V[x] = V[y]
 
     def opcode_8XY1(self, x, y):
         """ Set Vx = Vx OR Vy.
@@ -455,10 +839,14 @@ class Cpu:
         A bitwise OR compares the corrseponding bits from two values, and if either bit
         is 1, then the same bit in the result is also 1. Otherwise, it is 0.
         """
-        x_value = self.read_V(x)
-        y_value = self.read_V(y)
-        self.write_V(x, x_value | y_value)
-        self.write_flag(0)
+        V = self.V
+        V[x] = V[x] | V[y]
+        V[0xF] = 0
+
+    def opcode_8XY1_keep_vf(self, x, y):
+        """ Set Vx = Vx OR Vy, leaving VF unchanged (`vf_reset` quirk off). """
+        V = self.V
+        V[x] = V[x] | V[y]
 
     def opcode_8XY2(self, x, y):
         """ Set VX = VX AND VY.
@@ -467,10 +855,14 @@ class Cpu:
         A bitwise AND compares the corrseponding bits from two values, and if both bits are
         1, then the same bit in the result is also 1. Otherwise, it is 0.
         """
-        x_value = self.read_V(x)
-        y_value = self.read_V(y)
-        self.write_V(x, x_value & y_value)
-        self.write_flag(0)
+        V = self.V
+        V[x] = V[x] & V[y]
+        V[0xF] = 0
+
+    def opcode_8XY2_keep_vf(self, x, y):
+        """ Set VX = VX AND VY, leaving VF unchanged (`vf_reset` quirk off). """
+        V = self.V
+        V[x] = V[x] & V[y]
 
     def opcode_8XY3(self, x, y):
         """ Set VX = VX XOR VY.
@@ -480,10 +872,14 @@ class Cpu:
         bits are not both the same, then the corresponding bit in the result is set to 1.
         Otherwise, it is 0.
         """
-        x_value = self.read_V(x)
-        y_value = self.read_V(y)
-        self.write_V(x, x_value ^ y_value)
-        self.write_flag(0)
+        V = self.V
+        V[x] = V[x] ^ V[y]
+        V[0xF] = 0
+
+    def opcode_8XY3_keep_vf(self, x, y):
+        """ Set VX = VX XOR VY, leaving VF unchanged (`vf_reset` quirk off). """
+        V = self.V
+        V[x] = V[x] ^ V[y]
 
     def opcode_8XY4(self, x, y):
         """ Set VX = VX + VY, set VF = carry.
@@ -492,13 +888,12 @@ class Cpu:
         (i.e., > 255,) VF is set to 1, otherwise 0. Only the lowest 8 bits of the result are
         kept, and stored in VX.
         """
-        x_value = self.read_V(x)
-        y_value = self.read_V(y)
-        result = x_value + y_value
+        V = self.V
+        result = V[x] + V[y]
 
-        self.write_V(x, result)
+        V[x] = result & 0xFF
         # set the carry flag (1 for carry used)
-        self.write_flag(result > 0xFF)
+        V[0xF] = result > 0xFF
 
     def opcode_8XY5(self, x, y):
         """ Set VX = VX - VY, set VF = NOT borrow.
@@ -506,15 +901,13 @@ class Cpu:
         If VX > VY, then VF is set to 1, otherwise 0. Then VY is subtracted from VX, and
         the results stored in VX.
         """
-        x_value = self.read_V(x)
-        y_value = self.read_V(y)
+        V = self.V
+        x_value = V[x]
+        y_value = V[y]
 
-        self.write_V(x, x_value - y_value)
+        V[x] = (x_value - y_value) & 0xFF
         # set the borrow flag (1 for not borrow)
-        if x_value > y_value:
-            self.write_flag(1)
-        else:
-            self.write_flag(0)
+        V[0xF] = x_value > y_value
 
     def opcode_8XY6(self, x, y):
         """ Set VX = VY >> 1.
@@ -522,9 +915,20 @@ class Cpu:
         If the least-significant bit of VY is 1, then VF is set to 1, otherwise 0.
         Then VY is divided by 2.
         """
-        y_value = self.read_V(y)
-        self.write_V(x, y_value >> 1)
-        self.write_flag(y_value & 0b1)
+        V = self.V
+        y_value = V[y]
+        V[x] = y_value >> 1
+        V[0xF] = y_value & 0b1
+
+    def opcode_8XY6_shift_vx(self, x, y):
+        """ Set VX = VX >> 1, VY is ignored (`shift_vy` quirk off).
+
+        If the least-significant bit of VX is 1, then VF is set to 1, otherwise 0.
+        """
+        V = self.V
+        x_value = V[x]
+        V[x] = x_value >> 1
+        V[0xF] = x_value & 0b1
 
     def opcode_8XY7(self, x, y):
         """ Set VX = VY - VX, set VF = NOT borrow.
@@ -532,15 +936,13 @@ class Cpu:
         If VY > VX, then VF is set to 1, otherwise 0. Then VX is subtracted from VY, and
         the results stored in VX.
         """
-        x_value = self.read_V(x)
-        y_value = self.read_V(y)
+        V = self.V
+        x_value = V[x]
+        y_value = V[y]
 
-        self.write_V(x, y_value - x_value)
+        V[x] = (y_value - x_value) & 0xFF
         # set the borrow flag (1 for not borrow)
-        if y_value > x_value:
-            self.write_flag(1)
-        else:
-            self.write_flag(0)
+        V[0xF] = y_value > x_value
 
     def opcode_8XYE(self, x, y):
         """ Set VX = VY << 1.
@@ -548,10 +950,20 @@ class Cpu:
         If the most-significant bit of VY is 1, then VF is set to 1, otherwise to 0.
         Then VY is multiplied by 2.
         """
-        y_value = self.read_V(y)
-        result = y_value << 1
-        self.write_V(x, result)
-        self.write_flag(y_value >> 7)
+        V = self.V
+        y_value = V[y]
+        V[x] = (y_value << 1) & 0xFF
+        V[0xF] = y_value >> 7
+
+    def opcode_8XYE_shift_vx(self, x, y):
+        """ Set VX = VX << 1, VY is ignored (`shift_vy` quirk off).
+
+        If the most-significant bit of VX is 1, then VF is set to 1, otherwise to 0.
+        """
+        V = self.V
+        x_value = V[x]
+        V[x] = (x_value << 1) & 0xFF
+        V[0xF] = x_value >> 7
 
     def opcode_9XY0(self, x, y):
         """ Skip next instruction if VX != VY.
@@ -559,26 +971,43 @@ class Cpu:
         The values of VX and VY are compared, and if they are not equal, the program
         counter is increased by 2.
         """
-        if self.read_V(x) is not self.read_V(y):
-            self.step_pc()
+        V = self.V
+        if V[x] != V[y]:
+            self.PC += 2
 
     def opcode_ANNN(self, addr):
         """ Set I = NNN.
 
         The value of register I is set to NNN.
         """
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, addr)
+        self.I = addr
 
     def opcode_BNNN(self, addr):
         """
-        Jump to location NNN + V0.
+        Jump to location NNN + 2 * V0 (`v0_doubled` jump quirk).
+
+        The program counter is set to NNN Plus twice the value of V0.
+        """
+        addr = addr + (self.V[0x0] * 2) # double as PC uses 2-bytes (?)
+        self.PC = addr & 0xFFFF
+
+    def opcode_BNNN_V0(self, addr):
+        """
+        Jump to location NNN + V0 (`v0` jump quirk).
 
         The program counter is set to NNN Plus the value of V0.
         COSMAC VIP implemented this way.
         """
-        v0_value = self.read_V(0x0)
-        addr = addr + (v0_value * 2) # double as PC uses 2-bytes (?)
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, addr)
+        self.PC = (addr + self.V[0x0]) & 0xFFFF
+
+    def opcode_BXNN(self, x, nn):
+        """
+        Jump to location XNN + VX (`vx` jump quirk).
+
+        CHIP-48 and SUPER-CHIP read BNNN as BXNN, adding the register named by the
+        highest nibble of the address.
+        """
+        self.PC = ((x << 8) + nn + self.V[x]) & 0xFFFF
 
     def opcode_CXKK(self, x, k):
         """
@@ -587,9 +1016,9 @@ class Cpu:
         The interpreter generates a random number from 0 to 255, which is then
         ANDed with the value KK. The results are stored in VX.
         """
-        random_value = random.randint(0, 0xFF) & k
-        self.memory.write_8bit(Cpu.REGISTER_RANDOM_NUMBER_ADDRESS, random_value)
-        self.write_V(x, random_value)
+        random_value = self.random.next_byte() & k
+        self.random_number = random_value
+        self.V[x] = random_value
 
     def opcode_DXYK(self, vx, vy, nibble):
         """ Display n-byte sprite starting at memory location I at (Vx, Vy), set VF = collision.
@@ -600,71 +1029,17 @@ class Cpu:
         If the sprite is positioned so part of it is outside the coordinates of the display, it wraps around to the opposite side of the screen.
         """
 
-        addr = self.memory.read_16bit(Cpu.REGISTER_I_ADDRESS)
-        x = self.read_V(vx) & Display.WIDTH
-        y = self.read_V(vy) & Display.HEIGHT
-        y_warped_at = -1
-
-        collision_flag = 0
-
-        # sprite lines
-        for l in range(nibble):
-            mem_byte_offset = x % PIXELS_PER_BYTE
-
-            count = 1
-            if mem_byte_offset > 0:
-                count = 2
-
-            x_warped = False
-
-            # j will be greater 1 if X start in the middle of a memory byte
-            for j in range(count):
-                # calculate the offset to transform the screen MxN to memory array position (even if in the middle of byte)
-                screen_addr = calculate_memory_address_offset(x, y + l) + j
+        # XO-CHIP: the rows of each selected plane follow each other
+        sprite = self.memory.read_range(self.I, nibble * len(self.display.selected_planes))
+        self.V[0xF] = self.display.draw_sprite(self.V[vx], self.V[vy], sprite)
 
-                # row of 8 bits
-                sprite_row = self.memory.read_8bit(addr)
+    def opcode_DXY0(self, vx, vy):
+        """ Display a 16x16 sprite starting at memory location I at (Vx, Vy), set VF = collision (SUPER-CHIP).
 
-                # offset sprite line in the middle of memory address byte
-                if mem_byte_offset > 0:
-                    # calcutes the sprite line byte to fill in corresponding screen byte (after offset)
-                    if j > 0:
-                        sprite_row = (sprite_row & (0xFF >> (8 - mem_byte_offset))) << (8 - mem_byte_offset)
-
-                        # if changed the row during split, warps to start of the current row
-                        if (calculate_memory_address_offset(x, y + l) // ROW_WIDTH_OFFSET) != (screen_addr // ROW_WIDTH_OFFSET):
-                            x_warped = True
-                            screen_addr = screen_addr - (x // PIXELS_PER_BYTE) - j # because of splitted byte by j
-                    else:
-                        sprite_row = sprite_row >> mem_byte_offset
-
-                # if the row is out of screen warps it to the top
-                if screen_addr > MEMORY_DISPLAY_AREA_END_ADDRESS:
-                    if y_warped_at == -1:
-                        y_warped_at = l
-                    screen_addr = calculate_memory_address_offset(x, l - y_warped_at) + j
-                    if x_warped:
-                        screen_addr = screen_addr - ROW_WIDTH_OFFSET
-
-                curr_screen_row = self.memory.read_8bit(screen_addr)
-
-                # only apply XOR flag rule if the current pixel is on
-                if curr_screen_row > 0 & collision_flag == 0:
-                    collision_flag = sprite_row & curr_screen_row
-
-                # XOEed the sprite row into the screen, turning it off if there is a collision
-                draw_result = sprite_row ^ curr_screen_row
-
-                # print(f'Writing {hex(screen_addr)} value {bin(draw_result)}')
-                self.memory.write_8bit(screen_addr, draw_result)
-
-            # next sprite line
-            addr += 0x1
-
-        if (collision_flag > 0):
-            self.write_V(0xF, 1)
-        else:
-            self.write_V(0xF, 0)
+        The sprite has 2 bytes per row, 32 bytes read from I for each selected plane.
+        """
+        sprite = self.memory.read_range(self.I, 32 * len(self.display.selected_planes))
+        self.V[0xF] = self.display.draw_large_sprite(self.V[vx], self.V[vy], sprite)
 
     def opcode_EX9E(self, x):
         """ Skip next instruction if key with the value of VX is pressed.
@@ -672,10 +1047,8 @@ class Cpu:
         Checks the keyboard, and if the key corresponding to the value of VX
         is currently in the down position, PC is increased by 2.
         """
-        x_value = self.read_V(x)
-
-        if self.keyboard.is_key_pressing_down(x_value):
-            self.step_pc()
+        if self.keyboard.is_key_pressing_down(self.V[x]):
+            self.PC += 2
 
     def opcode_EXA1(self, x):
         """ Skip next instruction if key with the value of VX is not pressed.
@@ -683,59 +1056,84 @@ class Cpu:
         Checks the keyboard, and if the key corresponding to the value of VX
         is currently in the up position, PC is increased by 2.
         """
-        x_value = self.read_V(x)
-
-        if not self.keyboard.is_key_pressing_down(x_value):
-            self.step_pc()
+        if not self.keyboard.is_key_pressing_down(self.V[x]):
+            self.PC += 2
 
     def opcode_FX00(self, x):
-        """ Set pitch = VX """
+        """ Set pitch = VX (same as FX3A). """
+        self.opcode_FX3A(x)
+
+    def opcode_F000(self):
+        """ Set I = NNNN, the 16-bit address following the instruction (XO-CHIP).
+
+        The instruction is 4 bytes long, PC steps over the address.
+        """
+        address = self.memory.read_range(self.PC, 2)
+        self.I = (address[0] << 8) | address[1]
+        self.PC += 2
+
+    def opcode_FN01(self, n):
+        """ Select the planes drawn, cleared and scrolled, N is a mask of 2 bits (XO-CHIP). """
+        self.display.select_planes(n)
 
-        raise Exception("Not implemented")
+    def opcode_F002(self):
+        """ Load the audio pattern (XO-CHIP).
+
+        The 16 bytes at I become the 128-bit pattern played while ST > 0.
+        """
+        self.audio_pattern[:] = self.memory.read_range(self.I, AUDIO_PATTERN_SIZE)
+        self.sound.set_pattern(self.audio_pattern)
 
     def opcode_FX07(self, x):
         """ Set VX = delay timer value.
 
         The value of DT is placed into VX.
         """
-        dt_value = self.memory.read_8bit(Cpu.REGISTER_DT_ADDRESS)
-        self.write_V(x, dt_value)
+        self.V[x] = self.DT
 
     def opcode_FX0A(self, x):
         """ Wait for a key press, store the value of the key in VX.
 
         All execution stops until a key is pressed, then the value of that key
         is stored in VX.
+        The CPU enters a wait state (`waiting_key_register`) and PC stays on this
+        instruction until a key is released after it, the scheduler doesn't run
+        the CPU while waiting (see `is_waiting_key`) but keeps the timers and display.
         """
-        key_pressed = self.keyboard.wait_key_press(self.handle_pygame_events)
-        print(f'Key pressed {key_pressed}')
-        self.write_V(x, key_pressed)
+        if self.waiting_key_register is None:
+            # only a key released from now on ends the wait
+            self.keyboard.last_key_pressed = None
+            self.waiting_key_register = x
+
+        key_pressed = self.keyboard.read_key()
+        if key_pressed is None:
+            self.PC -= 2
+            return
+
+        self.waiting_key_register = None
+        self.V[x] = key_pressed
 
     def opcode_FX15(self, x):
         """ Set delay timer = VX.
 
         DT is set equal to the value of VX.
         """
-        x_value = self.read_V(x)
-        self.memory.write_8bit(Cpu.REGISTER_DT_ADDRESS, x_value)
+        self.DT = self.V[x]
 
     def opcode_FX18(self, x):
         """ Set sound timer = VX.
 
-        ST is set equal to the value of VX.
+        ST is set equal to the value of VX, the tone plays while ST > 0.
         """
-        x_value = self.read_V(x)
-        self.memory.write_8bit(Cpu.REGISTER_ST_ADDRESS, x_value)
+        self.ST = self.V[x]
+        self.sound.gate(self.ST > 0)
 
     def opcode_FX1E(self, x):
         """ Set I = I + VX.
 
         The values of I and VX are added, and the results are stored in I.
         """
-        x_value = self.read_V(x)
-        I_value = self.memory.read_16bit(Cpu.REGISTER_I_ADDRESS)
-        new_address = x_value + I_value
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, new_address)
+        self.I = (self.I + self.V[x]) & 0xFFFF
 
     def opcode_FX29(self, x):
         """ Set I = location of sprite for digit VX.
@@ -744,12 +1142,12 @@ class Cpu:
         corresponding to the value of VX. See section 2.4, Display, for more
         information on the Chip-8 hexadecimal font.
         """
-        x_value = self.read_V(x)
-
         # multiply by the sprite length to offset to start
-        sprite_address = (x_value & 0xFF) * 0x5
+        self.I = self.V[x] * 0x5
 
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, sprite_address)
+    def opcode_FX30(self, x):
+        """ Set I = location of the 8x10 sprite for digit VX (SUPER-CHIP). """
+        self.I = Cpu.MEMORY_BIG_FONT_START_ADDRESS + (self.V[x] & 0xF) * Cpu.BIG_FONT_SPRITE_SIZE
 
     def opcode_FX33(self, x):
         """ Store BCD representation of VX in memory locations I, I+1, and I+2.
@@ -759,26 +1157,41 @@ class Cpu:
         and the ones digit at location I+2.
         COSMAC VIP doesn't change register I.
         """
-        x_value = self.read_V(x)
-        addr = self.memory.read_16bit(Cpu.REGISTER_I_ADDRESS)
+        x_value = self.V[x]
+        addr = self.I
         self.memory.write_8bit(addr, x_value // 100)
         self.memory.write_8bit(addr + 1, x_value // 10 % 10)
         self.memory.write_8bit(addr + 2, x_value % 10)
 
+    def opcode_FX3A(self, x):
+        """ Set pitch = VX (XO-CHIP).
+
+        The audio pattern is played at 4000 * 2 ^ ((pitch - 64) / 48) bits per second.
+        """
+        self.pitch = self.V[x]
+        self.sound.set_pitch(self.pitch)
+
     def opcode_FX55(self, x):
         """ Store the values of registers V0 through VX, inclusive, in memory starting at address I.
 
         The interpreter copies the values of registers V0 through VX into memory, starting at the address in I.
         I is set to I + X + 1 after operation.
         """
-        addr = self.memory.read_16bit(Cpu.REGISTER_I_ADDRESS)
-        for i in range(0, x + 1):
-            value = self.read_V(i)
-            self.memory.write_8bit(addr, value)
-            addr = addr + 1
+        addr = self.I
+        self.memory.write_range(addr, self.V[:x + 1])
+        addr = addr + x + 1
 
-        # COSMAC VIP changes I to I + X + 1 (modern implementations doesn't, this can be toggle)
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, addr)
+        # COSMAC VIP changes I to I + X + 1 (see `Quirks.load_store` for the other interpreters)
+        self.I = addr & 0xFFFF
+
+    def opcode_FX55_increment_x(self, x):
+        """ Store V0 through VX in memory starting at I, then set I = I + X (CHIP-48). """
+        self.memory.write_range(self.I, self.V[:x + 1])
+        self.I = (self.I + x) & 0xFFFF
+
+    def opcode_FX55_keep_i(self, x):
+        """ Store V0 through VX in memory starting at I, leaving I unchanged (SUPER-CHIP). """
+        self.memory.write_range(self.I, self.V[:x + 1])
 
     def opcode_FX65(self, x):
         """ Read registers V0 through VX, inclusive, with the values stored in memory starting at address I.
@@ -786,12 +1199,19 @@ class Cpu:
         The interpreter reads values from memory starting at location I into registers V0 through VX.
         I is set to I + X + 1 after operation.
         """
-        addr = self.memory.read_16bit(Cpu.REGISTER_I_ADDRESS)
-        for i in range(0, x + 1):
-            value = self.memory.read_8bit(addr)
-            self.write_V(i, value)
-            addr = addr + 1
+        addr = self.I
+        self.V[:x + 1] = self.memory.read_range(addr, x + 1)
+        addr = addr + x + 1
+
+        # COSMAC VIP changes I to I + X + 1 (see `Quirks.load_store` for the other interpreters)
+        self.I = addr & 0xFFFF
+
+    def opcode_FX65_increment_x(self, x):
+        """ Read V0 through VX from memory starting at I, then set I = I + X (CHIP-48). """
+        self.V[:x + 1] = self.memory.read_range(self.I, x + 1)
+        self.I = (self.I + x) & 0xFFFF
 
-        # COSMAC VIP changes I to I + X + 1 (modern implementations doesn't, this can be toggle)
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, addr)
+    def opcode_FX65_keep_i(self, x):
+        """ Read V0 through VX from memory starting at I, leaving I unchanged (SUPER-CHIP). """
+        self.V[:x + 1] = self.memory.read_range(self.I, x + 1)
 
@@ -1,7 +1,9 @@
+import struct
+
+import numpy as np
 import pygame
-from Memory import Memory
 
-# each pixel is represented as 4 pixels
+# each pixel of the 64x32 screen is represented as 8x8 pixels (4x4 in hi-res)
 PIXEL_SCALE = 8
 
 SCREEN_SCALED_WIDTH = 64 * PIXEL_SCALE
@@ -11,65 +13,320 @@ SCREEN_SIZE = (SCREEN_SCALED_WIDTH, SCREEN_SCALED_HEIGHT)
 PIXEL_ON = (255, 255, 255)
 PIXEL_OFF = (0, 0, 0)
 
+# colors of the XO-CHIP planes: none, the first one, the second one and both
+PALETTE = (PIXEL_OFF, PIXEL_ON, (0x55, 0x55, 0x55), (0xAA, 0xAA, 0xAA))
+NUMBER_PLANES = 2
+
 PIXELS_PER_BYTE = 8
 ROW_WIDTH_OFFSET = 64 // PIXELS_PER_BYTE # 8 bytes per row
+HIRES_ROW_WIDTH_OFFSET = 128 // PIXELS_PER_BYTE # 16 bytes per row in hi-res
 
-""" Memory area reserved for screen bits (248 bytes) """
-MEMORY_DISPLAY_AREA_START_ADDRESS = 0xF00
-MEMORY_DISPLAY_AREA_END_ADDRESS = 0xFFF
+# framebuffer size in bytes, 64x32 and 128x64 (SUPER-CHIP hi-res)
+DISPLAY_SIZE = 32 * ROW_WIDTH_OFFSET
+HIRES_DISPLAY_SIZE = 64 * HIRES_ROW_WIDTH_OFFSET
 
 class Display:
+    """ Screen of 64x32 pixels, or 128x64 in the SUPER-CHIP hi-res mode, with 2 bitplanes (XO-CHIP).
+
+    Each plane is a packed buffer of its own, out of the CPU memory: each row is stored
+    with 8 pixels per byte, most significant bit at left. The programs only use the first
+    plane unless they select the others (FN01); drawing, clearing and scrolling apply to
+    the selected planes. The color of a pixel is picked in `PALETTE` by its bits in both
+    planes.
+
+    Drawing and scrolling mark the changed rows as dirty. `render` unpacks the bits with
+    NumPy into a surface of the screen size, scales it to the window in one call and
+    updates only the rects covering the dirty rows.
+    """
+
+    # masks of the coordinates in the 64x32 screen
     WIDTH = 0x3F
     HEIGHT = 0x1F
 
-    def __init__(self, memory: Memory):
-        self.memory = memory
+    # hi-res flag, selected planes and the whole planes
+    SNAPSHOT = struct.Struct(f'>BB{HIRES_DISPLAY_SIZE}s{HIRES_DISPLAY_SIZE}s')
+
+    def __init__(self, headless=False):
+        self.headless = headless
+
+        self.planes = [bytearray(HIRES_DISPLAY_SIZE) for _ in range(NUMBER_PLANES)]
+        # the first plane, the only one drawn by the CHIP-8 and SUPER-CHIP programs
+        self.buffer = self.planes[0]
+        self.select_planes(1)
+        self.set_resolution(False)
+
+        # rows changed since the last render
+        self.dirty_rows = set()
+
+        # unscaled screen, created with the pixel format of the window
+        self.pixels_surface = None
 
     def initialize(self):
+        if self.headless:
+            return
         self.screen = pygame.display.set_mode(SCREEN_SIZE)
         self.screen.fill(PIXEL_OFF)
         pygame.display.set_caption('Chip8 Emulator')
+        self.create_pixels_surface()
+        self.mark_all_dirty()
+
+    def set_resolution(self, hires):
+        """ Set the screen size (the framebuffer is not cleared). """
+
+        self.hires = hires
+        self.width = 128 if hires else 64
+        self.height = 64 if hires else 32
+        self.row_bytes = self.width // PIXELS_PER_BYTE
+        self.size = self.height * self.row_bytes
+        self.pixel_scale = SCREEN_SCALED_WIDTH // self.width
+        # the surface is created again at the new size
+        self.pixels_surface = None
+
+    def set_hires(self, hires):
+        """ Switch between 64x32 and 128x64 (00FE and 00FF), clearing every plane. """
+
+        self.set_resolution(hires)
+        for plane in self.planes:
+            plane[:] = bytes(HIRES_DISPLAY_SIZE)
+        self.mark_all_dirty()
+
+    def reset(self):
+        """ Clear the screen in 64x32 with the first plane selected. """
+
+        self.select_planes(1)
+        self.set_hires(False)
+
+    def select_planes(self, mask):
+        """ Select the planes drawn, cleared and scrolled, bit 0 for the first plane and bit 1 for the second one (FN01). """
+
+        self.plane_mask = mask & ((1 << NUMBER_PLANES) - 1)
+        self.selected_planes = [plane for index, plane in enumerate(self.planes) if self.plane_mask & (1 << index)]
+
+    def create_pixels_surface(self):
+        """ Create the unscaled surface (1 pixel per Chip8 pixel) and the colors mapped for it. """
+
+        self.pixels_surface = pygame.Surface((self.width, self.height), 0, self.screen)
+        self.pixel_colors = np.array([self.pixels_surface.map_rgb(color) for color in PALETTE], dtype=np.uint32)
+
+    def mark_rows_dirty(self, y, number_rows):
+        """ Mark the rows from y as dirty, wrapping to the top. """
+
+        if self.headless:
+            return
+        height = self.height
+        self.dirty_rows.update((y + row) % height for row in range(min(number_rows, height)))
+
+    def mark_all_dirty(self):
+        if not self.headless:
+            self.dirty_rows.update(range(self.height))
+
+    def clear(self):
+        """ Turn off every pixel of the selected planes (00E0). """
+
+        for plane in self.selected_planes:
+            plane[:] = bytes(HIRES_DISPLAY_SIZE)
+        self.mark_all_dirty()
+
+    def draw_sprite(self, x, y, sprite) -> bool:
+        """ XOR a sprite of 8-pixel rows at (x, y), wrapping around the edges. Return `True` on collision.
+
+        The sprite holds the rows of each selected plane one after the other.
+        """
+
+        x &= self.width - 1
+        y &= self.height - 1
+        planes = self.selected_planes
+        if len(planes) == 1:
+            collision = draw_sprite(planes[0], 0, self.row_bytes, self.height, x, y, sprite)
+            self.mark_rows_dirty(y, len(sprite))
+            return collision
+
+        collision = False
+        number_rows = len(sprite) // max(len(planes), 1)
+        for index, plane in enumerate(planes):
+            plane_sprite = sprite[(index * number_rows):((index + 1) * number_rows)]
+            collision |= draw_sprite(plane, 0, self.row_bytes, self.height, x, y, plane_sprite)
+        self.mark_rows_dirty(y, number_rows)
+        return collision
+
+    def draw_large_sprite(self, x, y, sprite) -> bool:
+        """ XOR a sprite of 16-pixel rows (2 bytes per row, DXY0) at (x, y). Return `True` on collision.
+
+        The sprite holds the 32 bytes of each selected plane one after the other.
+        """
+
+        x &= self.width - 1
+        y &= self.height - 1
+        collision = False
+        for index, plane in enumerate(self.selected_planes):
+            plane_sprite = sprite[(index * 32):((index + 1) * 32)]
+            collision |= draw_wide_sprite(plane, 0, self.row_bytes, self.height, x, y, plane_sprite)
+        self.mark_rows_dirty(y, 16)
+        return collision
+
+    def scroll_down(self, number_rows):
+        """ Move the selected planes down by the given number of rows (00CN), the top rows are cleared. """
+
+        shift = min(number_rows, self.height) * self.row_bytes
+        size = self.size
+        for plane in self.selected_planes:
+            plane[shift:size] = plane[0:(size - shift)]
+            plane[0:shift] = bytes(shift)
+        self.mark_all_dirty()
+
+    def scroll_up(self, number_rows):
+        """ Move the selected planes up by the given number of rows (00DN, XO-CHIP), the bottom rows are cleared. """
+
+        shift = min(number_rows, self.height) * self.row_bytes
+        size = self.size
+        for plane in self.selected_planes:
+            plane[0:(size - shift)] = plane[shift:size]
+            plane[(size - shift):size] = bytes(shift)
+        self.mark_all_dirty()
+
+    def scroll_right(self, number_pixels):
+        """ Move the screen right by the given number of pixels (00FB), the left columns are cleared. """
+        self.scroll_horizontally(number_pixels)
+
+    def scroll_left(self, number_pixels):
+        """ Move the screen left by the given number of pixels (00FC), the right columns are cleared. """
+        self.scroll_horizontally(-number_pixels)
+
+    def scroll_horizontally(self, shift):
+        shift = max(min(shift, self.width), -self.width)
+        for plane in self.selected_planes:
+            rows = np.frombuffer(plane, dtype=np.uint8, count=self.size).reshape(self.height, self.row_bytes)
+            pixels = np.unpackbits(rows, axis=1)
+
+            shifted = np.zeros_like(pixels)
+            if shift > 0:
+                shifted[:, shift:] = pixels[:, :(self.width - shift)]
+            else:
+                shifted[:, :(self.width + shift)] = pixels[:, -shift:]
+
+            rows[:] = np.packbits(shifted, axis=1)
+        self.mark_all_dirty()
 
     def print_display(self):
         pass
 
+    def framebuffer(self, plane=0) -> bytes:
+        """ Return a copy of the bits of a plane (the first one by default), one row of 8 (16 in hi-res) bytes after the other. """
+        return bytes(self.planes[plane][:self.size])
+
+    def snapshot(self) -> bytes:
+        return Display.SNAPSHOT.pack(self.hires, self.plane_mask, *(bytes(plane) for plane in self.planes))
+
+    def restore(self, data):
+        hires, plane_mask, *planes = Display.SNAPSHOT.unpack(data)
+        for plane, plane_data in zip(self.planes, planes):
+            plane[:] = plane_data
+        self.select_planes(plane_mask)
+        self.set_resolution(bool(hires))
+        self.mark_all_dirty()
+
+    def to_text(self, pixel_on='#', pixel_off='.', pixel_second_plane='+', pixel_both_planes='%') -> str:
+        """ Return the screen as text, one line per row. """
+
+        characters = np.array([pixel_off, pixel_on, pixel_second_plane, pixel_both_planes])
+        return '\n'.join(''.join(row) for row in characters[self.pixels()])
+
+    def pixels(self) -> np.ndarray:
+        """ Return the screen as an array of the colors in `PALETTE`, 32x64 (64x128 in hi-res).
+
+        The color is 0 (off) or 1 (on) when only the first plane is drawn.
+        """
+
+        pixels = np.unpackbits(np.frombuffer(self.planes[0], dtype=np.uint8, count=self.size))
+        second_plane = np.frombuffer(self.planes[1], dtype=np.uint8, count=self.size)
+        if second_plane.any():
+            pixels |= np.unpackbits(second_plane) << 1
+        return pixels.reshape(self.height, self.width)
+
     def render(self):
-        py_x = 0
-        py_y = 0
+        """ Repaint the screen and update the rects of the dirty rows. """
+
+        if self.headless or not self.dirty_rows:
+            return
+
+        if self.pixels_surface is None:
+            self.create_pixels_surface()
+
+        # surfarray is indexed by (x, y)
+        pygame.surfarray.blit_array(self.pixels_surface, self.pixel_colors[self.pixels().T])
+        pygame.transform.scale(self.pixels_surface, SCREEN_SIZE, self.screen)
+
+        scale = self.pixel_scale
+        rects = [pygame.Rect(0, row * scale, SCREEN_SCALED_WIDTH, scale) for row in sorted(self.dirty_rows)]
+        self.dirty_rows.clear()
+        pygame.display.update(rects)
+
+# 16-bit span covering the two screen bytes a sprite row touches, for each pixel offset (x % 8) and sprite byte
+SPRITE_ROW_SPANS = [
+    [sprite_row << (PIXELS_PER_BYTE - offset) for sprite_row in range(0x100)]
+    for offset in range(PIXELS_PER_BYTE)
+]
+
+def draw_sprite(buffer, base, row_bytes, height, x, y, sprite) -> bool:
+    """ XOR the sprite rows into a 1-bit framebuffer, returning `True` if any pixel was turned off.
+
+    The framebuffer has `height` rows of `row_bytes` bytes starting at `base` in `buffer`
+    (both sizes are powers of two). Each sprite row is shifted into a 16-bit span with the
+    precomputed tables and XORed into the two screen bytes it covers, the columns and rows
+    wrap around with masks.
+    """
 
-        for address in range(MEMORY_DISPLAY_AREA_START_ADDRESS, MEMORY_DISPLAY_AREA_END_ADDRESS + 1):
-            byte_row = self.memory.read_8bit(address)
+    spans = SPRITE_ROW_SPANS[x % PIXELS_PER_BYTE]
+    column_mask = row_bytes - 1
+    row_mask = height - 1
+    left_column = (x // PIXELS_PER_BYTE) & column_mask
+    right_column = (left_column + 1) & column_mask
 
-            # plots the sprite row pixels
-            for i in range(8):
-                pixel_color = PIXEL_OFF
+    collision = 0
+    for sprite_row in sprite:
+        row_address = base + (y & row_mask) * row_bytes
+        left_address = row_address + left_column
+        right_address = row_address + right_column
 
-                # check from higher to lower bit
-                if byte_row > 0 and (byte_row & 1 << (7 - i)) > 0:
-                    pixel_color = PIXEL_ON
+        span = spans[sprite_row]
+        screen_row = (buffer[left_address] << 8) | buffer[right_address]
+        collision |= screen_row & span
+        screen_row ^= span
 
-                rect = pygame.Rect(py_x, py_y, PIXEL_SCALE, PIXEL_SCALE)
-                pygame.draw.rect(self.screen, pixel_color, rect)
+        buffer[left_address] = screen_row >> 8
+        buffer[right_address] = screen_row & 0xFF
+        y += 1
 
-                # next col
-                py_x = py_x + PIXEL_SCALE
+    return collision != 0
 
-            # next row
-            if py_x >= SCREEN_SCALED_WIDTH:
-                py_x = 0
-                py_y = py_y + PIXEL_SCALE
+def draw_wide_sprite(buffer, base, row_bytes, height, x, y, sprite) -> bool:
+    """ XOR a sprite of 16-pixel rows (2 bytes per row) into a 1-bit framebuffer, like `draw_sprite`.
 
-        pygame.display.update()
+    Each sprite row is shifted into a 24-bit span XORed into the three screen bytes it covers.
+    """
 
-def calculate_memory_address_offset(x, y):
-    offset = y * ROW_WIDTH_OFFSET + (x // PIXELS_PER_BYTE)
-    return MEMORY_DISPLAY_AREA_START_ADDRESS + offset
+    shift = PIXELS_PER_BYTE - x % PIXELS_PER_BYTE
+    column_mask = row_bytes - 1
+    row_mask = height - 1
+    first_column = (x // PIXELS_PER_BYTE) & column_mask
+    second_column = (first_column + 1) & column_mask
+    third_column = (first_column + 2) & column_mask
 
-def calculate_y_from_memory_address(addr):
-    if addr < MEMORY_DISPLAY_AREA_START_ADDRESS or addr > MEMORY_DISPLAY_AREA_END_ADDRESS:
-        raise Exception('Invalid memory address');
+    collision = 0
+    for i in range(0, len(sprite) - 1, 2):
+        row_address = base + (y & row_mask) * row_bytes
+        first_address = row_address + first_column
+        second_address = row_address + second_column
+        third_address = row_address + third_column
 
-    offset = addr - MEMORY_DISPLAY_AREA_START_ADDRESS
+        span = ((sprite[i] << 8) | sprite[i + 1]) << shift
+        screen_row = (buffer[first_address] << 16) | (buffer[second_address] << 8) | buffer[third_address]
+        collision |= screen_row & span
+        screen_row ^= span
 
-    return (offset // ROW_WIDTH_OFFSET) % (ROW_WIDTH_OFFSET - 1)
+        buffer[first_address] = screen_row >> 16
+        buffer[second_address] = (screen_row >> 8) & 0xFF
+        buffer[third_address] = screen_row & 0xFF
+        y += 1
 
+    return collision != 0
@@ -0,0 +1,273 @@
+import math
+import time
+
+from Cpu import Cpu
+from Display import Display
+from Keyboard import Keyboard
+from Memory import Memory
+from Movie import Movie, MoviePlayer, MovieRecorder
+from Quirks import Quirks
+from Recompiler import Recompiler
+from Rewind import RewindBuffer
+from Rom import load_rom_file_into_memory
+from Scheduler import Scheduler, TimerClock
+from Sound import Sound
+
+class Emulator:
+    """ Chip8 machine wiring the CPU to the memory and peripherals.
+
+    In headless mode no pygame subsystem is initialized (display, mixer and event pump),
+    the CPU is driven by `run` and the result is read from `framebuffer` and `state`.
+
+    The `engine` executing the instructions of each frame is either the `interpreter` or
+    the basic-block `recompiler`. The `seed` initializes the random generator of the CPU.
+    The `quirks` are a `Quirks` profile or its name (`cosmac_vip` by default).
+    """
+
+    ENGINES = ('interpreter', 'recompiler')
+
+    def __init__(self, headless=False, engine='interpreter', instructions_per_frame=Scheduler.INSTRUCTIONS_PER_FRAME,
+                 seed=None, quirks=None):
+        if engine not in Emulator.ENGINES:
+            raise Exception(f'Invalid engine {engine}, use one of {", ".join(Emulator.ENGINES)}')
+
+        self.headless = headless
+        self.engine = engine
+
+        self.quirks = Quirks.get(quirks)
+        self.memory = Memory(self.quirks.memory_size)
+        self.keyboard = Keyboard()
+        self.display = Display(headless=headless)
+        self.sound = Sound(headless=headless)
+        self.cpu = Cpu(self.memory, self.display, self.keyboard, self.sound, headless=headless, seed=seed,
+                       quirks=self.quirks)
+
+        run_instructions = None
+        if engine == 'recompiler':
+            run_instructions = Recompiler(self.cpu).run
+
+        self.scheduler = Scheduler(self.cpu, self.display, instructions_per_frame,
+                                   engine=run_instructions,
+                                   handle_events=None if headless else self.cpu.handle_pygame_events,
+                                   realtime=not headless)
+
+        self.instructions_executed = 0
+        self.rewind_buffer = None
+
+        # machine state restored by `reset`
+        self.power_on_snapshot = self.snapshot()
+
+    def load_rom(self, filename: str, verbose=True):
+        load_rom_file_into_memory(filename, self.memory, verbose)
+
+    def start(self):
+        """ Open the window and run the frames until it is closed. """
+
+        self.display.initialize()
+        self.scheduler.run()
+
+    def run_frames(self, number_frames):
+        """ Execute the given number of 60Hz frames, returning the final state.
+
+        In headless mode the frames are not paced, they run as fast as possible.
+        """
+
+        executed = self.scheduler.instructions_executed
+        self.scheduler.run(number_frames)
+        self.instructions_executed += self.scheduler.instructions_executed - executed
+        return self.state()
+
+    def run(self, max_instructions=None, clock_hz=None):
+        """ Execute instructions without rendering, returning the final state.
+
+        Without `clock_hz` the CPU runs as fast as possible and the timers follow the wall clock
+        (a `TimerClock` started with the run).
+        With `clock_hz` the timers follow a virtual clock: they tick once every `clock_hz / 60`
+        instructions, so a run is reproducible regardless of the host speed.
+
+        The instructions run in slices between timer ticks. A slice starting in an idle loop
+        (see `IdleLoop`) is fast-forwarded and, without `clock_hz`, the run sleeps until the
+        next tick. No key can be released during the run, so when the CPU waits for a key
+        (FX0A) or is in a loop that can't end anymore the run fast-forwards to its end (or
+        stops, without `max_instructions`).
+        """
+
+        cpu = self.cpu
+        executed = 0
+
+        if clock_hz is None:
+            clock = TimerClock()
+            while max_instructions is None or executed < max_instructions:
+                number_instructions = Scheduler.INSTRUCTIONS_PER_FRAME
+                if max_instructions is not None:
+                    number_instructions = min(number_instructions, max_instructions - executed)
+
+                idle = self.run_slice(number_instructions)
+                if idle and self.is_stuck():
+                    executed = executed if max_instructions is None else max_instructions
+                    break
+                executed += number_instructions
+
+                ticks = clock.elapsed_ticks()
+                if ticks:
+                    cpu.tick_timers(ticks)
+                if idle:
+                    # nothing changes before the next timer tick
+                    time.sleep(clock.time_to_next_tick())
+        else:
+            instructions_per_tick = clock_hz / Cpu.TIMERS_CLOCK_SPEED
+            next_tick = self.instructions_executed + instructions_per_tick
+            while max_instructions is None or executed < max_instructions:
+                # the instructions up to the next timer tick
+                number_instructions = max(math.ceil(next_tick - self.instructions_executed - executed), 1)
+                if max_instructions is not None:
+                    number_instructions = min(number_instructions, max_instructions - executed)
+
+                idle = self.run_slice(number_instructions)
+                if idle and self.is_stuck():
+                    executed = executed if max_instructions is None else max_instructions
+                    # the timers tick as if the loop ran until the end
+                    ticks = int((self.instructions_executed + executed - next_tick) // instructions_per_tick) + 1
+                    if ticks > 0:
+                        cpu.tick_timers(ticks)
+                    break
+                executed += number_instructions
+
+                if self.instructions_executed + executed >= next_tick:
+                    cpu.tick_timers()
+                    next_tick += instructions_per_tick
+
+        self.instructions_executed += executed
+        return self.state()
+
+    def run_slice(self, number_instructions):
+        """ Execute instructions while the timers and keys don't change, returning `True` if the CPU was idle. """
+
+        cpu = self.cpu
+        if cpu.is_waiting_key():
+            return True
+
+        executed = 0
+        loop = cpu.find_idle_loop()
+        if loop:
+            executed = cpu.fast_forward_idle_loop(loop, number_instructions)
+            if executed == number_instructions:
+                return True
+
+        for _ in range(number_instructions - executed):
+            cpu.execute_cpu_cycle()
+        return False
+
+    def is_stuck(self):
+        """ Return `True` when the idle CPU can't leave its wait or loop without a key change. """
+
+        cpu = self.cpu
+        if cpu.waiting_key_register is not None:
+            return True
+        loop = cpu.find_idle_loop()
+        return bool(loop) and loop.is_endless(cpu)
+
+    def reset(self):
+        """ Return the machine to its state after construction, keeping its engine and quirks.
+
+        Cheaper than a new `Emulator` when many ROMs run one after the other (see `batch.py`).
+        """
+
+        self.restore(self.power_on_snapshot)
+        self.instructions_executed = 0
+        self.scheduler.frames = 0
+        self.scheduler.instructions_executed = 0
+
+    def snapshot(self) -> bytes:
+        """ Return the machine state as a binary blob (see `Cpu.snapshot`). """
+        return self.cpu.snapshot()
+
+    def restore(self, data):
+        """ Set the machine state from a blob returned by `snapshot`. """
+        self.cpu.restore(data)
+
+    def save_snapshot(self, filename: str):
+        with open(filename, 'wb') as f:
+            f.write(self.snapshot())
+
+    def load_snapshot(self, filename: str):
+        with open(filename, 'rb') as f:
+            self.restore(f.read())
+
+    def record_movie(self, seed=None, handle_events=None) -> Movie:
+        """ Record the keypad state of every frame into the returned movie, saved by the caller.
+
+        The recording starts from the current memory with the random generator seeded with
+        `seed` (a random one by default) and all keys released. The keys are read from the
+        pygame events, or from the keyboard changes made by `handle_events` in headless mode.
+        """
+
+        if seed is None:
+            seed = Movie.random_seed()
+
+        movie = Movie(seed, Movie.hash_memory(self.memory), self.scheduler.instructions_per_frame,
+                      engine=self.engine, quirks=self.quirks.name)
+        self.prepare_movie(movie)
+        recorder = MovieRecorder(self.keyboard, movie, handle_events or self.scheduler.handle_events)
+        self.scheduler.handle_events = recorder.handle_frame_events
+        return movie
+
+    def play_movie(self, movie: Movie) -> MoviePlayer:
+        """ Drive the keypad of the next frames from the movie. """
+
+        if Movie.hash_memory(self.memory) != movie.memory_hash:
+            raise Exception('The movie was recorded from a different memory (ROM)')
+        if (movie.engine, movie.quirks) != (self.engine, self.quirks.name):
+            raise Exception(f'The movie was recorded with the {movie.engine} engine and the {movie.quirks} quirks, '
+                            f'not {self.engine} and {self.quirks.name}')
+
+        self.prepare_movie(movie)
+        player = MoviePlayer(self.keyboard, movie)
+        self.scheduler.handle_events = player.handle_frame_events
+        return player
+
+    def replay(self, movie: Movie) -> dict:
+        """ Run all the frames of the movie (as fast as possible in headless mode), returning the final state. """
+
+        self.play_movie(movie)
+        return self.run_frames(len(movie))
+
+    def prepare_movie(self, movie: Movie):
+        self.cpu.random.seed(movie.seed)
+        self.keyboard.set_pressed_keys_mask(0)
+        self.keyboard.last_key_pressed = None
+        self.scheduler.instructions_per_frame = movie.instructions_per_frame
+
+    def enable_rewind(self, max_bytes=RewindBuffer.MAX_BYTES, keyframe_interval=RewindBuffer.KEYFRAME_INTERVAL):
+        """ Capture the state at the end of every frame into a `RewindBuffer`. """
+
+        self.rewind_buffer = RewindBuffer(self.cpu, keyframe_interval, max_bytes)
+        self.scheduler.after_frame = self.rewind_buffer.capture
+
+    def rewind(self, number_frames=1) -> int:
+        """ Go back the given number of frames, returning how many were rewound. """
+
+        if self.rewind_buffer is None:
+            raise Exception('Rewind is not enabled')
+        return self.rewind_buffer.rewind(number_frames)
+
+    def framebuffer(self) -> bytes:
+        """ Return the screen bits of the first plane, 8 bytes per row or 16 in hi-res (see `Display.framebuffer`). """
+        return self.display.framebuffer()
+
+    def state(self) -> dict:
+        """ Return the registers, stack and counters of the machine. """
+
+        cpu = self.cpu
+        # SP points to the last pushed address, the first one is pushed after 0xEA0 (0xFEA0 in 64 KB)
+        stack = self.memory.read_range(cpu.get_stack_start_memory_address() + 2, cpu.SP)
+        return {
+            'PC': cpu.PC,
+            'I': cpu.I,
+            'SP': cpu.SP,
+            'DT': cpu.DT,
+            'ST': cpu.ST,
+            'V': list(cpu.V),
+            'stack': [(stack[i] << 8) | stack[i + 1] for i in range(0, len(stack), 2)],
+            'instructions_executed': self.instructions_executed,
+        }
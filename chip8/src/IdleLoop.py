@@ -0,0 +1,71 @@
+from Memory import Memory
+
+class IdleLoop:
+    """ Loop that can't change the machine state until the timers tick or the keys change.
+
+    The detected loops end with a `1NNN` jumping back to their start:
+
+    - `1NNN` jumping to itself
+    - `FX07` then `3XKK` or `4XKK` on VX: polling the delay timer
+    - `EX9E` or `EXA1`: polling a key
+
+    Once an iteration went through the whole loop the state is a fixed point: the next
+    iterations execute the same instructions with the same results, only PC moves.
+    """
+
+    JUMP = 'jump'
+    DELAY_TIMER = 'delay_timer'
+    KEY = 'key'
+
+    def __init__(self, start, length, kind):
+        self.start = start
+        self.length = length
+        self.kind = kind
+
+    def is_endless(self, cpu):
+        """ Return `True` when the loop can't end without a key change (the delay timer is empty or not used). """
+        return self.kind != IdleLoop.DELAY_TIMER or cpu.DT == 0
+
+    @staticmethod
+    def detect(memory: Memory, start):
+        """ Return the idle loop starting at the given address, `None` if there is none. """
+
+        # 1NNN can't jump back to a loop past 0xFFF (XO-CHIP memory)
+        if start > 0xFFF or start + 1 >= memory.size:
+            return None
+        jump = 0x1000 | start
+        read_16bit = memory.read_16bit
+
+        opcode = read_16bit(start)
+        if opcode == jump:
+            return IdleLoop(start, 1, IdleLoop.JUMP)
+
+        if start + 3 >= memory.size:
+            return None
+        x = (opcode & 0x0F00) >> 8
+        if opcode & 0xF0FF in (0xE09E, 0xE0A1):
+            if read_16bit(start + 2) == jump:
+                return IdleLoop(start, 2, IdleLoop.KEY)
+            return None
+
+        if opcode & 0xF0FF != 0xF007 or start + 5 >= memory.size:
+            return None
+        test = read_16bit(start + 2)
+        # 3XKK or 4XKK on the register loaded with DT
+        if test & 0xF000 in (0x3000, 0x4000) and (test & 0x0F00) >> 8 == x:
+            if read_16bit(start + 4) == jump:
+                return IdleLoop(start, 3, IdleLoop.DELAY_TIMER)
+        return None
+
+    @staticmethod
+    def find(memory: Memory, address):
+        """ Return the idle loop containing the given address, `None` if there is none. """
+
+        for back in range(3):
+            start = address - 2 * back
+            if start < 0:
+                break
+            loop = IdleLoop.detect(memory, start)
+            if loop is not None and loop.length > back:
+                return loop
+        return None
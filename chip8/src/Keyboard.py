@@ -54,16 +54,36 @@ class Keyboard:
         self.last_key_pressed = None
         return key
 
-    def wait_key_press(self, handle_pygame_event):
-        self.last_key_pressed = None
-        key_pressed = None
+    def pressed_keys_mask(self):
+        """ Return the pressed keys as a 16-bit mask (bit N set when key N is down). """
+
+        mask = 0
+        for key_value in range(0x10):
+            if self.keyboard[key_value] == KEYDOWN:
+                mask |= 1 << key_value
+        return mask
+
+    def set_pressed_keys_mask(self, mask):
+        """ Press the keys set in the 16-bit mask and release the others, without touching the latch. """
 
-        while key_pressed is None:
-            if handle_pygame_event != None:
-                handle_pygame_event()
-            key_pressed = self.read_key()
+        self.keyboard[:] = [KEYDOWN if mask & (1 << key_value) else KEYUP for key_value in range(0x10)]
+
+    def apply_keys_mask(self, mask):
+        """ Press and release the keys that differ from the 16-bit mask, in key order.
+
+        Unlike `set_pressed_keys_mask` the releases update the latch, like live key events.
+        """
 
-        return key_pressed
+        changed = mask ^ self.pressed_keys_mask()
+        key_value = 0
+        while changed:
+            if changed & 1:
+                if mask & (1 << key_value):
+                    self.press_key(key_value)
+                else:
+                    self.release_key(key_value)
+            changed >>= 1
+            key_value += 1
 
     def handle_pygame_event(self, event) -> bool:
         if event.type != KEYDOWN and event.type != KEYUP:
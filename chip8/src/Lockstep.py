@@ -0,0 +1,394 @@
+import numpy as np
+
+from Cpu import Cpu
+from Display import Display
+from Memory import Memory
+
+class Lockstep:
+    """ Engine running N machines in lockstep, with their state held in NumPy arrays.
+
+    Each step fetches one instruction in every machine, groups the machines by opcode class
+    and applies one vectorized handler per class. The handlers follow the semantics of the
+    `Cpu` opcode methods with the default quirks profile (registers and stack stay in the
+    same memory layout, the 64x32 framebuffers are held aside as in `Display`).
+
+    A machine executing an instruction the `Cpu` fails on (stack overflow or underflow, an
+    access out of memory) is halted: it stops executing and its `fault` flag is set.
+    The machines are lo-res only, the SUPER-CHIP display instructions (scrolls, resolution
+    switches, 16x16 sprites and the big font) halt them too. They have the 4 KB memory, one
+    plane and no audio, the XO-CHIP instructions (F000 NNNN, FN01, 00DN, 5XY2, 5XY3 and the
+    audio FX00, FX3A and F002) halt them. An unknown FXKK instruction halts them as well.
+    The keyboard works as in headless mode: FX0A is executed again until a key released after
+    it started waiting is latched in `released_key`.
+    """
+
+    STACK_START_ADDRESS = Cpu.MEMORY_STACK_START_ADDRESS
+    STACK_END_ADDRESS = Cpu.MEMORY_STACK_END_ADDRESS
+    ROW_BYTES = 8
+    SCREEN_HEIGHT = 32
+    DISPLAY_SIZE = ROW_BYTES * SCREEN_HEIGHT
+    SUPERCHIP_DISPLAY_OPCODES = (0x00FB, 0x00FC, 0x00FE, 0x00FF)
+
+    def __init__(self, number_machines, seed=None):
+        self.number_machines = number_machines
+
+        # memories with the builtin fonts
+        self.memory = np.zeros((number_machines, Memory.MEMORY_SIZE), dtype=np.uint8)
+        self.memory[:] = np.frombuffer(Memory().memory, dtype=np.uint8)
+        self.display = np.zeros((number_machines, Lockstep.DISPLAY_SIZE), dtype=np.uint8)
+
+        self.V = np.zeros((number_machines, 0x10), dtype=np.uint8)
+        self.PC = np.full(number_machines, Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS, dtype=np.int64)
+        self.I = np.full(number_machines, Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS, dtype=np.int64)
+        self.SP = np.zeros(number_machines, dtype=np.int64)
+        self.DT = np.zeros(number_machines, dtype=np.int64)
+        self.ST = np.zeros(number_machines, dtype=np.int64)
+        self.random_number = np.zeros(number_machines, dtype=np.int64)
+
+        # keys held down and the last key released (-1 for none) of each machine
+        self.keys = np.zeros((number_machines, 0x10), dtype=bool)
+        self.released_key = np.full(number_machines, -1, dtype=np.int64)
+        # machines waiting in FX0A, as `Cpu.waiting_key_register`
+        self.waiting_key = np.zeros(number_machines, dtype=bool)
+
+        self.fault = np.zeros(number_machines, dtype=bool)
+        self.random = np.random.default_rng(seed)
+        self.instructions_executed = 0
+
+        self.family_handlers = [
+            self.execute_0NNN, self.execute_1NNN, self.execute_2NNN, self.execute_3XKK,
+            self.execute_4XKK, self.execute_5XY0, self.execute_6XKK, self.execute_7XKK,
+            self.execute_8XYK, self.execute_9XY0, self.execute_ANNN, self.execute_BNNN,
+            self.execute_CXKK, self.execute_DXYK, self.execute_EXKK, self.execute_FXKK,
+        ]
+
+    def load_rom(self, rom: bytes, machines=slice(None)):
+        """ Copy the ROM at the program start address of the given machines (all by default). """
+
+        start = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+        if start + len(rom) > Cpu.MEMORY_PROGRAM_CODE_AREA_END_ADDRESS + 1:
+            raise Exception(f'ROM too big ({len(rom)} bytes)')
+        self.memory[machines, start:(start + len(rom))] = np.frombuffer(rom, dtype=np.uint8)
+
+    def press_key(self, key, machines=slice(None)):
+        self.keys[machines, key] = True
+
+    def release_key(self, key, machines=slice(None)):
+        self.keys[machines, key] = False
+        self.released_key[machines] = key
+
+    def framebuffers(self) -> np.ndarray:
+        """ Return the framebuffers of all machines (N x 256 bytes). """
+        return self.display
+
+    def pixels(self) -> np.ndarray:
+        """ Return the screens as a N x 32 x 64 array of 0 (off) and 1 (on). """
+        return np.unpackbits(self.framebuffers(), axis=1).reshape(self.number_machines, Lockstep.SCREEN_HEIGHT, -1)
+
+    def run(self, number_steps):
+        for _ in range(number_steps):
+            self.step()
+
+    def run_frames(self, number_frames, instructions_per_frame):
+        """ Run frames of `instructions_per_frame` steps, ticking the timers after each one. """
+
+        for _ in range(number_frames):
+            self.run(instructions_per_frame)
+            self.tick_timers()
+
+    def tick_timers(self):
+        np.subtract(self.DT, 1, out=self.DT, where=self.DT > 0)
+        np.subtract(self.ST, 1, out=self.ST, where=self.ST > 0)
+
+    def halt(self, machines):
+        self.fault[machines] = True
+
+    def step(self):
+        """ Execute one instruction in each running machine. """
+
+        machines = np.flatnonzero(~self.fault)
+        pc = self.PC[machines]
+
+        out_of_memory = pc > Memory.MEMORY_SIZE - 2
+        if out_of_memory.any():
+            self.halt(machines[out_of_memory])
+            machines = machines[~out_of_memory]
+            pc = pc[~out_of_memory]
+
+        opcodes = (self.memory[machines, pc].astype(np.int64) << 8) | self.memory[machines, pc + 1]
+        self.PC[machines] = pc + 2
+
+        # group the machines by the first opcode nibble
+        families = opcodes >> 12
+        order = np.argsort(families, kind='stable')
+        bounds = np.searchsorted(families[order], np.arange(0x11))
+        for family in range(0x10):
+            start, end = bounds[family], bounds[family + 1]
+            if start < end:
+                group = order[start:end]
+                self.family_handlers[family](machines[group], opcodes[group])
+
+        self.instructions_executed += len(machines)
+
+    def skip_if(self, machines, condition):
+        self.PC[machines[condition]] += 2
+
+    def execute_0NNN(self, machines, opcodes):
+        clear = machines[opcodes == 0x00E0]
+        self.display[clear] = 0
+
+        # SUPER-CHIP scrolls and resolution switches, XO-CHIP scroll up (00DN)
+        superchip = np.isin(opcodes & 0xFFF0, (0x00C0, 0x00D0)) | np.isin(opcodes, Lockstep.SUPERCHIP_DISPLAY_OPCODES)
+        self.halt(machines[superchip])
+
+        returning = machines[opcodes == 0x00EE]
+        underflow = self.SP[returning] == 0
+        self.halt(returning[underflow])
+        returning = returning[~underflow]
+
+        address = Lockstep.STACK_START_ADDRESS + self.SP[returning]
+        self.PC[returning] = (self.memory[returning, address].astype(np.int64) << 8) | self.memory[returning, address + 1]
+        self.SP[returning] -= 2
+
+    def execute_1NNN(self, machines, opcodes):
+        self.PC[machines] = opcodes & 0xFFF
+
+    def execute_2NNN(self, machines, opcodes):
+        overflow = Lockstep.STACK_START_ADDRESS + self.SP[machines] + 2 > Lockstep.STACK_END_ADDRESS
+        self.halt(machines[overflow])
+        machines = machines[~overflow]
+        opcodes = opcodes[~overflow]
+
+        self.SP[machines] += 2
+        address = Lockstep.STACK_START_ADDRESS + self.SP[machines]
+        pc = self.PC[machines]
+        self.memory[machines, address] = pc >> 8
+        self.memory[machines, address + 1] = pc & 0xFF
+        self.PC[machines] = opcodes & 0xFFF
+
+    def execute_3XKK(self, machines, opcodes):
+        self.skip_if(machines, self.V[machines, (opcodes >> 8) & 0xF] == (opcodes & 0xFF))
+
+    def execute_4XKK(self, machines, opcodes):
+        self.skip_if(machines, self.V[machines, (opcodes >> 8) & 0xF] != (opcodes & 0xFF))
+
+    def execute_5XY0(self, machines, opcodes):
+        # registers range save and load (XO-CHIP)
+        self.halt(machines[np.isin(opcodes & 0xF, (0x2, 0x3))])
+
+        valid = (opcodes & 0xF) == 0
+        machines, opcodes = machines[valid], opcodes[valid]
+        self.skip_if(machines, self.V[machines, (opcodes >> 8) & 0xF] == self.V[machines, (opcodes >> 4) & 0xF])
+
+    def execute_9XY0(self, machines, opcodes):
+        valid = (opcodes & 0xF) == 0
+        machines, opcodes = machines[valid], opcodes[valid]
+        self.skip_if(machines, self.V[machines, (opcodes >> 8) & 0xF] != self.V[machines, (opcodes >> 4) & 0xF])
+
+    def execute_6XKK(self, machines, opcodes):
+        self.V[machines, (opcodes >> 8) & 0xF] = opcodes & 0xFF
+
+    def execute_7XKK(self, machines, opcodes):
+        x = (opcodes >> 8) & 0xF
+        self.V[machines, x] = (self.V[machines, x] + (opcodes & 0xFF)) & 0xFF
+
+    def execute_8XYK(self, machines, opcodes):
+        x = (opcodes >> 8) & 0xF
+        vx = self.V[machines, x].astype(np.int64)
+        vy = self.V[machines, (opcodes >> 4) & 0xF].astype(np.int64)
+        k = opcodes & 0xF
+
+        operations = {
+            0x0: lambda vx, vy: (vy, None),
+            0x1: lambda vx, vy: (vx | vy, 0),
+            0x2: lambda vx, vy: (vx & vy, 0),
+            0x3: lambda vx, vy: (vx ^ vy, 0),
+            0x4: lambda vx, vy: ((vx + vy) & 0xFF, vx + vy > 0xFF),
+            0x5: lambda vx, vy: ((vx - vy) & 0xFF, vx > vy),
+            0x6: lambda vx, vy: (vy >> 1, vy & 0b1),
+            0x7: lambda vx, vy: ((vy - vx) & 0xFF, vy > vx),
+            0xE: lambda vx, vy: ((vy << 1) & 0xFF, vy >> 7),
+        }
+        for operation_k in np.unique(k):
+            operation = operations.get(int(operation_k))
+            if operation is None:
+                continue
+
+            selected = k == operation_k
+            group = machines[selected]
+            result, flag = operation(vx[selected], vy[selected])
+
+            # the flag is written after the result, so it wins when X is F
+            self.V[group, x[selected]] = result
+            if flag is not None:
+                self.V[group, 0xF] = flag
+
+    def execute_ANNN(self, machines, opcodes):
+        self.I[machines] = opcodes & 0xFFF
+
+    def execute_BNNN(self, machines, opcodes):
+        # NNN + V0, as `Cpu.opcode_BNNN_V0`
+        self.PC[machines] = ((opcodes & 0xFFF) + self.V[machines, 0x0]) & 0xFFFF
+
+    def execute_CXKK(self, machines, opcodes):
+        random_value = self.random.integers(0, 0x100, size=len(machines)) & (opcodes & 0xFF)
+        self.random_number[machines] = random_value
+        self.V[machines, (opcodes >> 8) & 0xF] = random_value
+
+    def execute_DXYK(self, machines, opcodes):
+        # one column per sprite row, the rows after the sprite height XOR nothing
+        # 16x16 sprites are SUPER-CHIP
+        large = (opcodes & 0xF) == 0
+        self.halt(machines[large])
+        machines, opcodes = machines[~large], opcodes[~large]
+
+        rows = np.arange(0x10)
+        in_sprite = rows < (opcodes & 0xF)[:, None]
+
+        sprite_addresses = self.I[machines][:, None] + rows
+        out_of_memory = ((sprite_addresses >= Memory.MEMORY_SIZE) & in_sprite).any(axis=1)
+        self.halt(machines[out_of_memory])
+        machines, opcodes = machines[~out_of_memory], opcodes[~out_of_memory]
+        in_sprite, sprite_addresses = in_sprite[~out_of_memory], sprite_addresses[~out_of_memory]
+
+        machines_rows = machines[:, None]
+        sprite = self.memory[machines_rows, np.minimum(sprite_addresses, Memory.MEMORY_SIZE - 1)].astype(np.int64)
+        sprite *= in_sprite
+
+        x = self.V[machines, (opcodes >> 8) & 0xF].astype(np.int64) & Display.WIDTH
+        y = self.V[machines, (opcodes >> 4) & 0xF].astype(np.int64) & Display.HEIGHT
+
+        spans = sprite << (8 - (x & 0x7))[:, None]
+        left_column = x >> 3
+        right_column = (left_column + 1) & (Lockstep.ROW_BYTES - 1)
+        row_offsets = ((y[:, None] + rows) & (Lockstep.SCREEN_HEIGHT - 1)) * Lockstep.ROW_BYTES
+        left_offsets = row_offsets + left_column[:, None]
+        right_offsets = row_offsets + right_column[:, None]
+
+        screen = (self.display[machines_rows, left_offsets].astype(np.int64) << 8) | self.display[machines_rows, right_offsets]
+        collision = ((screen & spans) != 0).any(axis=1)
+        screen ^= spans
+
+        self.display[machines_rows, left_offsets] = screen >> 8
+        self.display[machines_rows, right_offsets] = screen & 0xFF
+        self.V[machines, 0xF] = collision
+
+    def execute_EXKK(self, machines, opcodes):
+        key = self.V[machines, (opcodes >> 8) & 0xF].astype(np.int64)
+        pressed = self.keys[machines, key & 0xF] & (key < 0x10)
+        kk = opcodes & 0xFF
+
+        self.skip_if(machines, (kk == 0x9E) & pressed)
+        self.skip_if(machines, (kk == 0xA1) & ~pressed)
+
+    def execute_FXKK(self, machines, opcodes):
+        x = (opcodes >> 8) & 0xF
+        kk = opcodes & 0xFF
+
+        for operation in np.unique(kk):
+            selected = kk == operation
+            handler = self.f_handlers.get(int(operation))
+            if handler is None:
+                self.halt(machines[selected])
+            else:
+                handler(self, machines[selected], x[selected])
+
+    def execute_FX00(self, machines, x):
+        # F000 NNNN long load needs the 64 KB memory (XO-CHIP), FX00 sets the pitch which isn't emulated here
+        self.halt(machines)
+
+    def execute_F002(self, machines, x):
+        # the audio pattern buffer is XO-CHIP
+        self.halt(machines)
+
+    def execute_FN01(self, machines, x):
+        # the planes are XO-CHIP
+        self.halt(machines)
+
+    def execute_FX07(self, machines, x):
+        self.V[machines, x] = self.DT[machines]
+
+    def execute_FX0A(self, machines, x):
+        # only a key released from now on ends the wait
+        entering = machines[~self.waiting_key[machines]]
+        self.released_key[entering] = -1
+        self.waiting_key[entering] = True
+
+        key = self.released_key[machines]
+        released = key >= 0
+
+        self.V[machines[released], x[released]] = key[released]
+        self.released_key[machines[released]] = -1
+        self.waiting_key[machines[released]] = False
+        # wait executing the instruction again
+        self.PC[machines[~released]] -= 2
+
+    def execute_FX15(self, machines, x):
+        self.DT[machines] = self.V[machines, x]
+
+    def execute_FX18(self, machines, x):
+        self.ST[machines] = self.V[machines, x]
+
+    def execute_FX1E(self, machines, x):
+        self.I[machines] = (self.I[machines] + self.V[machines, x]) & 0xFFFF
+
+    def execute_FX29(self, machines, x):
+        self.I[machines] = self.V[machines, x].astype(np.int64) * 0x5
+
+    def execute_FX30(self, machines, x):
+        # the big font is SUPER-CHIP
+        self.halt(machines)
+
+    def execute_FX3A(self, machines, x):
+        # the pitch is XO-CHIP, as FX00
+        self.halt(machines)
+
+    def execute_FX33(self, machines, x):
+        address = self.I[machines]
+        out_of_memory = address + 2 >= Memory.MEMORY_SIZE
+        self.halt(machines[out_of_memory])
+        machines, x, address = machines[~out_of_memory], x[~out_of_memory], address[~out_of_memory]
+
+        value = self.V[machines, x]
+        self.memory[machines, address] = value // 100
+        self.memory[machines, address + 1] = value // 10 % 10
+        self.memory[machines, address + 2] = value % 10
+
+    def execute_FX55(self, machines, x):
+        machines, x, address = self.registers_range(machines, x)
+        for register in range(0x10):
+            selected = register <= x
+            self.memory[machines[selected], address[selected] + register] = self.V[machines[selected], register]
+        self.I[machines] = (address + x + 1) & 0xFFFF
+
+    def execute_FX65(self, machines, x):
+        machines, x, address = self.registers_range(machines, x)
+        for register in range(0x10):
+            selected = register <= x
+            self.V[machines[selected], register] = self.memory[machines[selected], address[selected] + register]
+        self.I[machines] = (address + x + 1) & 0xFFFF
+
+    def registers_range(self, machines, x):
+        """ Halt the machines whose V0 to VX range at I is out of memory, returning the others. """
+
+        address = self.I[machines]
+        out_of_memory = address + x >= Memory.MEMORY_SIZE
+        self.halt(machines[out_of_memory])
+        return machines[~out_of_memory], x[~out_of_memory], address[~out_of_memory]
+
+    f_handlers = {
+        0x00: execute_FX00,
+        0x01: execute_FN01,
+        0x02: execute_F002,
+        0x07: execute_FX07,
+        0x0A: execute_FX0A,
+        0x15: execute_FX15,
+        0x18: execute_FX18,
+        0x1E: execute_FX1E,
+        0x29: execute_FX29,
+        0x30: execute_FX30,
+        0x33: execute_FX33,
+        0x3A: execute_FX3A,
+        0x55: execute_FX55,
+        0x65: execute_FX65,
+    }
@@ -1,25 +1,67 @@
+import struct
+
+import numpy as np
+
 # Memory area reserved for builtin fonts
 MEMORY_FONT_AREA_START_ADDRESS = 0x000
 MEMORY_FONT_AREA_END_ADDRESS = 0x050
 
+# Memory area reserved for the SUPER-CHIP big font (16 digits of 8x10 pixels)
+MEMORY_BIG_FONT_AREA_START_ADDRESS = 0x050
+MEMORY_BIG_FONT_AREA_END_ADDRESS = 0x0F0
+
+# Memory area for the program code
+MEMORY_PROGRAM_AREA_START_ADDRESS = 0x200
+MEMORY_PROGRAM_AREA_END_ADDRESS = 0xE9F
+
+# Memory area for the stack (16 levels of 16-bit addresses)
+MEMORY_STACK_AREA_START_ADDRESS = 0xEA0
+MEMORY_STACK_AREA_END_ADDRESS = 0xEBF
+
+# Memory area where the registers are mirrored (PC, I, SP, DT, ST and V0 to VF)
+MEMORY_REGISTERS_AREA_START_ADDRESS = 0xED0
+MEMORY_REGISTERS_AREA_END_ADDRESS = 0xEFF
+
 class Memory:
-    """ Memory with 4 KB
+    """ Memory with 4 KB, or 64 KB for XO-CHIP
 
     The memory has the layout with big-endian.
-    The memory is read/written using AND 0xFF to enforce byte size.
+    The memory is stored in a `bytearray`, the writes use AND 0xFF to enforce byte size.
+    Ranges are read as `memoryview`s that share the storage (no copy is made), writing
+    through a view does not notify the write listeners.
+
+    Snapshots only hold the pages of 256 bytes that are not empty, so a 64 KB memory
+    mostly unused costs about as much as the 4 KB one. Restoring one only writes the
+    pages that differ from it.
+
+    The stack and the registers mirror are at the top of the first 4 KB, in a larger
+    memory they are moved up by `reserved_area_offset` (as in `Cpu`).
     """
     MEMORY_SIZE = 4096
+    XOCHIP_MEMORY_SIZE = 0x10000
+
+    PAGE_SIZE = 0x100
+    # number of pages, then a bitmap of the non-empty pages followed by their bytes
+    SNAPSHOT_HEADER = struct.Struct('>H')
 
-    def __init__(self):
+    def __init__(self, size=MEMORY_SIZE):
         """ Initialize the memory with 0x000
 
-        Initialize the builtin fonts from 0x00 to 0x80
+        Initialize the builtin fonts from 0x00 to 0xF0
         """
 
-        self.memory = [0] * 4096
+        if size < Memory.MEMORY_SIZE or size > Memory.XOCHIP_MEMORY_SIZE or size % (8 * Memory.PAGE_SIZE) != 0:
+            raise Exception(f'Invalid memory size {size}')
+
+        self.size = size
+        self.memory = bytearray(size)
+        self.reserved_area_offset = size - Memory.MEMORY_SIZE
+
+        # callables `listener(address, number_bytes)` notified after every write
+        self.write_listeners = []
 
         # each digit is 5 bytes long (8x5 pixels)
-        self.memory[MEMORY_FONT_AREA_START_ADDRESS:MEMORY_FONT_AREA_END_ADDRESS] = [
+        self.memory[MEMORY_FONT_AREA_START_ADDRESS:MEMORY_FONT_AREA_END_ADDRESS] = bytes([
             0xF0, 0x90, 0x90, 0x90, 0xF0, # 0x0 => 0
             0x20, 0x60, 0x20, 0x20, 0x70, # 0x5 => 1
             0xF0, 0x10, 0xF0, 0x80, 0xF0, # 0xA => 2
@@ -36,33 +78,142 @@ class Memory:
             0xE0, 0x90, 0x90, 0x90, 0xE0, # 0x41 => D
             0xF0, 0x80, 0xF0, 0x80, 0xF0, # 0x46 => E
             0xF0, 0x80, 0xF0, 0x80, 0x80, # 0x4B => F
-        ]
+        ])
+
+        # each big digit is 10 bytes long (8x10 pixels)
+        self.memory[MEMORY_BIG_FONT_AREA_START_ADDRESS:MEMORY_BIG_FONT_AREA_END_ADDRESS] = bytes([
+            0x3C, 0x7E, 0xE7, 0xC3, 0xC3, 0xC3, 0xC3, 0xE7, 0x7E, 0x3C, # 0x50 => 0
+            0x18, 0x38, 0x58, 0x18, 0x18, 0x18, 0x18, 0x18, 0x18, 0x3C, # 0x5A => 1
+            0x3E, 0x7F, 0xC3, 0x06, 0x0C, 0x18, 0x30, 0x60, 0xFF, 0xFF, # 0x64 => 2
+            0x3C, 0x7E, 0xC3, 0x03, 0x0E, 0x0E, 0x03, 0xC3, 0x7E, 0x3C, # 0x6E => 3
+            0x06, 0x0E, 0x1E, 0x36, 0x66, 0xC6, 0xFF, 0xFF, 0x06, 0x06, # 0x78 => 4
+            0xFF, 0xFF, 0xC0, 0xC0, 0xFC, 0xFE, 0x03, 0xC3, 0x7E, 0x3C, # 0x82 => 5
+            0x3E, 0x7C, 0xE0, 0xC0, 0xFC, 0xFE, 0xC3, 0xC3, 0x7E, 0x3C, # 0x8C => 6
+            0xFF, 0xFF, 0x03, 0x06, 0x0C, 0x18, 0x30, 0x60, 0x60, 0x60, # 0x96 => 7
+            0x3C, 0x7E, 0xC3, 0xC3, 0x7E, 0x7E, 0xC3, 0xC3, 0x7E, 0x3C, # 0xA0 => 8
+            0x3C, 0x7E, 0xC3, 0xC3, 0x7F, 0x3F, 0x03, 0x03, 0x3E, 0x7C, # 0xAA => 9
+            0x7E, 0xFF, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, 0xC3, 0xC3, 0xC3, # 0xB4 => A
+            0xFC, 0xFC, 0xC3, 0xC3, 0xFC, 0xFC, 0xC3, 0xC3, 0xFC, 0xFC, # 0xBE => B
+            0x3C, 0xFF, 0xC3, 0xC0, 0xC0, 0xC0, 0xC0, 0xC3, 0xFF, 0x3C, # 0xC8 => C
+            0xFC, 0xFE, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xFE, 0xFC, # 0xD2 => D
+            0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, # 0xDC => E
+            0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC0, 0xC0, 0xC0, 0xC0, # 0xE6 => F
+        ])
+
+
+    def add_write_listener(self, listener):
+        """ Register a callable `listener(address, number_bytes)` to be notified after every write. """
+        self.write_listeners.append(listener)
 
+    def notify_write(self, address, number_bytes):
+        for listener in self.write_listeners:
+            listener(address, number_bytes)
 
     def write_8bit(self, address, value):
         # print(f'\tWriting {hex(value)} at address {hex(address)}')
         """ Store a 8-bit value at given address. """
         self.memory[address] = value & 0xFF
+        if self.write_listeners:
+            self.notify_write(address, 1)
 
     def read_8bit(self, address):
         """ Read a 8-bit value from given address. """
-        return self.memory[address] & 0xFF
+        return self.memory[address]
 
     def write_16bit(self, address, value):
         """ Store a 16-bit value into two 8-bit cells starting at given address. """
 
         self.memory[address] = (value >> 8) & 0xFF
-        address = address + 1
-        self.memory[address] = value & 0xFF
-        # print(f'Memory {hex(self.memory[address - 1])} {hex(self.memory[address])}')
+        self.memory[address + 1] = value & 0xFF
+        # print(f'Memory {hex(self.memory[address])} {hex(self.memory[address + 1])}')
+        if self.write_listeners:
+            self.notify_write(address, 2)
 
     def read_16bit(self, address):
         """ Read a 16-bit value from two 8-bit cells starting at given address. """
 
-        val = (self.memory[address] & 0xFF) << 8
-        address = address + 1
-        return val | (self.memory[address] & 0xFF)
+        return (self.memory[address] << 8) | self.memory[address + 1]
+
+    def validate_range(self, offset, number_bytes):
+        if offset < 0 or number_bytes < 0 or offset + number_bytes > self.size:
+            raise Exception(f'Invalid memory range {hex(offset)} with {number_bytes} bytes')
 
     def read_range(self, offset, number_bytes):
-        return self.memory[offset:(offset + number_bytes)]
+        """ Return a view of the given number of bytes starting at offset (no copy is made). """
+
+        self.validate_range(offset, number_bytes)
+        return memoryview(self.memory)[offset:(offset + number_bytes)]
+
+    def write_range(self, offset, data):
+        """ Copy the bytes of `data` into memory starting at offset, notifying the listeners once. """
+
+        number_bytes = len(data)
+        self.validate_range(offset, number_bytes)
+        self.memory[offset:(offset + number_bytes)] = data
+        if self.write_listeners:
+            self.notify_write(offset, number_bytes)
+
+    def snapshot(self) -> bytes:
+        """ Return a copy of the memory, without its empty pages. """
+
+        pages = np.frombuffer(self.memory, dtype=np.uint8).reshape(-1, Memory.PAGE_SIZE)
+        used = pages.any(axis=1)
+        return Memory.SNAPSHOT_HEADER.pack(len(pages)) + np.packbits(used).tobytes() + pages[used].tobytes()
+
+    def restore(self, data):
+        """ Replace the whole memory with a snapshot (see `write_pages`). """
+        self.write_pages(self.read_snapshot(data))
+
+    def read_snapshot(self, data):
+        """ Return the pages of a snapshot, raising if it doesn't have the size of this memory. """
+
+        number_pages = self.size // Memory.PAGE_SIZE
+        offset = Memory.SNAPSHOT_HEADER.size + number_pages // 8
+        if len(data) < offset or Memory.SNAPSHOT_HEADER.unpack_from(data)[0] != number_pages:
+            raise Exception(f'Invalid memory snapshot, expected {number_pages} pages')
+
+        used = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=number_pages // 8, offset=Memory.SNAPSHOT_HEADER.size)).astype(bool)
+        if len(data) != offset + int(used.sum()) * Memory.PAGE_SIZE:
+            raise Exception(f'Invalid memory snapshot with {len(data)} bytes')
+
+        pages = np.zeros((number_pages, Memory.PAGE_SIZE), dtype=np.uint8)
+        pages[used] = np.frombuffer(data, dtype=np.uint8, offset=offset).reshape(-1, Memory.PAGE_SIZE)
+        return pages
+
+    def write_pages(self, pages):
+        """ Replace the memory with the pages returned by `read_snapshot`.
+
+        Only the pages that differ are written, each run of them notifying the listeners
+        once, so the cached instructions and compiled code of the others are kept.
+        """
+
+        current = np.frombuffer(self.memory, dtype=np.uint8).reshape(-1, Memory.PAGE_SIZE)
+        changed = np.flatnonzero((current != pages).any(axis=1))
+        del current
+
+        for run in np.split(changed, np.flatnonzero(np.diff(changed) != 1) + 1):
+            if len(run) > 0:
+                first, last = int(run[0]), int(run[-1]) + 1
+                self.write_range(first * Memory.PAGE_SIZE, pages[first:last].tobytes())
+
+    def view_area(self, start_address, end_address):
+        """ Return a view of the memory area from start to end address (inclusive). """
+        return self.read_range(start_address, end_address - start_address + 1)
+
+    def font_view(self):
+        return memoryview(self.memory)[MEMORY_FONT_AREA_START_ADDRESS:MEMORY_FONT_AREA_END_ADDRESS]
+
+    def program_view(self):
+        """ The program area goes up to the stack, 0xFE9F in 64 KB. """
+        return self.view_area(MEMORY_PROGRAM_AREA_START_ADDRESS, MEMORY_PROGRAM_AREA_END_ADDRESS + self.reserved_area_offset)
+
+    def stack_view(self):
+        offset = self.reserved_area_offset
+        return self.view_area(MEMORY_STACK_AREA_START_ADDRESS + offset, MEMORY_STACK_AREA_END_ADDRESS + offset)
+
+    def registers_view(self):
+        offset = self.reserved_area_offset
+        return self.view_area(MEMORY_REGISTERS_AREA_START_ADDRESS + offset, MEMORY_REGISTERS_AREA_END_ADDRESS + offset)
 
+    def big_font_view(self):
+        return memoryview(self.memory)[MEMORY_BIG_FONT_AREA_START_ADDRESS:MEMORY_BIG_FONT_AREA_END_ADDRESS]
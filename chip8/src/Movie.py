@@ -0,0 +1,140 @@
+import hashlib
+import random
+import struct
+import sys
+import zlib
+
+from array import array
+
+from Keyboard import Keyboard
+from Memory import Memory
+from Quirks import DEFAULT_PROFILE
+
+class Movie:
+    """ Recording of a run: the random seed and the keypad state of every frame.
+
+    Replaying the movie from the same memory (ROM) with the same engine and quirks profile
+    gives a bit-identical run: the keys are applied at the start of each frame, the same way
+    they were while recording.
+
+    File format (big-endian): a header with magic, version, seed, SHA-1 of the memory
+    when the recording started, instructions per frame, number of frames, engine and
+    quirks profile names, followed by the zlib compressed 16-bit keypad masks (bit N set
+    when key N is down).
+
+    The version 2 movies were recorded when the `cosmac_vip` profile doubled V0 in BNNN,
+    they are loaded with the `legacy` profile so they still replay the same.
+    """
+
+    MAGIC = b'C8MV'
+    VERSION = 3
+    LEGACY_VERSION = 2
+    HEADER = struct.Struct('>4sHq20sHI16s16s')
+
+    def __init__(self, seed, memory_hash: bytes, instructions_per_frame, masks=(), engine='interpreter',
+                 quirks=DEFAULT_PROFILE):
+        self.seed = seed
+        self.memory_hash = memory_hash
+        self.instructions_per_frame = instructions_per_frame
+        self.masks = array('H', masks)
+        self.engine = engine
+        self.quirks = quirks
+
+    def __len__(self):
+        return len(self.masks)
+
+    @staticmethod
+    def hash_memory(memory: Memory) -> bytes:
+        return hashlib.sha1(memory.memory).digest()
+
+    def to_bytes(self) -> bytes:
+        masks = array('H', self.masks)
+        if sys.byteorder == 'little':
+            masks.byteswap()
+
+        header = Movie.HEADER.pack(Movie.MAGIC, Movie.VERSION, self.seed, self.memory_hash,
+                                   self.instructions_per_frame, len(masks), self.engine.encode(), self.quirks.encode())
+        return header + zlib.compress(masks.tobytes())
+
+    @staticmethod
+    def from_bytes(data) -> 'Movie':
+        if len(data) < Movie.HEADER.size:
+            raise Exception('Invalid movie, too short')
+
+        magic, version, seed, memory_hash, instructions_per_frame, number_frames, engine, quirks = Movie.HEADER.unpack_from(data, 0)
+        if magic != Movie.MAGIC:
+            raise Exception('Invalid movie, wrong magic')
+        if version not in (Movie.LEGACY_VERSION, Movie.VERSION):
+            raise Exception(f'Unsupported movie version {version}, expected {Movie.VERSION}')
+
+        masks = array('H', zlib.decompress(data[Movie.HEADER.size:]))
+        if sys.byteorder == 'little':
+            masks.byteswap()
+        if len(masks) != number_frames:
+            raise Exception(f'Invalid movie, expected {number_frames} frames but found {len(masks)}')
+
+        quirks = quirks.rstrip(b'\0').decode()
+        if version == Movie.LEGACY_VERSION and quirks == 'cosmac_vip':
+            quirks = 'legacy'
+
+        return Movie(seed, memory_hash, instructions_per_frame, masks, engine.rstrip(b'\0').decode(), quirks)
+
+    def save(self, filename: str):
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def load(filename: str) -> 'Movie':
+        with open(filename, 'rb') as f:
+            return Movie.from_bytes(f.read())
+
+    @staticmethod
+    def random_seed():
+        return random.randrange(1 << 63)
+
+class MovieRecorder:
+    """ Frame input handler appending the keypad state of each frame to a movie.
+
+    The keys changed by `handle_events` (the live pygame events) are collected as a mask and
+    applied with `Keyboard.apply_keys_mask`, as the replay does, so the recorded run and its
+    replay see the same keyboard. Keys changed outside of `handle_events` are not recorded.
+    """
+
+    def __init__(self, keyboard: Keyboard, movie: Movie, handle_events=None):
+        self.keyboard = keyboard
+        self.movie = movie
+        self.handle_events = handle_events
+
+    def handle_frame_events(self):
+        keyboard = self.keyboard
+        mask = keyboard.pressed_keys_mask()
+        latch = keyboard.last_key_pressed
+
+        if self.handle_events is not None:
+            self.handle_events()
+
+        new_mask = keyboard.pressed_keys_mask()
+        keyboard.set_pressed_keys_mask(mask)
+        keyboard.last_key_pressed = latch
+        keyboard.apply_keys_mask(new_mask)
+
+        self.movie.masks.append(new_mask)
+
+class MoviePlayer:
+    """ Frame input handler applying the keypad state recorded for each frame.
+
+    After the last frame of the movie all the keys are released.
+    """
+
+    def __init__(self, keyboard: Keyboard, movie: Movie):
+        self.keyboard = keyboard
+        self.movie = movie
+        self.frame = 0
+
+    def finished(self):
+        return self.frame >= len(self.movie.masks)
+
+    def handle_frame_events(self):
+        mask = self.movie.masks[self.frame] if self.frame < len(self.movie.masks) else 0
+        self.keyboard.apply_keys_mask(mask)
+        self.frame += 1
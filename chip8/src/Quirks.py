@@ -0,0 +1,72 @@
+from Memory import Memory
+
+class Quirks:
+    """ Behaviours that differ between the CHIP-8 interpreters.
+
+    The `Cpu` selects the handlers of the affected opcodes when it builds its dispatch
+    table, so a profile costs nothing per instruction:
+
+    - `vf_reset`: 8XY1, 8XY2 and 8XY3 reset VF
+    - `shift_vy`: 8XY6 and 8XYE shift VY into VX, VX is shifted in place otherwise
+    - `load_store`: how FX55 and FX65 change I, `increment` (I + X + 1), `increment_x` (I + X)
+      or `unchanged`
+    - `jump`: BNNN jumps to NNN + V0 (`v0`), NNN + 2 * V0 (`v0_doubled`) or XNN + VX (`vx`)
+    - `memory_size`: 4 KB, or 64 KB for XO-CHIP
+    - `long_load`: F000 NNNN loads a 16-bit address into I and the skips step over it
+      (XO-CHIP), F000 sets the pitch otherwise
+    """
+
+    LOAD_STORE_INCREMENT = 'increment'
+    LOAD_STORE_INCREMENT_X = 'increment_x'
+    LOAD_STORE_UNCHANGED = 'unchanged'
+    LOAD_STORE_MODES = (LOAD_STORE_INCREMENT, LOAD_STORE_INCREMENT_X, LOAD_STORE_UNCHANGED)
+
+    JUMP_V0 = 'v0'
+    JUMP_V0_DOUBLED = 'v0_doubled'
+    JUMP_VX = 'vx'
+    JUMP_MODES = (JUMP_V0, JUMP_V0_DOUBLED, JUMP_VX)
+
+    def __init__(self, name, vf_reset=True, shift_vy=True, load_store=LOAD_STORE_INCREMENT, jump=JUMP_V0,
+                 memory_size=Memory.MEMORY_SIZE, long_load=False):
+        if load_store not in Quirks.LOAD_STORE_MODES:
+            raise Exception(f'Invalid load/store quirk {load_store}, use one of {", ".join(Quirks.LOAD_STORE_MODES)}')
+        if jump not in Quirks.JUMP_MODES:
+            raise Exception(f'Invalid jump quirk {jump}, use one of {", ".join(Quirks.JUMP_MODES)}')
+
+        self.name = name
+        self.vf_reset = vf_reset
+        self.shift_vy = shift_vy
+        self.load_store = load_store
+        self.jump = jump
+        self.memory_size = memory_size
+        self.long_load = long_load
+
+    def __repr__(self):
+        return f'Quirks({", ".join(f"{key}={value!r}" for key, value in vars(self).items())})'
+
+    @staticmethod
+    def get(quirks) -> 'Quirks':
+        """ Return the given quirks, or the profile with the given name (the default one for `None`). """
+
+        if isinstance(quirks, Quirks):
+            return quirks
+        if quirks is None:
+            quirks = DEFAULT_PROFILE
+        if quirks not in PROFILES:
+            raise Exception(f'Invalid quirks profile {quirks}, use one of {", ".join(PROFILES)}')
+        return PROFILES[quirks]
+
+PROFILES = {
+    'cosmac_vip': Quirks('cosmac_vip', vf_reset=True, shift_vy=True, load_store=Quirks.LOAD_STORE_INCREMENT,
+                         jump=Quirks.JUMP_V0),
+    # cosmac_vip as this emulator first ran it, doubling V0 in BNNN (the quirks of the version 2 movies)
+    'legacy': Quirks('legacy', vf_reset=True, shift_vy=True, load_store=Quirks.LOAD_STORE_INCREMENT,
+                     jump=Quirks.JUMP_V0_DOUBLED),
+    'chip48': Quirks('chip48', vf_reset=False, shift_vy=False, load_store=Quirks.LOAD_STORE_INCREMENT_X,
+                     jump=Quirks.JUMP_VX),
+    'superchip': Quirks('superchip', vf_reset=False, shift_vy=False, load_store=Quirks.LOAD_STORE_UNCHANGED,
+                        jump=Quirks.JUMP_VX),
+    'xochip': Quirks('xochip', vf_reset=False, shift_vy=True, load_store=Quirks.LOAD_STORE_INCREMENT,
+                     jump=Quirks.JUMP_V0, memory_size=Memory.XOCHIP_MEMORY_SIZE, long_load=True),
+}
+DEFAULT_PROFILE = 'cosmac_vip'
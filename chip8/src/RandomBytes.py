@@ -0,0 +1,58 @@
+import struct
+
+import numpy as np
+
+class RandomBytes:
+    """ Seedable generator of random bytes for CXKK.
+
+    The bytes are drawn in bulk from a NumPy PCG64 generator into a buffer, so getting
+    one byte is only an index into the buffer. The state is the PCG64 state from before
+    the buffer was filled plus the position in the buffer: restoring it fills the same
+    buffer again, so it fits in a few bytes.
+    """
+
+    BUFFER_SIZE = 1024
+    # PCG64 state and increment (128-bit) and position in the buffer
+    STATE = struct.Struct('>16s16sH')
+
+    def __init__(self, seed=None):
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        self.generator = np.random.PCG64(seed)
+        self.refill()
+
+    def refill(self):
+        state = self.generator.state['state']
+        self.buffer_state = (state['state'], state['inc'])
+        # little-endian bytes whatever the host, so the sequence is the same everywhere
+        self.buffer = self.generator.random_raw(RandomBytes.BUFFER_SIZE // 8).astype('<u8').tobytes()
+        self.position = 0
+
+    def next_byte(self):
+        position = self.position
+        if position == RandomBytes.BUFFER_SIZE:
+            self.refill()
+            position = 0
+        self.position = position + 1
+        return self.buffer[position]
+
+    def getstate(self) -> bytes:
+        state, increment = self.buffer_state
+        return RandomBytes.STATE.pack(state.to_bytes(16, 'big'), increment.to_bytes(16, 'big'), self.position)
+
+    def setstate(self, data):
+        """ Restore a state returned by `getstate`, raising before any change if it's invalid. """
+
+        state, increment, position = RandomBytes.STATE.unpack(data)
+        if position > RandomBytes.BUFFER_SIZE:
+            raise Exception(f'Invalid snapshot, random position {position} past the buffer of {RandomBytes.BUFFER_SIZE} bytes')
+
+        self.generator.state = {
+            'bit_generator': 'PCG64',
+            'state': { 'state': int.from_bytes(state, 'big'), 'inc': int.from_bytes(increment, 'big') },
+            'has_uint32': 0,
+            'uinteger': 0,
+        }
+        self.refill()
+        self.position = position
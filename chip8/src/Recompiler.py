@@ -0,0 +1,539 @@
+from Cpu import Cpu
+from Memory import Memory
+
+class CompiledBlock:
+    """ Basic block of a compiled region.
+
+    The block covers the memory from `start` (inclusive) to `end` (exclusive).
+    """
+
+    def __init__(self, start, end, number_instructions):
+        self.start = start
+        self.end = end
+        self.number_instructions = number_instructions
+
+class CompiledRegion:
+    """ Basic blocks translated together into a single Python function.
+
+    `function(pc, budget)` executes the block starting at `pc` and the ones it jumps or
+    skips to inside the region, until it reaches an address outside the region or a
+    block longer than what is left of `budget`. It returns the number of instructions
+    executed, 0 when the first block doesn't fit in the budget.
+    """
+
+    def __init__(self, start, blocks, function, source):
+        self.start = start
+        self.blocks = blocks
+        self.function = function
+        self.source = source
+
+class Recompiler:
+    """ Execution engine that runs regions of basic blocks compiled into Python functions.
+
+    A basic block is a run of instructions ending at a jump, call, return or skip
+    (1NNN, 2NNN, 00EE, BNNN, 3XKK, 4XKK, 5XY0, 9XY0, EX9E and EXA1). It is also ended
+    after FX0A, FX33, FX55 and 5XY2 because they wait for input or write into memory,
+    and after F000, the XO-CHIP long load F000 NNNN steps PC over its address.
+
+    Blocks are interpreted until their start has been reached `compile_threshold` times.
+    A region is then compiled from the block starting there and the blocks it jumps,
+    calls or skips to that were already executed, up to `MAX_REGION_BLOCKS`. The region
+    becomes a single Python function looping over its blocks, so a hot loop runs in
+    one call instead of one call per block.
+
+    Registers are held in local variables, loaded when the region is entered and after
+    each handler call, and stored back at the end of each block that changed them.
+    Simple instructions are generated inline while the others call the handlers of the
+    `Cpu` dispatch table.
+
+    Compiled regions are dropped when the memory their blocks were compiled from is
+    written. This includes the instruction after each block, a skip steps over 4 bytes
+    when it is a long load.
+    """
+
+    MAX_BLOCK_INSTRUCTIONS = 64
+    MAX_REGION_BLOCKS = 32
+    COMPILE_THRESHOLD = 32
+
+    def __init__(self, cpu: Cpu, max_block_instructions=MAX_BLOCK_INSTRUCTIONS, compile_threshold=COMPILE_THRESHOLD):
+        self.cpu = cpu
+        self.memory = cpu.memory
+        self.max_block_instructions = max_block_instructions
+        self.compile_threshold = compile_threshold
+
+        # compiled regions by start address of each of their blocks
+        self.regions = {}
+        # regions compiled from each memory address
+        self.regions_by_address = [None] * self.memory.size
+        # end of the compiled block holding each address after its start, these addresses are interpreted
+        # up to the end of the block instead of starting a region
+        self.block_ends = [0] * self.memory.size
+        # number of instructions of the blocks not compiled yet, interpreted as a whole
+        self.cold_blocks = {}
+        # times each block start was reached outside of the compiled code
+        self.hits = [0] * self.memory.size
+
+        self.instructions_executed = 0
+
+        self.memory.add_write_listener(self.invalidate)
+
+    def run(self, number_instructions):
+        """ Execute exactly the given number of instructions.
+
+        Regions stop before a block longer than the instructions left, these are
+        interpreted. A frame then runs the same instructions between two timer ticks
+        as with the interpreter.
+        """
+
+        cpu = self.cpu
+        regions = self.regions
+        block_ends = self.block_ends
+        cold_blocks = self.cold_blocks
+        hits = self.hits
+        executed = 0
+        while executed < number_instructions:
+            pc = cpu.PC
+            left = number_instructions - executed
+            region = regions.get(pc)
+            if region is None:
+                if block_ends[pc]:
+                    # inside a compiled block, interpreted up to the next one
+                    interpreted = (block_ends[pc] - pc) // 2
+                else:
+                    hits[pc] += 1
+                    if hits[pc] >= self.compile_threshold:
+                        region = self.compile_region(pc)
+                    else:
+                        interpreted = cold_blocks.get(pc) or self.measure_cold_block(pc)
+
+                if region is None:
+                    interpreted = min(interpreted, left)
+                    for _ in range(interpreted):
+                        cpu.execute_cpu_cycle()
+                    executed += interpreted
+                    continue
+
+            region_executed = region.function(pc, left)
+            if region_executed == 0:
+                # the block is longer than the instructions left
+                for _ in range(left):
+                    cpu.execute_cpu_cycle()
+                region_executed = left
+            elif cpu.mirror_registers:
+                cpu.sync_registers_to_memory()
+            executed += region_executed
+
+        self.instructions_executed += executed
+        return executed
+
+    def measure_cold_block(self, start):
+        """ Return the number of instructions of the block starting at the given address and cache it.
+
+        The length is kept when the block is written, the interpreter executes whatever the
+        memory holds so the number of instructions executed stays exact.
+        """
+
+        translator = RegionTranslator(self.cpu, start, self.max_block_instructions, Recompiler.MAX_REGION_BLOCKS, self.hits)
+        self.cold_blocks[start] = max(len(translator.fetch_block_instructions(start)), 1)
+        return self.cold_blocks[start]
+
+    def compile_region(self, start):
+        """ Translate the region starting at the given address and cache it. """
+
+        region = RegionTranslator(self.cpu, start, self.max_block_instructions, Recompiler.MAX_REGION_BLOCKS, self.hits).translate()
+
+        for block in region.blocks:
+            self.regions.setdefault(block.start, region)
+            self.block_ends[block.start + 1:block.end] = [block.end] * (block.end - block.start - 1)
+        for address in self.region_addresses(region):
+            if self.regions_by_address[address] is None:
+                self.regions_by_address[address] = set()
+            self.regions_by_address[address].add(region)
+
+        return region
+
+    def invalidate(self, address, number_bytes):
+        """ Drop the compiled regions overlapping the written memory range. """
+
+        if number_bytes == self.memory.size:
+            # whole memory replaced (snapshot restored)
+            self.regions.clear()
+            self.regions_by_address = [None] * self.memory.size
+            self.block_ends = [0] * self.memory.size
+            return
+
+        for written_address in range(address, address + number_bytes):
+            regions = self.regions_by_address[written_address]
+            if regions:
+                for region in list(regions):
+                    self.remove_region(region)
+
+    def remove_region(self, region):
+        for block in region.blocks:
+            if self.regions.get(block.start) is region:
+                del self.regions[block.start]
+            self.block_ends[block.start + 1:block.end] = [0] * (block.end - block.start - 1)
+        for address in self.region_addresses(region):
+            self.regions_by_address[address].discard(region)
+
+    def region_addresses(self, region):
+        """ Return the addresses the region was compiled from, up to the instruction following each block. """
+
+        addresses = set()
+        for block in region.blocks:
+            addresses.update(range(block.start, min(block.end + 2, self.memory.size)))
+        return addresses
+
+class RegionTranslator:
+    """ Generate the Python source of a region and compile it. """
+
+    # instructions ending a block after being executed by their handler
+    BLOCK_ENDING_HANDLERS = {0x00EE, 0x2000, 0x5002, 0xB000, 0xE09E, 0xE0A1, 0xF000, 0xF00A, 0xF033, 0xF055}
+    # handlers writing into memory, the region is left after them as its code may have been dropped
+    MEMORY_WRITING_HANDLERS = {0x5002, 0xF033, 0xF055}
+    # handlers changing none of the V registers, the others reload the registers they may change
+    HANDLERS_KEEPING_REGISTERS = {0x2000, 0x5002, 0xB000, 0xE09E, 0xE0A1, 0xF000, 0xF001, 0xF002, 0xF018, 0xF030, 0xF033, 0xF03A, 0xF055}
+
+    def __init__(self, cpu: Cpu, start, max_block_instructions, max_region_blocks, hits):
+        self.cpu = cpu
+        self.memory = cpu.memory
+        self.start = start
+        self.max_block_instructions = max_block_instructions
+        self.max_region_blocks = max_region_blocks
+        self.hits = hits
+
+        self.lines = []
+        self.namespace = { 'cpu': cpu, 'V': cpu.V }
+
+        # registers held in local variables and the ones changed since last stored
+        self.registers = set()
+        self.dirty_registers = set()
+        self.uses_I = False
+        self.dirty_I = False
+
+    def translate(self):
+        blocks_instructions = self.fetch_region_instructions()
+        if len(blocks_instructions) == 0:
+            raise Exception(f'No instruction to compile at {hex(self.start)}')
+
+        for instructions in blocks_instructions:
+            self.collect_registers(instructions)
+
+        self.emit_load_registers()
+        branches = [self.emit_block(instructions) for instructions in blocks_instructions]
+        self.lines.append('while True:')
+        self.emit_dispatch(sorted(branches, key=lambda branch: branch[0].start), '    ')
+        self.lines.append('cpu.PC = pc')
+        self.lines.append('return budget - remaining')
+
+        name = f'region_{self.start:03X}'
+        source = f'def {name}(pc, budget):\n    remaining = budget\n' + '\n'.join('    ' + line for line in self.lines) + '\n'
+        exec(compile(source, f'<region {hex(self.start)}>', 'exec'), self.namespace)
+
+        return CompiledRegion(self.start, [block for block, _ in branches], self.namespace[name], source)
+
+    def fetch_region_instructions(self):
+        """ Return the instructions of the blocks of the region, the first one starting the region. """
+
+        blocks_instructions = []
+        starts = [self.start]
+        while len(starts) > len(blocks_instructions) and len(blocks_instructions) < self.max_region_blocks:
+            instructions = self.fetch_block_instructions(starts[len(blocks_instructions)])
+            if len(instructions) == 0:
+                break
+            blocks_instructions.append(instructions)
+
+            for successor in self.block_successors(instructions):
+                # only the code already executed is added, the rest may never be
+                if successor not in starts and successor + 1 < self.memory.size and self.hits[successor] > 0:
+                    starts.append(successor)
+
+        return blocks_instructions
+
+    def fetch_block_instructions(self, start):
+        instructions = []
+        address = start
+
+        while address + 1 < self.memory.size and len(instructions) < self.max_block_instructions:
+            opcode = self.memory.read_16bit(address)
+            instructions.append((address, opcode))
+            if self.is_block_end(opcode):
+                break
+            address += 2
+
+        return instructions
+
+    def block_successors(self, instructions):
+        """ Return the addresses the block may continue to known before executing it. """
+
+        address, opcode = instructions[-1]
+        next_address = address + 2
+        family = opcode & 0xF000
+        pattern = self.handler_pattern(opcode)
+
+        if not self.is_block_end(opcode):
+            return [next_address]
+        if family in (0x1000, 0x2000):
+            return [opcode & 0xFFF]
+        if family in (0x3000, 0x4000, 0x5000, 0x9000) and pattern not in RegionTranslator.MEMORY_WRITING_HANDLERS:
+            return [next_address, self.skipped_address(next_address)]
+        if pattern in (0xE09E, 0xE0A1, 0xF000):
+            return [next_address, next_address + 2]
+        if pattern == 0xF00A:
+            return [next_address]
+        return []
+
+    def is_block_end(self, opcode):
+        family = opcode & 0xF000
+        if family in (0x1000, 0x2000, 0x3000, 0x4000, 0xB000):
+            return True
+        if family in (0x5000, 0x9000) and opcode & 0xF == 0:
+            return True
+        return self.handler_pattern(opcode) in RegionTranslator.BLOCK_ENDING_HANDLERS
+
+    def handler_pattern(self, opcode):
+        family = opcode & 0xF000
+        if family == 0x0000:
+            return opcode
+        if family == 0x5000:
+            return opcode & 0xF00F
+        if family in (0xE000, 0xF000):
+            return opcode & 0xF0FF
+        return family
+
+    def collect_registers(self, instructions):
+        for _, opcode in instructions:
+            family = opcode & 0xF000
+            x = (opcode & 0x0F00) >> 8
+            y = (opcode & 0x00F0) >> 4
+
+            if family in (0x3000, 0x4000, 0x6000, 0x7000):
+                self.registers.add(x)
+            elif family in (0x5000, 0x9000):
+                self.registers.update((x, y))
+            elif family == 0x8000:
+                self.registers.update((x, y, 0xF))
+            elif family == 0xA000:
+                self.uses_I = True
+            elif opcode & 0xF0FF in (0xF007, 0xF015):
+                self.registers.add(x)
+            elif opcode & 0xF0FF in (0xF01E, 0xF029):
+                self.registers.add(x)
+                self.uses_I = True
+
+    def emit_block(self, instructions):
+        """ Emit the code executing one block, returning the block and its lines. """
+
+        start = instructions[0][0]
+        number_instructions = len(instructions)
+
+        region_lines = self.lines
+        self.lines = [
+            f'if remaining < {number_instructions}:',
+            '    break',
+            f'remaining -= {number_instructions}',
+        ]
+
+        ended = False
+        for address, opcode in instructions:
+            self.lines.append(f'# {hex(address)}: {opcode:04X}')
+            ended = self.emit_instruction(address, opcode)
+
+        end = instructions[-1][0] + 2
+        if not ended:
+            self.emit_store_registers()
+            self.emit_goto(hex(end))
+
+        block_lines, self.lines = self.lines, region_lines
+        return CompiledBlock(start, end, number_instructions), block_lines
+
+    def emit_dispatch(self, branches, indent):
+        """ Emit the branches of the blocks sorted by address as a binary search on PC. """
+
+        if len(branches) > 3:
+            middle = len(branches) // 2
+            self.lines.append(f'{indent}if pc < {hex(branches[middle][0].start)}:')
+            self.emit_dispatch(branches[:middle], indent + '    ')
+            self.lines.append(f'{indent}else:')
+            self.emit_dispatch(branches[middle:], indent + '    ')
+            return
+
+        for index, (block, block_lines) in enumerate(branches):
+            self.lines.append(f'{indent}{"if" if index == 0 else "elif"} pc == {hex(block.start)}:')
+            self.lines.extend(indent + '    ' + line for line in block_lines)
+        self.lines.append(f'{indent}else:')
+        self.lines.append(f'{indent}    break')
+
+    def V(self, register):
+        self.dirty_registers.add(register)
+        return f'v{register:X}'
+
+    def emit_load_registers(self):
+        for register in sorted(self.registers):
+            self.lines.append(f'v{register:X} = V[{register}]')
+        if self.uses_I:
+            self.lines.append('i = cpu.I')
+
+    def emit_store_registers(self):
+        for register in sorted(self.dirty_registers):
+            self.lines.append(f'V[{register}] = v{register:X}')
+        if self.dirty_I:
+            self.lines.append('cpu.I = i')
+
+        self.dirty_registers = set()
+        self.dirty_I = False
+
+    def emit_goto(self, pc):
+        self.lines.append(f'pc = {pc}')
+
+    def emit_skip(self, next_address, condition):
+        # the skipped instruction is read now, the region is dropped if it is written
+        self.emit_store_registers()
+        self.emit_goto(f'{hex(self.skipped_address(next_address))} if {condition} else {hex(next_address)}')
+
+    def skipped_address(self, next_address):
+        return next_address + 4 if self.is_long_load(next_address) else next_address + 2
+
+    def is_long_load(self, address):
+        """ Return `True` if the instruction at the given address is F000 NNNN (4 bytes long, XO-CHIP). """
+        return self.cpu.quirks.long_load and address + 1 < self.memory.size and self.memory.read_16bit(address) == 0xF000
+
+    def emit_instruction(self, address, opcode):
+        """ Emit the code of one instruction, returning `True` if it ends the block. """
+
+        family = opcode & 0xF000
+        x = (opcode & 0x0F00) >> 8
+        y = (opcode & 0x00F0) >> 4
+        k = opcode & 0xF
+        kk = opcode & 0xFF
+        nnn = opcode & 0xFFF
+        next_address = address + 2
+
+        if family == 0x1000:
+            self.emit_store_registers()
+            self.emit_goto(hex(nnn))
+            return True
+        if family == 0x3000:
+            self.emit_skip(next_address, f'v{x:X} == {hex(kk)}')
+            return True
+        if family == 0x4000:
+            self.emit_skip(next_address, f'v{x:X} != {hex(kk)}')
+            return True
+        if family == 0x5000 and k == 0:
+            self.emit_skip(next_address, f'v{x:X} == v{y:X}')
+            return True
+        if family == 0x9000 and k == 0:
+            self.emit_skip(next_address, f'v{x:X} != v{y:X}')
+            return True
+        if family == 0x6000:
+            self.lines.append(f'{self.V(x)} = {hex(kk)}')
+            return False
+        if family == 0x7000:
+            self.lines.append(f'{self.V(x)} = (v{x:X} + {hex(kk)}) & 0xFF')
+            return False
+        if family == 0x8000 and self.emit_arithmetic(x, y, k):
+            return False
+        if family == 0xA000:
+            self.uses_I = self.dirty_I = True
+            self.lines.append(f'i = {hex(nnn)}')
+            return False
+        if opcode & 0xF0FF == 0xF007:
+            self.lines.append(f'{self.V(x)} = cpu.DT')
+            return False
+        if opcode & 0xF0FF == 0xF015:
+            self.lines.append(f'cpu.DT = v{x:X}')
+            return False
+        if opcode & 0xF0FF == 0xF01E:
+            self.dirty_I = True
+            self.lines.append(f'i = (i + v{x:X}) & 0xFFFF')
+            return False
+        if opcode & 0xF0FF == 0xF029:
+            self.dirty_I = True
+            self.lines.append(f'i = v{x:X} * 0x5')
+            return False
+
+        return self.emit_handler_call(address, opcode)
+
+    def emit_arithmetic(self, x, y, k):
+        """ Emit the inline code of 8XYK instructions, returning `False` for unknown ones. """
+
+        quirks = self.cpu.quirks
+        vx, vy = f'v{x:X}', f'v{y:X}'
+        # the quirks are applied while generating the code, as for the dispatch table
+        reset_vf = ['vF = 0'] if quirks.vf_reset else []
+        shifted = vy if quirks.shift_vy else vx
+        lines = {
+            0x0: [f'{vx} = {vy}'],
+            0x1: [f'{vx} = {vx} | {vy}', *reset_vf],
+            0x2: [f'{vx} = {vx} & {vy}', *reset_vf],
+            0x3: [f'{vx} = {vx} ^ {vy}', *reset_vf],
+            0x4: [f'result = {vx} + {vy}', f'{vx} = result & 0xFF', 'vF = 1 if result > 0xFF else 0'],
+            0x5: [f'x_value, y_value = {vx}, {vy}', f'{vx} = (x_value - y_value) & 0xFF', 'vF = 1 if x_value > y_value else 0'],
+            0x6: [f'shifted_value = {shifted}', f'{vx} = shifted_value >> 1', 'vF = shifted_value & 0b1'],
+            0x7: [f'x_value, y_value = {vx}, {vy}', f'{vx} = (y_value - x_value) & 0xFF', 'vF = 1 if y_value > x_value else 0'],
+            0xE: [f'shifted_value = {shifted}', f'{vx} = (shifted_value << 1) & 0xFF', 'vF = shifted_value >> 7'],
+        }.get(k)
+
+        if lines is None:
+            return False
+
+        self.dirty_registers.update((x, 0xF))
+        self.lines.extend(lines)
+        return True
+
+    def emit_handler_call(self, address, opcode):
+        """ Emit a call to the handler of the dispatch table, returning `True` if it ends the block. """
+
+        handler = self.cpu.decode_opcode(opcode)
+        if handler is None:
+            # empty memory or unknown opcode do nothing
+            return False
+
+        handler_name = f'handler_{address:03X}'
+        self.namespace[handler_name] = handler
+
+        # the handler works on the registers of the cpu
+        self.emit_store_registers()
+
+        pattern = self.handler_pattern(opcode)
+        if pattern in RegionTranslator.BLOCK_ENDING_HANDLERS:
+            # handlers ending the block may read or change PC, which they expect to be already stepped
+            self.lines.append(f'cpu.PC = {hex(address + 2)}')
+            self.lines.append(f'{handler_name}()')
+            if pattern in RegionTranslator.MEMORY_WRITING_HANDLERS:
+                self.lines.append('return budget - remaining')
+            else:
+                self.emit_goto('cpu.PC')
+                self.emit_reload_registers(opcode)
+            return True
+
+        self.lines.append(f'{handler_name}()')
+        self.emit_reload_registers(opcode)
+        return False
+
+    def emit_reload_registers(self, opcode):
+        """ Load again the registers the handler of the instruction may have changed. """
+
+        for register in sorted(self.registers.intersection(self.handler_written_registers(opcode))):
+            self.lines.append(f'v{register:X} = V[{register}]')
+        if self.uses_I:
+            self.lines.append('i = cpu.I')
+
+    def handler_written_registers(self, opcode):
+        """ Return the V registers the handler of the instruction may change. """
+
+        pattern = self.handler_pattern(opcode)
+        x = (opcode & 0x0F00) >> 8
+        y = (opcode & 0x00F0) >> 4
+
+        if pattern in (0xC000, 0xF00A):
+            return [x]
+        if pattern == 0xD000:
+            return [0xF]
+        if pattern == 0x5003:
+            return range(min(x, y), max(x, y) + 1)
+        if pattern == 0xF065:
+            return range(x + 1)
+        if opcode & 0xF000 == 0x0000 or pattern in RegionTranslator.HANDLERS_KEEPING_REGISTERS:
+            return []
+        return range(0x10)
@@ -0,0 +1,120 @@
+import zlib
+
+from Cpu import Cpu
+
+class RewindBuffer:
+    """ Bounded history of the machine state, captured once per frame.
+
+    The states are the `Cpu.snapshot` blobs. Every `keyframe_interval` frames the whole
+    snapshot is stored as a keyframe, the frames in between only store the XOR of their
+    snapshot with the last keyframe. The memory and registers change little from frame to
+    frame, so the deltas are mostly zeros and compress to a few bytes with zlib. The memory
+    snapshot only holds the used pages, a frame whose snapshot size changed starts a new
+    keyframe.
+
+    The frames are kept in groups (one keyframe and its deltas); when the compressed size
+    (`memory_used`) goes over `max_bytes` the oldest groups are dropped.
+    """
+
+    KEYFRAME_INTERVAL = 60 # one second of 60Hz frames
+    MAX_BYTES = 4 * 1024 * 1024
+    COMPRESSION_LEVEL = 1
+
+    def __init__(self, cpu: Cpu, keyframe_interval=KEYFRAME_INTERVAL, max_bytes=MAX_BYTES,
+                 compression_level=COMPRESSION_LEVEL):
+        if keyframe_interval < 1:
+            raise Exception('Invalid keyframe interval')
+
+        self.cpu = cpu
+        self.keyframe_interval = keyframe_interval
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+
+        self.clear()
+
+    def clear(self):
+        # groups of compressed frames, the first one of each group is the keyframe
+        self.groups = []
+        # the keyframe of the newest group, as a big integer to XOR the deltas without a loop over the bytes
+        self.keyframe_value = 0
+        self.keyframe_size = 0
+        self.number_frames = 0
+        self.memory_used = 0
+
+    def __len__(self):
+        return self.number_frames
+
+    def capture(self):
+        """ Store the current state as the newest frame. """
+
+        snapshot = self.cpu.snapshot()
+
+        if not self.groups or len(self.groups[-1]) >= self.keyframe_interval or len(snapshot) != self.keyframe_size:
+            self.keyframe_value = int.from_bytes(snapshot, 'big')
+            self.keyframe_size = len(snapshot)
+            self.groups.append([])
+            data = snapshot
+        else:
+            data = (int.from_bytes(snapshot, 'big') ^ self.keyframe_value).to_bytes(len(snapshot), 'big')
+
+        frame = zlib.compress(data, self.compression_level)
+        self.groups[-1].append(frame)
+        self.number_frames += 1
+        self.memory_used += len(frame)
+
+        self.enforce_limit()
+
+    def enforce_limit(self):
+        """ Drop the oldest groups while over `max_bytes`, keeping at least the current one. """
+
+        while self.memory_used > self.max_bytes and len(self.groups) > 1:
+            group = self.groups.pop(0)
+            self.number_frames -= len(group)
+            self.memory_used -= sum(len(frame) for frame in group)
+
+    def rewind(self, number_frames=1) -> int:
+        """ Restore the state captured `number_frames` frames before the newest one.
+
+        The frames after the restored one are dropped, so the next `capture` continues the
+        history from there. Returns the number of frames rewound, which is less than asked
+        when the history is shorter.
+        """
+
+        if self.number_frames == 0:
+            return 0
+
+        number_frames = min(number_frames, self.number_frames - 1)
+        for _ in range(number_frames):
+            self.drop_newest_frame()
+
+        group = self.groups[-1]
+        keyframe = zlib.decompress(group[0])
+        self.keyframe_value = int.from_bytes(keyframe, 'big')
+        self.keyframe_size = len(keyframe)
+
+        if len(group) == 1:
+            snapshot = keyframe
+        else:
+            delta = zlib.decompress(group[-1])
+            snapshot = (int.from_bytes(delta, 'big') ^ self.keyframe_value).to_bytes(len(delta), 'big')
+
+        self.cpu.restore(snapshot)
+        return number_frames
+
+    def drop_newest_frame(self):
+        group = self.groups[-1]
+        frame = group.pop()
+        self.number_frames -= 1
+        self.memory_used -= len(frame)
+        if not group:
+            self.groups.pop()
+
+    def stats(self) -> dict:
+        """ Return the number of frames and keyframes held and the bytes they use. """
+
+        return {
+            'frames': self.number_frames,
+            'keyframes': len(self.groups),
+            'memory_used': self.memory_used,
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,38 @@
+from Cpu import Cpu
+from Memory import Memory
+
+# 0x200 to 0xE9F included
+MAX_ROM_SIZE = Cpu.MEMORY_PROGRAM_CODE_AREA_END_ADDRESS - Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS + 1
+
+def max_rom_size(memory: Memory):
+    """ Return the size of the program area, up to 0xFE9F in the 64 KB memory of XO-CHIP. """
+    return MAX_ROM_SIZE + memory.size - Memory.MEMORY_SIZE
+
+def read_rom_file(file) -> bytes:
+    with open(file, 'rb') as f:
+        return f.read()
+
+def load_rom_file_into_memory(filename: str, memory: Memory, verbose=True):
+    load_rom_bytes_into_memory(read_rom_file(filename), memory, verbose)
+
+def load_rom_bytes_into_memory(rom: bytes, memory: Memory, verbose=False):
+    """ Copy the ROM into the program area in one write, the ROM can have an odd length. """
+
+    max_size = max_rom_size(memory)
+    if len(rom) > max_size:
+        raise Exception(f'ROM too big: {len(rom)} bytes, the program area holds {max_size} bytes')
+
+    addr = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+    memory.write_range(addr, rom)
+
+    if verbose:
+        print('\n=== Reading Rom ===')
+        for offset in range(0, len(rom), 2):
+            print(f'\t{hex(addr + offset)} === {rom[offset:(offset + 2)].hex()}')
+        print(f'=== Finished: {len(rom)} bytes ===\n')
+
+def load_rom_into_memory(rom_data: str, memory: Memory, verbose=True):
+    """ Load a ROM written as hexadecimal text, one opcode per line. """
+
+    rom = bytes.fromhex(''.join(line.strip() for line in rom_data.split('\n')))
+    load_rom_bytes_into_memory(rom, memory, verbose)
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+
+from Cpu import Cpu
+from Scheduler import Scheduler
+
+class RomLibrary:
+    """ Index of the ROMs of a directory with the settings to run each of them.
+
+    Every ROM is described by its size, SHA-1, detected platform, quirk profile and
+    recommended instructions per frame. The descriptions are cached in a JSON index file
+    in the directory, so looking a ROM up at startup is one stat of the ROM, it is only
+    read and hashed again when its modification time or size changed. When the index
+    can't be written (a read-only directory) the ROMs are described again every time.
+    """
+
+    INDEX_FILENAME = '.index.json'
+    INDEX_VERSION = 1
+
+    # quirk profile and instructions per frame of each platform
+    PLATFORMS = {
+        'chip8': { 'quirks': 'cosmac_vip', 'instructions_per_frame': Scheduler.INSTRUCTIONS_PER_FRAME },
+        'schip': { 'quirks': 'superchip', 'instructions_per_frame': 30 },
+        'xochip': { 'quirks': 'xochip', 'instructions_per_frame': 1000 },
+    }
+
+    def __init__(self, directory='roms', index_filename=None):
+        self.directory = directory
+        self.index_filename = index_filename or os.path.join(directory, RomLibrary.INDEX_FILENAME)
+        self.entries = self.load_index()
+
+    def load_index(self):
+        try:
+            with open(self.index_filename) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(index, dict) or index.get('version') != RomLibrary.INDEX_VERSION:
+            return {}
+        return index.get('roms', {})
+
+    def save(self):
+        """ Write the index file, which is only a cache: it is not written when the directory is read-only. """
+
+        index = { 'version': RomLibrary.INDEX_VERSION, 'roms': self.entries }
+        # written aside and renamed so a crash never leaves a truncated index
+        temporary_filename = self.index_filename + '.tmp'
+        try:
+            with open(temporary_filename, 'w') as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            os.replace(temporary_filename, self.index_filename)
+        except OSError:
+            pass
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def names(self):
+        """ Return the names of the ROM files of the directory (hidden files are skipped). """
+
+        return sorted(name for name in os.listdir(self.directory)
+                      if not name.startswith('.') and os.path.isfile(self.path(name)))
+
+    def get(self, name, save=True):
+        """ Return the description of the ROM, indexing it first when it is new or changed. """
+
+        stat = os.stat(self.path(name))
+        entry = self.entries.get(name)
+        if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry
+
+        with open(self.path(name), 'rb') as f:
+            entry = RomLibrary.describe(f.read())
+        entry['mtime_ns'] = stat.st_mtime_ns
+        self.entries[name] = entry
+        if save:
+            self.save()
+        return entry
+
+    def refresh(self):
+        """ Index every ROM of the directory, dropping the removed ones, and save the index if it changed.
+
+        The ROMs that can't be read are left out of the index.
+        """
+
+        entries = dict(self.entries)
+        indexed = []
+        for name in self.names():
+            try:
+                self.get(name, save=False)
+            except OSError:
+                continue
+            indexed.append(name)
+        self.entries = { name: self.entries[name] for name in indexed }
+
+        if self.entries != entries:
+            self.save()
+        return self.entries
+
+    def find_by_hash(self, sha1):
+        """ Return the name of the indexed ROM with the given SHA-1 (hexadecimal), `None` if there is none. """
+
+        for name, entry in self.entries.items():
+            if entry['sha1'] == sha1:
+                return name
+        return None
+
+    @staticmethod
+    def describe(rom: bytes):
+        platform = RomLibrary.detect_platform(rom)
+        return {
+            'size': len(rom),
+            'sha1': hashlib.sha1(rom).hexdigest(),
+            'platform': platform,
+            **RomLibrary.PLATFORMS[platform],
+        }
+
+    @staticmethod
+    def detect_platform(rom: bytes):
+        """ Return `xochip`, `schip` or `chip8` from the opcodes reachable from the entry point.
+
+        Only the instructions reached by following the jumps, calls and skips are checked,
+        the sprites and other data of the ROM would be read as extension opcodes otherwise.
+        """
+
+        if len(rom) > Cpu.MEMORY_PROGRAM_CODE_AREA_END_ADDRESS - Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS + 1:
+            return 'xochip'
+
+        platform = 'chip8'
+        for opcode in RomLibrary.reachable_opcodes(rom):
+            if opcode == 0xF000 or opcode == 0xF002 or opcode & 0xF00F in (0x5002, 0x5003) \
+                    or opcode & 0xF0FF in (0xF001, 0xF03A):
+                return 'xochip'
+            if opcode in (0x00FB, 0x00FC, 0x00FD, 0x00FE, 0x00FF) or opcode & 0xFFF0 == 0x00C0 \
+                    or opcode & 0xF00F == 0xD000 or opcode & 0xF0FF in (0xF030, 0xF075, 0xF085):
+                platform = 'schip'
+        return platform
+
+    @staticmethod
+    def reachable_opcodes(rom: bytes):
+        """ Return the opcodes reachable from the entry point of the ROM. """
+
+        start = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+        end = start + len(rom) - 1
+        visited = set()
+        pending = [start]
+        while pending:
+            address = pending.pop()
+            while start <= address < end and address not in visited:
+                visited.add(address)
+                opcode = int.from_bytes(rom[(address - start):(address - start + 2)], 'big')
+                kind = opcode >> 12
+
+                # return, exit and computed jump: the next address is unknown
+                if opcode in (0x00EE, 0x00FD) or kind == 0xB:
+                    break
+                if kind == 0x1:
+                    address = opcode & 0x0FFF
+                    continue
+                if kind == 0x2:
+                    pending.append(opcode & 0x0FFF)
+                if kind in (0x3, 0x4, 0x5, 0x9) or opcode & 0xF0FF in (0xE09E, 0xE0A1):
+                    # a skip steps over the 4 bytes of a long load
+                    skipped = rom[(address + 2 - start):(address + 4 - start)]
+                    pending.append(address + (6 if skipped == b'\xf0\x00' else 4))
+                # XO-CHIP long load, followed by its 16-bit address
+                address += 4 if opcode == 0xF000 else 2
+
+        return [int.from_bytes(rom[(address - start):(address - start + 2)], 'big') for address in sorted(visited)]
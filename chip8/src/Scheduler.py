@@ -0,0 +1,136 @@
+import time
+
+from Cpu import Cpu
+from Display import Display
+
+class TimerClock:
+    """ Monotonic clock counting the 60Hz timer ticks elapsed since it started.
+
+    The ticks are derived from the start time, so they don't drift however late the
+    clock is read.
+    """
+
+    def __init__(self, rate=Cpu.TIMERS_CLOCK_SPEED):
+        self.rate = rate
+        self.start = time.monotonic()
+        self.ticks = 0
+
+    def elapsed_ticks(self):
+        """ Return the number of ticks elapsed since the last call. """
+
+        ticks = int((time.monotonic() - self.start) * self.rate)
+        elapsed = ticks - self.ticks
+        self.ticks = ticks
+        return elapsed
+
+    def time_to_next_tick(self):
+        return max(self.start + (self.ticks + 1) / self.rate - time.monotonic(), 0)
+
+class Scheduler:
+    """ Fixed-timestep scheduler running the machine in 60Hz frames.
+
+    Each frame executes `instructions_per_frame` instructions, ticks the timers once and
+    renders the screen once, so the CPU speed is `instructions_per_frame * 60` Hz. The frames
+    are the virtual clock of the timers, which behave the same in realtime and headless mode.
+
+    Frames are paced with a monotonic clock: the deadline of the next frame is advanced by
+    exactly one frame duration, so the time overslept in one frame is recovered in the next
+    ones. When the host falls behind by more than `MAX_LAG_FRAMES` the schedule is reset
+    instead of running the missed frames in a burst. The missed frames are dropped with
+    their timer ticks, the frames stay the only clock of the timers so a session runs (and
+    replays from a movie) the same in realtime and headless mode.
+
+    While the CPU waits for a key (FX0A) the frames don't execute instructions, the timers
+    still tick and the screen is rendered, and the thread sleeps between them. When a frame
+    starts in an idle loop (see `IdleLoop`) its instructions are fast-forwarded.
+    """
+
+    FRAME_RATE = Cpu.TIMERS_CLOCK_SPEED # 60Hz
+    FRAME_DURATION = 1 / FRAME_RATE
+    INSTRUCTIONS_PER_FRAME = Cpu.CLOCK_SPEED // FRAME_RATE
+    MAX_LAG_FRAMES = 5
+
+    def __init__(self, cpu: Cpu, display: Display, instructions_per_frame=INSTRUCTIONS_PER_FRAME,
+                 engine=None, handle_events=None, realtime=True, after_frame=None, skip_idle_loops=True):
+        """ Create the scheduler.
+
+        - `engine`: callable `engine(number_instructions)` executing instructions, by default
+          the CPU interpreter (a `Recompiler.run` can be used instead)
+        - `handle_events`: callable invoked at the start of each frame to process input
+        - `realtime`: sleep between frames to run at 60Hz, otherwise run as fast as possible
+        - `after_frame`: callable invoked at the end of each frame (like `RewindBuffer.capture`)
+        - `skip_idle_loops`: fast-forward the frames starting in an idle loop
+        """
+        if instructions_per_frame < 1:
+            raise Exception('Invalid number of instructions per frame')
+
+        self.cpu = cpu
+        self.display = display
+        self.instructions_per_frame = instructions_per_frame
+        self.engine = engine if engine is not None else self.interpret
+        self.handle_events = handle_events
+        self.realtime = realtime
+        self.after_frame = after_frame
+        self.skip_idle_loops = skip_idle_loops
+
+        self.frames = 0
+        self.instructions_executed = 0
+        self.running = False
+
+    def interpret(self, number_instructions):
+        execute_cpu_cycle = self.cpu.execute_cpu_cycle
+        for _ in range(number_instructions):
+            execute_cpu_cycle()
+        return number_instructions
+
+    def run_frame(self):
+        """ Execute one frame: input, instructions, timers and render. """
+
+        if self.handle_events is not None:
+            self.handle_events()
+
+        cpu = self.cpu
+        # waiting for a key the instructions would only execute FX0A again
+        if not cpu.is_waiting_key():
+            executed = 0
+            if self.skip_idle_loops:
+                loop = cpu.find_idle_loop()
+                if loop:
+                    executed = cpu.fast_forward_idle_loop(loop, self.instructions_per_frame)
+            if executed < self.instructions_per_frame:
+                executed += self.engine(self.instructions_per_frame - executed)
+            self.instructions_executed += executed
+        cpu.tick_timers()
+        self.display.render()
+
+        if self.after_frame is not None:
+            self.after_frame()
+
+        self.frames += 1
+
+    def run(self, max_frames=None):
+        """ Run frames until `stop` is called or `max_frames` were executed. """
+
+        self.running = True
+        next_frame_time = time.monotonic()
+        frames = 0
+
+        while self.running and (max_frames is None or frames < max_frames):
+            self.run_frame()
+            frames += 1
+
+            if not self.realtime:
+                continue
+
+            next_frame_time += Scheduler.FRAME_DURATION
+            delay = next_frame_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay > Scheduler.MAX_LAG_FRAMES * Scheduler.FRAME_DURATION:
+                # too far behind, drop the missed frames (the timers only tick in frames)
+                next_frame_time = time.monotonic()
+
+        self.running = False
+
+    def stop(self):
+        self.running = False
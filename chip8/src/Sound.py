@@ -1,24 +1,88 @@
 import numpy as np
 import pygame
 
+# XO-CHIP audio: a 128-bit pattern played at 4000 * 2 ** ((pitch - 64) / 48) bits per second
+AUDIO_PATTERN_SIZE = 16
+DEFAULT_PITCH = 64
+# square wave of 8 bits period (500Hz at the default pitch)
+DEFAULT_AUDIO_PATTERN = bytes([0xF0] * AUDIO_PATTERN_SIZE)
+
 class Sound:
-    def __init__(self, mocked=False):
+    """ Tone generator gated by the sound timer.
+
+    The tone is rendered from the audio pattern and pitch into a buffer looped forever on
+    a reserved mixer channel, the gate only changes the channel volume so the waveform stays
+    continuous and there is no channel churn. The latency of the gate is the mixer buffer
+    (512 samples, about 12ms).
+    """
+
+    SAMPLE_RATE = 44100
+    AMPLITUDE = 8000
+    # approximate duration of the looped buffer, rounded to whole patterns
+    LOOP_DURATION = 0.25
+
+    def __init__(self, mocked=False, headless=False):
         # initilize 16-bit mono sound
         self.mocked = mocked
-        if not mocked:
-            pygame.mixer.init(frequency=44100, size=-16, channels=1, buffer=512)
-            self.buzz = self.generate_beep()
-
-    def generate_beep(self, frequency=440, duration=0.2, sample_rate=44100):
-        t = np.linspace(0, duration, int(sample_rate * duration), False)
-        wave = 0.5 * np.sin(2 * np.pi * frequency * t)
-        wave = (wave * 32767).astype(np.int16)  # Convert to 16-bit PCM format
-        sound = pygame.sndarray.make_sound(wave)
-        return sound
-
-    def play(self):
-        if self.mocked:
-            print('Beeping')
-        else:
-            self.buzz.play()
+        self.headless = headless
+
+        self.pattern = DEFAULT_AUDIO_PATTERN
+        self.pitch = DEFAULT_PITCH
+        self.playing = False
+
+        self.channel = None
+        if not mocked and not headless:
+            pygame.mixer.init(frequency=Sound.SAMPLE_RATE, size=-16, channels=1, buffer=512)
+            pygame.mixer.set_reserved(1)
+            self.channel = pygame.mixer.Channel(0)
+            self.channel.set_volume(0)
+            self.start_tone()
+
+    @staticmethod
+    def pattern_rate(pitch):
+        """ Return the number of pattern bits played per second at the given pitch. """
+        return 4000 * 2 ** ((pitch - 64) / 48)
+
+    @staticmethod
+    def render_pattern(pattern: bytes, pitch, sample_rate=SAMPLE_RATE, duration=LOOP_DURATION) -> np.ndarray:
+        """ Return the 16-bit samples of the pattern repeated for about `duration` seconds.
 
+        The buffer holds whole patterns so it can be looped keeping the phase.
+        """
+
+        bits = np.unpackbits(np.frombuffer(pattern, dtype=np.uint8))
+        rate = Sound.pattern_rate(pitch)
+        repeats = max(round(duration * rate / len(bits)), 1)
+        number_samples = round(repeats * len(bits) * sample_rate / rate)
+
+        positions = (np.arange(number_samples) * (rate / sample_rate)).astype(np.int64) % len(bits)
+        return np.where(bits[positions], Sound.AMPLITUDE, -Sound.AMPLITUDE).astype(np.int16)
+
+    def start_tone(self):
+        tone = pygame.sndarray.make_sound(Sound.render_pattern(self.pattern, self.pitch))
+        self.channel.play(tone, loops=-1)
+
+    def set_pattern(self, pattern: bytes):
+        pattern = bytes(pattern)
+        if pattern != self.pattern:
+            self.pattern = pattern
+            if self.channel is not None:
+                self.start_tone()
+
+    def set_pitch(self, pitch):
+        if pitch != self.pitch:
+            self.pitch = pitch
+            if self.channel is not None:
+                self.start_tone()
+
+    def gate(self, playing):
+        """ Turn the tone on or off (the sound timer is running or not). """
+
+        if playing == self.playing:
+            return
+        self.playing = playing
+
+        if self.channel is not None:
+            self.channel.set_volume(1 if playing else 0)
+        elif self.mocked and playing:
+            print('Beeping')
@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+# keep the pygame banner out of the JSON Lines written to stdout
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from Emulator import Emulator
+from Quirks import PROFILES
+from RomLibrary import RomLibrary
+from Scheduler import Scheduler
+
+def parse_seeds(values):
+    """ Parse seeds given as numbers (`7`) or ranges (`0:100`, end exclusive). """
+
+    seeds = []
+    for value in values:
+        if ':' in value:
+            start, end = value.split(':')
+            seeds.extend(range(int(start), int(end)))
+        else:
+            seeds.append(int(value))
+    return seeds
+
+def list_roms(paths):
+    """ Expand the directories in `paths` into the files they contain (hidden files, like the rom index, are skipped). """
+
+    roms = []
+    for path in paths:
+        if os.path.isdir(path):
+            roms.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                               if not name.startswith('.') and os.path.isfile(os.path.join(path, name))))
+        else:
+            roms.append(path)
+    return roms
+
+def index_roms(roms):
+    """ Index the directory of each ROM once (see `RomLibrary`), so the jobs find their ROM in the saved index.
+
+    A directory that can't be read is skipped, the jobs of its ROMs report the error.
+    """
+
+    for directory in sorted({ os.path.dirname(rom) or '.' for rom in roms }):
+        try:
+            RomLibrary(directory).refresh()
+        except OSError:
+            pass
+
+# ROM libraries and emulators of the process, reused by the jobs it runs
+worker_libraries = {}
+worker_emulators = {}
+
+def find_rom_settings(rom):
+    """ Return the description of the ROM from the index of its directory, without saving the index. """
+
+    directory = os.path.dirname(rom) or '.'
+    library = worker_libraries.get(directory)
+    if library is None:
+        library = worker_libraries[directory] = RomLibrary(directory)
+    return library.get(os.path.basename(rom), save=False)
+
+def get_emulator(engine, instructions_per_frame, quirks):
+    """ Return the emulator of the process for the configuration, reset to its power-on state. """
+
+    key = (engine, instructions_per_frame, quirks)
+    emulator = worker_emulators.get(key)
+    if emulator is None:
+        emulator = worker_emulators[key] = Emulator(headless=True, engine=engine, instructions_per_frame=instructions_per_frame,
+                                                    quirks=quirks)
+    else:
+        emulator.reset()
+    return emulator
+
+def run_job(job):
+    """ Run one ROM with one seed in a headless emulator, returning the result record.
+
+    `job` is a dict with `rom`, `seed`, `engine`, the optional `instructions_per_frame` and
+    `quirks` profile (from the ROM index when missing) and `snapshot` to start from and the
+    budget, either `frames` or `instructions`. The random generator is seeded before the run,
+    so a job always produces the same result. Messages printed by the emulator go to stderr.
+    """
+
+    result = { 'rom': job['rom'], 'seed': job['seed'] }
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            state, framebuffer = run_emulator(job)
+
+        result['framebuffer_hash'] = hashlib.sha1(framebuffer).hexdigest()
+        result['registers'] = { name: state[name] for name in ('PC', 'I', 'SP', 'DT', 'ST', 'V') }
+        result['instructions'] = state['instructions_executed']
+    except Exception as ex:
+        result['error'] = f'{type(ex).__name__}: {ex}'
+
+    result['wall_time'] = time.perf_counter() - start
+    return result
+
+def run_emulator(job):
+    """ Run the job in the emulator of the process, returning the final state and framebuffer. """
+
+    quirks = job.get('quirks')
+    instructions_per_frame = job.get('instructions_per_frame')
+    if quirks is None or instructions_per_frame is None:
+        settings = find_rom_settings(job['rom'])
+        quirks = quirks or settings['quirks']
+        instructions_per_frame = instructions_per_frame or settings['instructions_per_frame']
+
+    emulator = get_emulator(job['engine'], instructions_per_frame, quirks)
+    emulator.load_rom(job['rom'], verbose=False)
+
+    if job.get('snapshot') is not None:
+        emulator.restore(job['snapshot'])
+    # seeded after the restore so each seed diverges from the snapshot
+    emulator.cpu.random.seed(job['seed'])
+
+    if job.get('frames') is not None:
+        state = emulator.run_frames(job['frames'])
+    else:
+        state = emulator.run(job['instructions'], Scheduler.FRAME_RATE * instructions_per_frame)
+
+    return state, emulator.framebuffer()
+
+def create_jobs(roms, seeds, frames=None, instructions=None, engine='interpreter',
+                instructions_per_frame=None, snapshot=None, quirks=None):
+    """ Return a job for each ROM and seed.
+
+    `quirks` gives the profile of each ROM, the profile and the instructions per frame
+    (`instructions_per_frame` when given) of the other ROMs are those of their index entry.
+    """
+
+    quirks = quirks or {}
+    return [
+        {
+            'rom': rom,
+            'seed': seed,
+            'frames': frames,
+            'instructions': instructions,
+            'engine': engine,
+            'instructions_per_frame': instructions_per_frame,
+            'snapshot': snapshot,
+            'quirks': quirks.get(rom),
+        }
+        for rom in roms
+        for seed in seeds
+    ]
+
+def run_batch(jobs, output_file, workers=None):
+    """ Run the jobs in a process pool, writing one JSON line per job (in the jobs order).
+
+    Returns the number of jobs that failed.
+    """
+
+    workers = workers or os.cpu_count()
+    # a few jobs per task to amortize the inter-process calls
+    chunksize = max(1, len(jobs) // (workers * 4))
+
+    errors = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(run_job, jobs, chunksize=chunksize):
+            if 'error' in result:
+                errors += 1
+            output_file.write(json.dumps(result) + '\n')
+    return errors
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(prog='batch.py', description='Run ROMs headless in a process pool.')
+    parser.add_argument('roms', nargs='+', help='ROM files or directories of ROMs')
+    parser.add_argument('--seeds', nargs='+', default=['0'],
+                        help='random seeds, as numbers or ranges like 0:100 (default: 0)')
+    budget = parser.add_mutually_exclusive_group()
+    budget.add_argument('--frames', type=int, help='number of 60Hz frames to run (default: 600)')
+    budget.add_argument('--instructions', type=int, help='number of instructions to run')
+    parser.add_argument('--ipf', type=int, help='instructions per frame of every ROM (default: from the ROM index)')
+    parser.add_argument('--engine', choices=Emulator.ENGINES, default='interpreter')
+    parser.add_argument('--quirks', choices=PROFILES, help='quirks profile of every ROM (default: from the ROM index)')
+    parser.add_argument('--snapshot', help='machine state file to start every run from (see main.py --save-snapshot)')
+    parser.add_argument('--workers', type=int, help='number of processes (default: number of CPUs)')
+    parser.add_argument('--output', default='-', help='JSON Lines output file (default: stdout)')
+    return parser.parse_args(args[1:])
+
+def main(args):
+    options = parse_args(args)
+
+    frames = options.frames
+    if frames is None and options.instructions is None:
+        frames = 600
+
+    snapshot = None
+    if options.snapshot is not None:
+        with open(options.snapshot, 'rb') as f:
+            snapshot = f.read()
+
+    roms = list_roms(options.roms)
+    quirks = None
+    if options.quirks is not None:
+        quirks = { rom: options.quirks for rom in roms }
+    if options.quirks is None or options.ipf is None:
+        index_roms(roms)
+
+    jobs = create_jobs(roms, parse_seeds(options.seeds), frames, options.instructions,
+                       options.engine, options.ipf, snapshot, quirks)
+
+    start = time.perf_counter()
+    if options.output == '-':
+        errors = run_batch(jobs, sys.stdout, options.workers)
+    else:
+        with open(options.output, 'w') as output_file:
+            errors = run_batch(jobs, output_file, options.workers)
+
+    print(f'{len(jobs)} runs ({errors} failed) in {time.perf_counter() - start:.2f}s', file=sys.stderr)
+
+if __name__ == '__main__':
+    main(sys.argv)
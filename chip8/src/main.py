@@ -1,38 +1,122 @@
+import argparse
+import os
 import sys
 
-from clock import Clock
 from Cpu import Cpu
-from Display import Display
-from Keyboard import Keyboard
+from Emulator import Emulator
 from Memory import Memory
-from Sound import Sound
+from Movie import Movie
+from Quirks import PROFILES, DEFAULT_PROFILE
+from Rom import load_rom_file_into_memory, load_rom_into_memory
+from RomLibrary import RomLibrary
+from Scheduler import Scheduler
 
 print("Chip8 Emulator")
 
+def parse_args(args):
+    parser = argparse.ArgumentParser(prog='main.py')
+    parser.add_argument('rom', nargs='?', help='rom file name from the roms folder, or path to a rom file')
+    parser.add_argument('--headless', action='store_true',
+                        help='run without display, sound and keyboard, printing the final state')
+    parser.add_argument('--instructions', type=int,
+                        help='number of instructions to execute in headless mode (default: run forever)')
+    parser.add_argument('--frames', type=int,
+                        help='number of 60Hz frames to execute in headless mode (instead of --instructions)')
+    parser.add_argument('--clock', type=int,
+                        help='virtual clock in Hz for the headless timers (default: as fast as possible)')
+    parser.add_argument('--ipf', type=int,
+                        help='instructions executed per 60Hz frame (default: recommended for the rom platform, '
+                             f'{Scheduler.INSTRUCTIONS_PER_FRAME} without rom)')
+    parser.add_argument('--engine', choices=Emulator.ENGINES,
+                        help='engine executing the instructions (default: the movie engine with --replay, interpreter otherwise)')
+    parser.add_argument('--quirks', choices=PROFILES,
+                        help='behaviours of the interpreter to emulate (default: the movie profile with --replay, '
+                             f'the rom profile, {DEFAULT_PROFILE} without rom)')
+    parser.add_argument('--seed', type=int, help='seed of the random generator (default: random)')
+    parser.add_argument('--record', metavar='FILE', help='record the seed and the keys of every frame into FILE')
+    parser.add_argument('--replay', metavar='FILE',
+                        help='replay the movie FILE headless as fast as possible, printing the final state')
+    parser.add_argument('--load-snapshot', metavar='FILE', help='start from the machine state saved in FILE')
+    parser.add_argument('--save-snapshot', metavar='FILE',
+                        help='save the machine state into FILE at the end of a headless run')
+    return parser.parse_args(args[1:])
+
 def main(args):
-    memory = Memory()
-    keyboard = Keyboard()
-    display = Display(memory)
-    display.initialize()
-    sound = Sound()
+    options = parse_args(args)
+    if options.replay is not None:
+        options.headless = True
+        # replayed with the engine and quirks it was recorded with
+        replayed_movie = Movie.load(options.replay)
+        options.engine = options.engine or replayed_movie.engine
+        options.quirks = options.quirks or replayed_movie.quirks
+
+    rom_filename, rom_entry = None, None
+    if options.rom is not None:
+        rom_filename, rom_entry = find_rom(options.rom)
+        print(f'{os.path.basename(rom_filename)}: {rom_entry["platform"]} ({rom_entry["size"]} bytes, '
+              f'sha1 {rom_entry["sha1"]}), quirks {rom_entry["quirks"]}, '
+              f'{rom_entry["instructions_per_frame"]} instructions per frame')
+
+    instructions_per_frame = options.ipf
+    if instructions_per_frame is None:
+        instructions_per_frame = rom_entry['instructions_per_frame'] if rom_entry else Scheduler.INSTRUCTIONS_PER_FRAME
+
+    quirks = options.quirks
+    if quirks is None and rom_entry is not None:
+        quirks = rom_entry['quirks']
+
+    emulator = Emulator(headless=options.headless, engine=options.engine or 'interpreter', instructions_per_frame=instructions_per_frame,
+                        seed=options.seed, quirks=quirks)
+
+    if rom_filename is not None:
+        emulator.load_rom(rom_filename)
+    else:
+        load_print_font_program(emulator.memory)
+        # load_screen_warp_program(emulator.memory)
+        # load_delay_timer_program(emulator.memory)
 
-    cpu = Cpu(memory, display, keyboard, sound)
+    if options.load_snapshot is not None:
+        emulator.load_snapshot(options.load_snapshot)
 
-    if len(args) > 1:
-        filename = args[1]
-        if len(filename) == 0:
-            raise Exception('Invalid rom file')
+    movie = None
+    if options.record is not None:
+        movie = emulator.record_movie(options.seed)
 
-        load_rom_file_into_memory(f'roms/{filename}', memory)
-    else:
-        load_print_font_program(memory)
-        # load_screen_warp_program(memory)
-        # load_delay_timer_program(memory)
+    try:
+        if not options.headless:
+            emulator.start()
+            return
+
+        run_headless(emulator, options)
+    finally:
+        if movie is not None:
+            movie.save(options.record)
+
+def find_rom(name):
+    """ Return the file name of the rom and its description from the index of its folder. """
+
+    if len(name) == 0:
+        raise Exception('Invalid rom file')
+
+    filename = name if os.path.isfile(name) else os.path.join('roms', name)
+    if not os.path.isfile(filename):
+        raise Exception(f'Rom file {name} not found')
+
+    library = RomLibrary(os.path.dirname(filename) or '.')
+    return filename, library.get(os.path.basename(filename))
 
-    timers_clock = Clock(cpu.update_timers, Cpu.TIMERS_CLOCK_SPEED)
-    timers_clock.start()
+def run_headless(emulator: Emulator, options):
+    if options.replay is not None:
+        state = emulator.replay(Movie.load(options.replay))
+    elif options.frames is not None:
+        state = emulator.run_frames(options.frames)
+    else:
+        state = emulator.run(options.instructions, options.clock)
 
-    cpu.start(lambda: timers_clock.cancel())
+    if options.save_snapshot is not None:
+        emulator.save_snapshot(options.save_snapshot)
+    print(emulator.display.to_text())
+    print(', '.join(f'{name}: {value}' for name, value in state.items()))
 
 def load_print_font_program(memory: Memory):
     addr = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
@@ -87,38 +171,6 @@ def load_screen_warp_program(memory: Memory):
     memory.write_16bit(0x226, 0xFF00)
     memory.write_16bit(0x228, 0xC0C0)
 
-def read_rom_file(file) -> str:
-    with open(file, 'rb') as f:
-        return f.read().hex()
-
-def load_rom_file_into_memory(filename: str, memory: Memory):
-    rom_data = read_rom_file(filename)
-
-    rom_data_lines = ''
-
-    i = 0
-    for l in rom_data:
-        i += 1
-        rom_data_lines += l
-        if i >= 4:
-            rom_data_lines += '\n'
-            i = 0
-
-    load_rom_into_memory(rom_data_lines, memory)
-
-def load_rom_into_memory(rom_data: str, memory: Memory):
-    print('\n=== Reading Rom ===')
-    addr = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
-    for line in rom_data.split('\n'):
-        if len(line.strip()) == 0:
-            continue
-        data = int(line.strip(), 16)
-        print(f'\t{hex(addr)} === {hex(data)}')
-
-        memory.write_16bit(addr, data)
-        addr += 2
-    print('=== Finished ===\n')
-
 def load_delay_timer_program(memory: Memory):
     # Program to test timer delay (2 to increase, 8 to decrease, 5 to start counting down)
     rom_data = '''6400
@@ -0,0 +1,117 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import sys
+from unittest.mock import patch
+
+sys.path.append('src')
+
+import batch
+
+from RomLibrary import RomLibrary
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+        # draws the font digit of a random number between 0 and F, then loops
+        self.random_rom = os.path.join(self.directory.name, 'random.ch8')
+        with open(self.random_rom, 'wb') as f:
+            f.write(bytes([0xC0, 0x0F, 0xF0, 0x29, 0xD1, 0x15, 0x12, 0x06]))
+
+        self.broken_rom = os.path.join(self.directory.name, 'broken.ch8')
+        with open(self.broken_rom, 'wb') as f:
+            f.write(bytes([0x00, 0xEE]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_parse_seeds(self):
+        self.assertEqual(batch.parse_seeds(['3', '10:13']), [3, 10, 11, 12])
+
+    def test_list_roms(self):
+        roms = batch.list_roms([self.directory.name, 'roms/PONG'])
+
+        self.assertEqual(roms, [self.broken_rom, self.random_rom, 'roms/PONG'])
+
+    def test_index_roms_should_save_each_index_once(self):
+        with patch.object(RomLibrary, 'save', autospec=True, side_effect=RomLibrary.save) as save:
+            batch.index_roms([self.random_rom, self.broken_rom, os.path.join(self.directory.name, 'missing', 'GAME')])
+
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(sorted(RomLibrary(self.directory.name).entries), ['broken.ch8', 'random.ch8'])
+        self.assertEqual(batch.find_rom_settings(self.random_rom)['quirks'], 'cosmac_vip')
+
+    def test_run_job_should_be_reproducible(self):
+        jobs = batch.create_jobs([self.random_rom], [1, 1, 2], frames=2)
+
+        results = [batch.run_job(job) for job in jobs]
+
+        self.assertEqual(results[0]['framebuffer_hash'], results[1]['framebuffer_hash'])
+        self.assertEqual(results[0]['registers'], results[1]['registers'])
+        self.assertEqual(results[0]['instructions'], 2 * batch.Scheduler.INSTRUCTIONS_PER_FRAME)
+        self.assertEqual(results[0]['registers']['PC'], 0x206)
+
+    def test_run_job_should_reset_the_reused_emulator(self):
+        batch.worker_emulators.clear()
+        job = batch.create_jobs([self.random_rom], [5], frames=3)[0]
+
+        first = batch.run_job(job)
+        batch.run_job(batch.create_jobs(['roms/test_opcode.ch8'], [0], frames=3)[0])
+        again = batch.run_job(job)
+
+        self.assertEqual(len(batch.worker_emulators), 1)
+        self.assertEqual({ **first, 'wall_time': 0 }, { **again, 'wall_time': 0 })
+
+    def test_run_job_should_use_the_instructions_per_frame_of_the_rom(self):
+        # switches to hi-res then loops, a SUPER-CHIP ROM
+        schip_rom = os.path.join(self.directory.name, 'schip.ch8')
+        with open(schip_rom, 'wb') as f:
+            f.write(bytes([0x00, 0xFF, 0x12, 0x02]))
+
+        indexed = batch.run_job(batch.create_jobs([schip_rom], [0], frames=2)[0])
+        given = batch.run_job(batch.create_jobs([schip_rom], [0], frames=2, instructions_per_frame=7)[0])
+
+        self.assertEqual(indexed['instructions'], 2 * 30)
+        self.assertEqual(given['instructions'], 2 * 7)
+
+    def test_run_job_with_instructions_budget(self):
+        job = batch.create_jobs(['roms/test_opcode.ch8'], [0], instructions=123)[0]
+
+        result = batch.run_job(job)
+
+        self.assertEqual(result['instructions'], 123)
+        self.assertGreater(result['wall_time'], 0)
+
+    def test_run_job_should_report_errors(self):
+        job = batch.create_jobs([self.broken_rom], [0], frames=1)[0]
+
+        result = batch.run_job(job)
+
+        self.assertIn('error', result)
+        self.assertNotIn('framebuffer_hash', result)
+
+    def test_missing_rom_should_only_fail_its_jobs(self):
+        output_filename = os.path.join(self.directory.name, 'results.jsonl')
+        missing_rom = os.path.join(self.directory.name, 'missing.ch8')
+
+        with patch('sys.stderr', io.StringIO()):
+            batch.main(['batch.py', self.random_rom, missing_rom, '--frames', '1', '--workers', '1', '--output', output_filename])
+
+        with open(output_filename) as f:
+            results = [json.loads(line) for line in f]
+        self.assertNotIn('error', results[0])
+        self.assertIn('FileNotFoundError', results[1]['error'])
+
+    def test_run_batch_should_write_json_lines_in_order(self):
+        jobs = batch.create_jobs([self.random_rom, self.broken_rom], [0, 1, 2], frames=1)
+        output = io.StringIO()
+
+        errors = batch.run_batch(jobs, output, workers=2)
+
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(errors, 3)
+        self.assertEqual([(result['rom'], result['seed']) for result in results],
+                         [(job['rom'], job['seed']) for job in jobs])
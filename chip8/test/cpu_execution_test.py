@@ -7,12 +7,13 @@ from Cpu import Cpu
 from Display import Display
 from Keyboard import Keyboard
 from Memory import Memory
+from Quirks import Quirks
 from Sound import Sound
 
 class CpuExecutionTestCase(unittest.TestCase):
     def setUp(self):
         self.memory = Memory()
-        self.display = Display(self.memory)
+        self.display = Display()
         self.keyboard = Keyboard()
         self.sound = Sound(mocked=True)
 
@@ -61,16 +62,44 @@ class CpuExecutionTestCase(unittest.TestCase):
             0xF365: 0xF065,
         }
 
-        # mock the map to just return string instead of executing the opcode
+        # every opcode is decoded by the function of its pattern
+        opcodes_functions_map = Cpu.opcodes_functions_map(self.cpu.quirks)
         for opcode_test in opcodes_tests:
             opcode = opcodes_tests[opcode_test]
-            self.cpu.opcodes_functions_map[opcode] = lambda _, opcode = opcode: hex(opcode)
 
-        for opcode_test in opcodes_tests:
-            opcode = opcodes_tests[opcode_test]
+            self.assertEqual(self.cpu.opcodes_dispatch_table[opcode_test], opcodes_functions_map[opcode](opcode_test))
+
+    def test_dispatch_table_should_be_shared_by_the_cpus_with_the_same_quirks(self):
+        cpu = Cpu(Memory(), Display(), Keyboard(), Sound(mocked=True))
+        xochip_cpu = Cpu(Memory(Memory.XOCHIP_MEMORY_SIZE), Display(), Keyboard(), Sound(mocked=True), quirks='xochip')
+
+        self.assertIs(cpu.opcodes_dispatch_table, self.cpu.opcodes_dispatch_table)
+        self.assertIsNot(xochip_cpu.opcodes_dispatch_table, self.cpu.opcodes_dispatch_table)
+        self.assertIs(Cpu.get_dispatch_table(Quirks('custom')), self.cpu.opcodes_dispatch_table)
+
+        # the handlers are bound to each cpu
+        cpu.decode_opcode(0x6A2F)()
+        self.assert_equal_hex(cpu.read_V(0xA), 0x2F)
+        self.assert_equal_hex(self.cpu.read_V(0xA), 0x00)
+
+    def test_decode_opcode_should_bind_decoded_arguments(self):
+        self.cpu.write_V(0x3, 0x10)
+
+        self.cpu.decode_opcode(0x6A2F)()
+        self.assert_equal_hex(self.cpu.read_V(0xA), 0x2F)
 
-            opcode_function = self.cpu.decode_opcode(opcode_test)
-            self.assertEqual(opcode_function(), hex(opcode))
+        self.cpu.decode_opcode(0x8A34)()
+        self.assert_equal_hex(self.cpu.read_V(0xA), 0x3F)
+
+        self.cpu.decode_opcode(0xA123)()
+        self.assert_equal_hex(self.cpu.I, 0x123)
+
+    def test_decode_opcode_should_return_none_for_unknown_opcode(self):
+        self.assertIsNone(self.cpu.decode_opcode(0x0000))
+        self.assertIsNone(self.cpu.decode_opcode(0x5AB1))
+        self.assertIsNone(self.cpu.decode_opcode(0x800F))
+        self.assertIsNone(self.cpu.decode_opcode(0xE3FF))
+        self.assertIsNone(self.cpu.decode_opcode(0xF3FF))
 
     def test_get_opcode_value_X_should_extract_value(self):
         self.assert_equal_hex(self.cpu.get_opcode_value_X(0x0A00), 0xA)
@@ -99,17 +128,59 @@ class CpuExecutionTestCase(unittest.TestCase):
 
     def setup_opcode(self, opcode):
         self.memory.write_16bit(0x200, opcode)
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
 
     def test_cpu_execution(self):
         self.setup_opcode(0x00E0)
 
-        self.memory.write_8bit(0xF00, 0xF0)
-        self.memory.write_8bit(0xF10, 0xF0)
-        self.memory.write_8bit(0xFA0, 0xF0)
-        self.memory.write_8bit(0xFFF, 0xF0)
+        for offset in (0x00, 0x10, 0xA0, 0xFF):
+            self.display.buffer[offset] = 0xF0
+
+        self.cpu.execute_cpu_cycle()
+
+        self.assertEqual(self.display.framebuffer(), bytes(0x100))
+
+    def test_cpu_execution_should_cache_decoded_instruction(self):
+        self.setup_opcode(0x6A05)
+
+        self.assertIsNone(self.cpu.instruction_cache[0x200])
 
         self.cpu.execute_cpu_cycle()
 
-        for addr in range(0xF00, 0xFFF):
-            self.assert_equal_hex(self.memory.read_8bit(addr), 0x0)
+        self.assertIsNotNone(self.cpu.instruction_cache[0x200])
+        self.assert_equal_hex(self.cpu.read_V(0xA), 0x05)
+
+    def test_cpu_execution_should_invalidate_cached_instruction_when_memory_is_written(self):
+        self.setup_opcode(0x6A05)
+        self.cpu.execute_cpu_cycle()
+
+        self.setup_opcode(0x6A07)
+        self.cpu.execute_cpu_cycle()
+
+        self.assert_equal_hex(self.cpu.read_V(0xA), 0x07)
+
+        # writing the second byte of the instruction also invalidates it
+        self.memory.write_8bit(0x201, 0x09)
+        self.cpu.write_register_pc(0x200)
+        self.cpu.execute_cpu_cycle()
+
+        self.assert_equal_hex(self.cpu.read_V(0xA), 0x09)
+
+    def test_cpu_execution_should_run_self_modifying_code(self):
+        self.memory.write_16bit(0x200, 0x6070) # V0 = 0x70
+        self.memory.write_16bit(0x202, 0x61AB) # V1 = 0xAB
+        self.memory.write_16bit(0x204, 0xA208) # I = 0x208
+        self.memory.write_16bit(0x206, 0xF155) # store V0 and V1 at 0x208 => 0x70AB (V0 += 0xAB)
+        self.memory.write_16bit(0x208, 0x6000) # V0 = 0
+
+        # decode the original instruction first
+        self.cpu.write_register_pc(0x208)
+        self.cpu.execute_cpu_cycle()
+        self.assert_equal_hex(self.cpu.read_V(0x0), 0x00)
+
+        self.cpu.write_register_pc(0x200)
+        for _ in range(5):
+            self.cpu.execute_cpu_cycle()
+
+        self.assert_equal_hex(self.memory.read_16bit(0x208), 0x70AB)
+        self.assert_equal_hex(self.cpu.read_V(0x0), 0x1B)
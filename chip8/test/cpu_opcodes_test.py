@@ -9,41 +9,113 @@ from Cpu import Cpu
 from Display import *
 from Keyboard import Keyboard
 from Memory import Memory
+from Quirks import Quirks
 from Sound import Sound
 
 class CpuOpcodesTestCase(unittest.TestCase):
+    # quirks profile of the cpu, the default one for None
+    QUIRKS = None
+
     def setUp(self):
         self.memory = Memory()
-        self.display = Display(self.memory)
+        self.display = Display()
         self.keyboard = Keyboard()
         self.sound = Sound(mocked=True)
 
-        self.cpu = Cpu(self.memory, self.display, self.keyboard, self.sound)
+        self.cpu = Cpu(self.memory, self.display, self.keyboard, self.sound, quirks=self.QUIRKS)
 
     def assert_equal_hex(self, actual, expected):
         self.assertEqual(actual, expected, "Hex: {} != {}".format(hex(actual), hex(expected)))
 
     def assert_data_register_value(self, x, expected_value):
         self.assert_equal_hex(self.cpu.read_V(x), expected_value)
+        self.cpu.sync_registers_to_memory()
         memory_position = self.cpu.calculate_data_register_memory_address(x)
         self.assert_equal_hex(self.memory.read_8bit(memory_position), expected_value)
 
     def assert_memory_address_16bit_value(self, addr, expected_value):
+        self.cpu.sync_registers_to_memory()
         self.assert_equal_hex(self.memory.read_16bit(addr), expected_value)
 
     def assert_memory_address_8bit_value(self, addr, expected_value):
+        self.cpu.sync_registers_to_memory()
         self.assert_equal_hex(self.memory.read_8bit(addr), expected_value)
 
+    def assert_screen_byte_value(self, offset, expected_value):
+        self.assert_equal_hex(self.display.buffer[offset], expected_value)
+
+    def screen_offset(self, x, y):
+        """ Return the framebuffer offset of the byte holding the pixel (x, y). """
+        return y * self.display.row_bytes + x // PIXELS_PER_BYTE
+
+    def write_shift_operand(self, x, y, value):
+        """ Write the value into the register shifted by 8XY6 and 8XYE (VY, or VX without the `shift_vy` quirk), clearing the other. """
+
+        shifted, other = (y, x) if self.cpu.quirks.shift_vy else (x, y)
+        self.cpu.write_V(other, 0x0)
+        self.cpu.write_V(shifted, value)
+
+    def expected_I_after_load_store(self, I, x):
+        """ Return I after FX55 or FX65 with the `load_store` quirk. """
+
+        return I + { Quirks.LOAD_STORE_INCREMENT: x + 1, Quirks.LOAD_STORE_INCREMENT_X: x,
+                     Quirks.LOAD_STORE_UNCHANGED: 0 }[self.cpu.quirks.load_store]
+
     def test_opcode_00E0_should_clean_display(self):
-        self.memory.write_8bit(0xF00, 0xF0)
-        self.memory.write_8bit(0xF10, 0xF0)
-        self.memory.write_8bit(0xFA0, 0xF0)
-        self.memory.write_8bit(0xFFF, 0xF0)
+        for offset in (0x00, 0x10, 0xA0, 0xFF):
+            self.display.buffer[offset] = 0xF0
 
         self.cpu.opcode_00E0()
 
-        for addr in range(0xF00, 0xFFF):
-            self.assert_equal_hex(self.memory.read_8bit(addr), 0x0)
+        self.assertEqual(self.display.framebuffer(), bytes(DISPLAY_SIZE))
+
+    def test_opcode_00CN_should_scroll_down(self):
+        self.display.buffer[0x00] = 0xF0
+        self.display.buffer[0xF8] = 0x0F
+
+        self.cpu.opcode_00CN(0x2)
+
+        self.assert_screen_byte_value(0x10, 0xF0)
+        self.assertEqual(sum(self.display.framebuffer()), 0xF0)
+
+    def test_opcode_00DN_should_scroll_up(self):
+        self.display.buffer[0x00] = 0xF0
+        self.display.buffer[0xF8] = 0x0F
+
+        self.cpu.opcode_00DN(0x3)
+
+        self.assert_screen_byte_value(0xE0, 0x0F)
+        self.assertEqual(sum(self.display.framebuffer()), 0x0F)
+
+    def test_opcode_00FB_should_scroll_right_by_4_pixels(self):
+        self.display.buffer[0x08] = 0xFF
+        self.display.buffer[0x0F] = 0x0F
+
+        self.cpu.opcode_00FB()
+
+        self.assertEqual(self.display.framebuffer()[0x08:0x10], bytes([0x0F, 0xF0, 0, 0, 0, 0, 0, 0]))
+
+    def test_opcode_00FC_should_scroll_left_by_4_pixels(self):
+        self.display.buffer[0x08] = 0xFF
+        self.display.buffer[0x0F] = 0x0F
+
+        self.cpu.opcode_00FC()
+
+        self.assertEqual(self.display.framebuffer()[0x08:0x10], bytes([0xF0, 0, 0, 0, 0, 0, 0, 0xF0]))
+
+    def test_opcode_00FF_and_00FE_should_switch_resolution_and_clear(self):
+        self.display.buffer[0x00] = 0xFF
+
+        self.cpu.opcode_00FF()
+
+        self.assertTrue(self.display.hires)
+        self.assertEqual(self.display.framebuffer(), bytes(HIRES_DISPLAY_SIZE))
+
+        self.display.buffer[0x00] = 0xFF
+        self.cpu.opcode_00FE()
+
+        self.assertFalse(self.display.hires)
+        self.assertEqual(self.display.framebuffer(), bytes(DISPLAY_SIZE))
 
     def test_opcode_00EE_should_return_to_last_memory_address_before_subroutine(self):
         # Fake stack
@@ -51,19 +123,19 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.memory.write_16bit(0xEA2, 0x202)
         self.memory.write_16bit(0xEA4, 0xAAA)
         # Set initial SP and PC
-        self.memory.write_8bit(Cpu.REGISTER_SP_ADDRESS, 0x04)
-        self.memory.write_8bit(Cpu.REGISTER_PC_ADDRESS, 0xBBB)
+        self.cpu.SP = 0x04
+        self.cpu.write_register_pc(0xBBB)
 
         self.cpu.opcode_00EE()
 
-        self.assert_equal_hex(self.memory.read_8bit(Cpu.REGISTER_SP_ADDRESS), 0x02)
+        self.assert_equal_hex(self.cpu.SP, 0x02)
         self.assert_equal_hex(self.cpu.read_top_address_in_stack(), 0x202)
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0xAAA)
+        self.assert_equal_hex(self.cpu.PC, 0xAAA)
 
     def test_opcode_00EE_should_throw_error_when_stack_is_empty(self):
         self.memory.write_16bit(0xEA0, 0x400)
-        self.memory.write_8bit(Cpu.REGISTER_SP_ADDRESS, 0x00)
-        self.memory.write_8bit(Cpu.REGISTER_PC_ADDRESS, 0x400)
+        self.cpu.SP = 0x00
+        self.cpu.write_register_pc(0x400)
 
         with self.assertRaises(Exception):
             self.cpu.opcode_00EE()
@@ -71,84 +143,124 @@ class CpuOpcodesTestCase(unittest.TestCase):
     def test_opcode_1NNN_should_jump_to_allowed_memory(self):
         self.cpu.opcode_1NNN(0x8FF)
 
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x8FF)
+        self.assert_equal_hex(self.cpu.PC, 0x8FF)
 
     def test_opcode_2NNN_should_be_correct_state_before_subroutine(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
-        self.memory.write_8bit(Cpu.REGISTER_SP_ADDRESS, 0x00)
+        self.cpu.write_register_pc(0x200)
+        self.cpu.SP = 0x00
 
         self.cpu.opcode_2NNN(0x400)
 
-        self.assert_equal_hex(self.memory.read_8bit(Cpu.REGISTER_SP_ADDRESS), 0x02)
+        self.assert_equal_hex(self.cpu.SP, 0x02)
         self.assert_equal_hex(self.memory.read_16bit(0xEA2), 0x200)
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x400)
+        self.assert_equal_hex(self.cpu.PC, 0x400)
 
     def test_opcode_2NNN_should_throw_stack_overflow(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
-        self.memory.write_8bit(Cpu.REGISTER_SP_ADDRESS, 0x00)
+        self.cpu.write_register_pc(0x200)
+        self.cpu.SP = 0x00
 
         with self.assertRaises(Exception):
             for _ in range(0, 16):
                 self.cpu.opcode_2NNN(0x400)
 
     def test_opcode_3XKK_should_skip_next_instruction_if_VX_equals_KK(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(2, 0x0F)
 
         self.cpu.opcode_3XKK(2, 0x0F)
 
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x202)
+        self.assert_equal_hex(self.cpu.PC, 0x202)
         self.assert_data_register_value(2, 0x0F)
 
     def test_opcode_3XKK_should_not_skip_next_instruction_if_VX_not_equal_KK(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(2, 0x0F)
 
         self.cpu.opcode_3XKK(2, 0xFF)
 
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x200)
+        self.assert_equal_hex(self.cpu.PC, 0x200)
         self.assert_data_register_value(2, 0x0F)
 
     def test_opcode_4XKK_should_skip_next_instruction_if_VX_not_equals_KK(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(3, 0xAF)
 
         self.cpu.opcode_4XKK(3, 0xFF)
 
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x202)
+        self.assert_equal_hex(self.cpu.PC, 0x202)
         self.assert_data_register_value(3, 0xAF)
 
     def test_opcode_4XKK_should_not_skip_next_instruction_if_VX_equals_KK(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(3, 0xAF)
 
         self.cpu.opcode_4XKK(3, 0xAF)
 
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x200)
+        self.assert_equal_hex(self.cpu.PC, 0x200)
         self.assert_data_register_value(3, 0xAF)
 
     def test_opcode_5XY0_should_skip_next_instruction_if_VX_equals_VY(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(4, 0xDF)
         self.cpu.write_V(6, 0xDF)
 
         self.cpu.opcode_5XY0(4, 6)
 
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x202)
+        self.assert_equal_hex(self.cpu.PC, 0x202)
         self.assert_data_register_value(4, 0xDF)
         self.assert_data_register_value(6, 0xDF)
 
     def test_opcode_5XY0_should_not_skip_next_instruction_if_VX_not_equals_VY(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(4, 0xEF)
         self.cpu.write_V(0xA, 0xFF)
 
         self.cpu.opcode_5XY0(4, 0xA)
 
-        self.assert_equal_hex(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x200)
+        self.assert_equal_hex(self.cpu.PC, 0x200)
         self.assert_data_register_value(4, 0xEF)
         self.assert_data_register_value(0xA, 0xFF)
 
+    def test_opcode_5XY2_should_store_the_registers_range(self):
+        self.cpu.I = 0x700
+        self.cpu.V[0x2:0x6] = bytes([0xA2, 0xA3, 0xA4, 0xA5])
+
+        self.cpu.opcode_5XY2(0x2, 0x5)
+
+        self.assertEqual(self.memory.read_range(0x700, 5), bytes([0xA2, 0xA3, 0xA4, 0xA5, 0x00]))
+        self.assert_equal_hex(self.cpu.I, 0x700)
+
+        # in reverse order, V0 included
+        self.cpu.opcode_5XY2(0x2, 0x0)
+
+        self.assertEqual(self.memory.read_range(0x700, 3), bytes([0xA2, 0x00, 0x00]))
+        self.assert_equal_hex(self.cpu.I, 0x700)
+
+    def test_opcode_5XY3_should_load_the_registers_range(self):
+        self.cpu.I = 0x700
+        self.memory.write_range(0x700, bytes([0xB1, 0xB2, 0xB3]))
+
+        self.cpu.opcode_5XY3(0xD, 0xF)
+
+        self.assertEqual(bytes(self.cpu.V[0xD:]), bytes([0xB1, 0xB2, 0xB3]))
+
+        self.cpu.opcode_5XY3(0x3, 0x1)
+
+        self.assertEqual(bytes(self.cpu.V[0x1:0x4]), bytes([0xB3, 0xB2, 0xB1]))
+        self.assert_data_register_value(0x0, 0x00)
+        self.assert_equal_hex(self.cpu.I, 0x700)
+
+    def test_skip_should_step_over_long_load(self):
+        self.cpu.write_register_pc(0x300)
+        self.memory.write_16bit(0x300, 0xF000)
+        self.memory.write_16bit(0x302, 0x0400)
+        self.cpu.write_V(3, 0xAF)
+
+        self.cpu.opcode_3XKK(3, 0xAF)
+
+        # F000 is only 4 bytes long with the XO-CHIP long load
+        self.assert_equal_hex(self.cpu.PC, 0x304 if self.cpu.quirks.long_load else 0x302)
+
     def test_opcode_6XKK_should_set_register_to_given_value(self):
         self.cpu.write_V(0xB, 0xAA)
 
@@ -209,7 +321,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
         self.assert_data_register_value(0x3, 0x2)
         self.assert_data_register_value(0xE, 0x2)
-        self.assert_data_register_value(0xF, 0x0)
+        self.assert_data_register_value(0xF, 0x0 if self.cpu.quirks.vf_reset else 0x1)
 
     def test_opcode_8XY2_should_apply_AND_on_two_register_storing_result_first_one(self):
         self.cpu.write_V(0x0, 0x3)
@@ -220,7 +332,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
         self.assert_data_register_value(0x0, 0x1)
         self.assert_data_register_value(0x1, 0x5)
-        self.assert_data_register_value(0xF, 0x0)
+        self.assert_data_register_value(0xF, 0x0 if self.cpu.quirks.vf_reset else 0x1)
 
     def test_opcode_8XY3_should_apply_XOR_on_two_register_storing_result_first_on(self):
         self.cpu.write_V(0xA, 0x5)
@@ -231,7 +343,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
         self.assert_data_register_value(0xA, 0x6)
         self.assert_data_register_value(0xB, 0x3)
-        self.assert_data_register_value(0xF, 0x0)
+        self.assert_data_register_value(0xF, 0x0 if self.cpu.quirks.vf_reset else 0x1)
 
     def test_opcode_8XY4_should_add_two_registers_storing_result_first_one_and_not_set_carry_when_not_overflowing(self):
         self.cpu.write_V(0x4, 0x6)
@@ -278,25 +390,23 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_data_register_value(0xF, 0) # negative
 
     def test_opcode_8XY6_should_shift_right_VY_storing_result_VX_and_not_set_flag_when_least_significant_is_0(self):
-        self.cpu.write_V(0xA, 0x0)
-        self.cpu.write_V(0xB, 0xA)
+        self.write_shift_operand(0xA, 0xB, 0xA)
         self.cpu.write_V(0xF, 0)
 
         self.cpu.opcode_8XY6(0xA, 0xB)
 
         self.assert_data_register_value(0xA, 0x5)
-        self.assert_data_register_value(0xB, 0xA)
+        self.assert_data_register_value(0xB, 0xA if self.cpu.quirks.shift_vy else 0x0)
         self.assert_data_register_value(0xF, 0)
 
     def test_opcode_8XY6_should_shift_right_VY_storing_result_VX_and_set_flag_when_least_significant_is_1(self):
-        self.cpu.write_V(0xA, 0x0)
-        self.cpu.write_V(0xB, 0xB)
+        self.write_shift_operand(0xA, 0xB, 0xB)
         self.cpu.write_V(0xF, 0)
 
         self.cpu.opcode_8XY6(0xA, 0xB)
 
         self.assert_data_register_value(0xA, 0x5)
-        self.assert_data_register_value(0xB, 0xB)
+        self.assert_data_register_value(0xB, 0xB if self.cpu.quirks.shift_vy else 0x0)
         self.assert_data_register_value(0xF, 1)
 
     def test_opcode_8XY7_should_subtract_VX_from_VY_storing_result_VX_and_not_set_borrow_when_not_underflowing(self):
@@ -322,29 +432,27 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_data_register_value(0xF, 0)
 
     def test_opcode_8XYE_should_shift_left_VY_storing_result_VX_and_not_set_flag_when_most_significant_is_0(self):
-        self.cpu.write_V(0xA, 0x0)
-        self.cpu.write_V(0xC, 0x7A)
+        self.write_shift_operand(0xA, 0xC, 0x7A)
         self.cpu.write_flag(0)
 
         self.cpu.opcode_8XYE(0xA, 0xC)
 
         self.assert_data_register_value(0xA, 0xF4)
-        self.assert_data_register_value(0xC, 0x7A)
+        self.assert_data_register_value(0xC, 0x7A if self.cpu.quirks.shift_vy else 0x0)
         self.assert_data_register_value(0xF, 0)
 
     def test_opcode_8XYE_should_shift_left_VY_storing_result_VX_and_set_flag_when_most_significant_is_1(self):
-        self.cpu.write_V(0xA, 0x0)
-        self.cpu.write_V(0xC, 0xAA)
+        self.write_shift_operand(0xA, 0xC, 0xAA)
         self.cpu.write_flag(0)
 
         self.cpu.opcode_8XYE(0xA, 0xC)
 
         self.assert_data_register_value(0xA, 0x54)
-        self.assert_data_register_value(0xC, 0xAA)
+        self.assert_data_register_value(0xC, 0xAA if self.cpu.quirks.shift_vy else 0x0)
         self.assert_data_register_value(0xF, 1)
 
     def test_opcode_9XY0_should_skip_next_instruction_if_VX_not_equals_VY(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(0x1, 0xF)
         self.cpu.write_V(0x2, 0xA)
 
@@ -355,7 +463,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_data_register_value(0x2, 0xA)
 
     def test_opcode_9XY0_should_not_skip_next_instruction_if_VX_equals_VY(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(0x1, 0xF)
         self.cpu.write_V(0x2, 0xF)
 
@@ -367,20 +475,26 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
 
     def test_opcode_ANNN_should_set_register_I(self):
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x2FF)
+        self.cpu.I = 0x2FF
 
         self.cpu.opcode_ANNN(0x230)
 
         self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x230)
 
     def test_opcode_BNNN_should_jump_to_address_plus_data_register_V0(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(0x0, 0x2)
 
+        self.cpu.write_V(0x4, 0x3)
+
         self.cpu.opcode_BNNN(0x400)
 
         self.assert_data_register_value(0x0, 0x2)
-        self.assert_memory_address_16bit_value(Cpu.REGISTER_PC_ADDRESS, 0x404)
+        # BXNN with the `vx` quirk, jumping to 0x400 + V4; called directly on the Cpu,
+        # opcode_BNNN is the `v0_doubled` handler whatever the quirks
+        jump = Quirks.JUMP_V0_DOUBLED if isinstance(self.cpu, Cpu) else self.cpu.quirks.jump
+        expected_pc = { Quirks.JUMP_V0_DOUBLED: 0x404, Quirks.JUMP_V0: 0x402, Quirks.JUMP_VX: 0x403 }[jump]
+        self.assert_memory_address_16bit_value(Cpu.REGISTER_PC_ADDRESS, expected_pc)
 
     def test_opcode_CXKK_should_set_data_register_X_to_random_byte_AND_0(self):
         self.cpu.write_V(0x9, 0xF)
@@ -399,7 +513,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_memory_address_8bit_value(Cpu.REGISTER_RANDOM_NUMBER_ADDRESS, v9_value)
 
     def test_opcode_DXYN_should_write_sprite_to_memory_location_I(self):
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x200)
+        self.cpu.I = 0x200
 
         # sprite of an 8
         self.memory.write_8bit(0x200, 0xF0)
@@ -415,18 +529,18 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.cpu.opcode_DXYK(0, 1, 5);
 
         self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x200)
-        # assert the display memory
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS, 0xF0)
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS + 8, 0xD0)
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS + 16, 0xF0)
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS + 24, 0xD0)
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS + 32, 0xF0)
+        # assert the framebuffer
+        self.assert_screen_byte_value(0, 0xF0)
+        self.assert_screen_byte_value(8, 0xD0)
+        self.assert_screen_byte_value(16, 0xF0)
+        self.assert_screen_byte_value(24, 0xD0)
+        self.assert_screen_byte_value(32, 0xF0)
 
         # assert that there wasn't any collision
         self.assert_data_register_value(0xF, 0)
 
     def test_opcode_DXYN_should_register_sprite_collision(self):
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x300)
+        self.cpu.I = 0x300
 
         # sprite has a single dot in top-left corner
         self.memory.write_8bit(0x300, 0x80)
@@ -435,25 +549,25 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.cpu.write_V(0x2, 0)
         self.cpu.opcode_DXYK(0x1, 0x2, 5);
 
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS, 0x80)
+        self.assert_screen_byte_value(0, 0x80)
 
         # calling twice should clear the sprite and set the flag
         self.cpu.opcode_DXYK(1, 2, 5);
 
         self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x300)
 
-        # assert the display memory
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS, 0x0)
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS + 8, 0x0)
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS + 16, 0x0)
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS + 24, 0x0)
-        self.assert_memory_address_8bit_value(Cpu.MEMORY_DISPLAY_AREA_START_ADDRESS + 32, 0x0)
+        # assert the framebuffer
+        self.assert_screen_byte_value(0, 0x0)
+        self.assert_screen_byte_value(8, 0x0)
+        self.assert_screen_byte_value(16, 0x0)
+        self.assert_screen_byte_value(24, 0x0)
+        self.assert_screen_byte_value(32, 0x0)
 
         self.assert_data_register_value(0xF, 1)
 
     def test_opcode_DXYN_should_write_sprite_given_screen_position_when_starts_beginning_byte(self):
         sprite_addr = 0x300
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, sprite_addr)
+        self.cpu.I = sprite_addr
 
         # sprite of cowboy
         sprite = [
@@ -488,14 +602,14 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_data_register_value(0xF, 0)
 
         for i in range(len(sprite)):
-            addr = calculate_memory_address_offset(x, y + i)
+            offset = self.screen_offset(x, y + i)
 
-            screen_row = self.memory.read_8bit(addr)
+            screen_row = self.display.buffer[offset]
             self.assertEqual(screen_row, sprite[i], f'Row {i} did not match; {bin(screen_row)} != {bin(sprite[i])}')
 
     def test_opcode_DXYN_should_write_sprite_given_screen_position_when_starts_middle_byte(self):
         sprite_addr = 0x300
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, sprite_addr)
+        self.cpu.I = sprite_addr
 
         # sprite of cowboy
         sprite = [
@@ -531,19 +645,19 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
         mem_byte_offset = 4
         for i in range(len(sprite)):
-            addr = calculate_memory_address_offset(x, y + i)
+            offset = self.screen_offset(x, y + i)
 
-            screen_row = self.memory.read_8bit(addr)
+            screen_row = self.display.buffer[offset]
             expected_row = sprite[i] >> mem_byte_offset
             self.assertEqual(screen_row, expected_row, f'First part of row {i} did not match; {bin(screen_row)} != {bin(expected_row)}')
 
-            screen_row_second_part = self.memory.read_8bit(addr + 1)
+            screen_row_second_part = self.display.buffer[offset + 1]
             expected_row = (sprite[i] & (0xFF >> (8 - mem_byte_offset))) << (8 - mem_byte_offset)
             self.assertEqual(screen_row_second_part, expected_row, f'Second part of row {i} did not match; {bin(screen_row)} != {bin(expected_row)}')
 
     def test_opcode_DXYN_should_write_to_start_of_screen_when_starting_at_end(self):
         sprite_addr = 0x400
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, sprite_addr)
+        self.cpu.I = sprite_addr
 
         # sprite of reactangle
         sprite = [
@@ -568,20 +682,20 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
         mem_byte_offset = 4
         for i in range(len(sprite)):
-            addr = calculate_memory_address_offset(x, y + i)
+            offset = self.screen_offset(x, y + i)
 
-            screen_row = self.memory.read_8bit(addr)
+            screen_row = self.display.buffer[offset]
             expected_row = sprite[i] >> mem_byte_offset
             self.assertEqual(screen_row, expected_row, f'First part of row {i} did not match; {bin(screen_row)} != {bin(expected_row)}')
 
-            addr = addr - (x // PIXELS_PER_BYTE)
-            start_screen_row = self.memory.read_8bit(addr)
+            offset = offset - (x // PIXELS_PER_BYTE)
+            start_screen_row = self.display.buffer[offset]
             expected_row = (sprite[i] & (0xFF >> (8 - mem_byte_offset))) << (8 - mem_byte_offset)
             self.assertEqual(start_screen_row, expected_row, f'Second part of row {i} did not match; {bin(start_screen_row)} != {bin(expected_row)}')
 
     def test_opcode_DXYN_should_write_to_top_of_screen_when_starting_at_bottom(self):
         sprite_addr = 0x400
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, sprite_addr)
+        self.cpu.I = sprite_addr
 
         sprite = [
             0b11110000,
@@ -605,16 +719,16 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
         self.assert_data_register_value(0xF, 0)
 
-        expected_addresses = [0xF00, 0xF08, 0xF10, 0xFE8, 0xFF0, 0xFF8]
+        expected_offsets = [0x00, 0x08, 0x10, 0xE8, 0xF0, 0xF8]
 
-        for entry in zip(expected_addresses, range(len(sprite))):
-            expected_addr, i = entry
-            screen_row = self.memory.read_8bit(expected_addr)
+        for entry in zip(expected_offsets, range(len(sprite))):
+            expected_offset, i = entry
+            screen_row = self.display.buffer[expected_offset]
             self.assertEqual(screen_row, sprite[i], f'First part of row {i} did not match; {bin(screen_row)} != {bin(sprite[i])}')
 
     def test_opcode_DXYN_should_all_edges_when_starting_at_last_pixel(self):
         sprite_addr = 0x400
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, sprite_addr)
+        self.cpu.I = sprite_addr
 
         sprite = [
             0b11000000,
@@ -632,15 +746,49 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
         self.assert_data_register_value(0xF, 0)
 
-        expected_addresses = [0xF00, 0xF07, 0xFF8, 0xFFF]
+        expected_offsets = [0x00, 0x07, 0xF8, 0xFF]
         expected_values = [0b10000000, 0b1, 0b10000000, 0b1]
 
-        for expected_addr,expected_row in zip(expected_addresses, expected_values):
-            screen_row = self.memory.read_8bit(expected_addr)
-            self.assertEqual(screen_row, expected_row, f'Row at {hex(expected_addr)} did not match: {bin(screen_row)} != {bin(expected_row)}')
+        for expected_offset,expected_row in zip(expected_offsets, expected_values):
+            screen_row = self.display.buffer[expected_offset]
+            self.assertEqual(screen_row, expected_row, f'Row at {hex(expected_offset)} did not match: {bin(screen_row)} != {bin(expected_row)}')
+
+    def test_opcode_DXY0_should_draw_16x16_sprite(self):
+        self.cpu.I = 0x300
+        for row in range(16):
+            self.memory.write_16bit(0x300 + 2 * row, 0x8001)
+
+        self.cpu.opcode_00FF()
+        self.cpu.write_V(0xA, 0x8)
+        self.cpu.write_V(0xB, 0x2)
+        self.cpu.opcode_DXY0(0xA, 0xB)
+
+        self.assert_data_register_value(0xF, 0)
+        for row in range(16):
+            offset = self.screen_offset(0x8, 0x2 + row)
+            self.assertEqual(self.display.buffer[offset:(offset + 2)], bytes([0x80, 0x01]))
+        self.assertEqual(sum(self.display.framebuffer()), 16 * 0x81)
+
+        self.cpu.opcode_DXY0(0xA, 0xB)
+
+        self.assert_data_register_value(0xF, 1)
+        self.assertEqual(self.display.framebuffer(), bytes(HIRES_DISPLAY_SIZE))
+
+    def test_opcode_DXY0_should_draw_16x16_sprite_in_lores(self):
+        self.cpu.I = 0x300
+        self.memory.write_16bit(0x300, 0xFFFF)
+
+        self.cpu.write_V(0xA, 0x3C)
+        self.cpu.write_V(0xB, 0x0)
+        self.cpu.opcode_DXY0(0xA, 0xB)
+
+        # wraps from x = 60
+        self.assert_screen_byte_value(0x07, 0x0F)
+        self.assert_screen_byte_value(0x00, 0xFF)
+        self.assert_screen_byte_value(0x01, 0xF0)
 
     def test_opcode_EX9E_should_skip_next_instruction_if_given_key_was_pressed(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(0xA, 0x5)
 
         self.keyboard.press_key(0x5)
@@ -651,7 +799,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_data_register_value(0xA, 0x5)
 
     def test_opcode_EX9E_should_not_skip_next_instruction_if_given_key_was_not_pressed(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(0xA, 0x6)
 
         self.keyboard.press_key(0x5)
@@ -662,7 +810,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_data_register_value(0xA, 0x6)
 
     def test_opcode_EXA1_should_skip_next_instruction_if_given_key_was_not_pressed(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(0xA, 0x2)
 
         self.keyboard.press_key(0xA)
@@ -673,7 +821,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_data_register_value(0xA, 0x2)
 
     def test_opcode_EXA1_should_not_skip_next_instruction_if_given_key_was_pressed(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
         self.cpu.write_V(0xA, 0xF)
 
         self.keyboard.press_key(0xF)
@@ -687,8 +835,53 @@ class CpuOpcodesTestCase(unittest.TestCase):
         # TODO: impl
         pass
 
+    def test_opcode_F000_should_load_the_following_16bit_address(self):
+        if not self.cpu.quirks.long_load:
+            self.skipTest('F000 NNNN is decoded with the long load quirk only')
+        self.cpu.write_register_pc(0x300)
+        self.memory.write_16bit(0x300, 0xBEEF)
+
+        self.cpu.opcode_F000()
+
+        self.assert_equal_hex(self.cpu.I, 0xBEEF)
+        self.assert_equal_hex(self.cpu.PC, 0x302)
+
+    def test_opcode_F000_should_fail_without_the_address(self):
+        if not self.cpu.quirks.long_load:
+            self.skipTest('F000 NNNN is decoded with the long load quirk only')
+        self.cpu.write_register_pc(self.memory.size)
+
+        with self.assertRaises(Exception):
+            self.cpu.opcode_F000()
+
+    def test_opcode_FN01_should_select_the_drawn_planes(self):
+        self.cpu.I = 0x300
+        self.memory.write_range(0x300, bytes([0xF0, 0x0F, 0xFF, 0x81]))
+
+        self.cpu.opcode_FN01(0x2)
+        self.cpu.opcode_DXYK(0x0, 0x0, 0x2)
+
+        self.assertEqual(self.display.framebuffer(), bytes(DISPLAY_SIZE))
+        self.assertEqual(self.display.framebuffer(1)[0x00:0x09], bytes([0xF0, 0, 0, 0, 0, 0, 0, 0, 0x0F]))
+
+        # both planes read 2 rows each, the collision is on the second plane
+        self.cpu.opcode_FN01(0x3)
+        self.cpu.opcode_DXYK(0x0, 0x0, 0x2)
+
+        self.assert_data_register_value(0xF, 1)
+        self.assert_screen_byte_value(0x00, 0xF0)
+        self.assert_screen_byte_value(0x08, 0x0F)
+        self.assertEqual(self.display.framebuffer(1)[0x00:0x09], bytes([0x0F, 0, 0, 0, 0, 0, 0, 0, 0x8E]))
+
+        # the first plane only
+        self.cpu.opcode_FN01(0x1)
+        self.cpu.opcode_00E0()
+
+        self.assertEqual(self.display.framebuffer(), bytes(DISPLAY_SIZE))
+        self.assertNotEqual(self.display.framebuffer(1), bytes(DISPLAY_SIZE))
+
     def test_opcode_FX07_should_set_register_to_delay_timer_value(self):
-        self.memory.write_8bit(Cpu.REGISTER_DT_ADDRESS, 0xD)
+        self.cpu.DT = 0xD
         self.cpu.write_V(0xD, 0x1)
 
         self.cpu.opcode_FX07(0xD)
@@ -706,14 +899,32 @@ class CpuOpcodesTestCase(unittest.TestCase):
 
 
     def test_opcode_FX0A_should_store_key_pressed_in_register(self):
-        self.cpu.handle_pygame_events = self.generate_keyboad_key_pressed_events
-
         self.cpu.write_V(0xA, 0x1)
+        self.cpu.write_register_pc(0x202)
 
-        self.keyboard.press_key(0xF)
         self.cpu.opcode_FX0A(0xA)
 
+        self.assertEqual(self.cpu.waiting_key_register, 0xA)
+        self.assertTrue(self.cpu.is_waiting_key())
+        self.assert_data_register_value(0xA, 0x1)
+        self.assertEqual(self.cpu.PC, 0x200)
+
+        self.generate_keyboad_key_pressed_events()
+        self.cpu.write_register_pc(0x202)
+        self.cpu.opcode_FX0A(0xA)
+
+        self.assertIsNone(self.cpu.waiting_key_register)
         self.assert_data_register_value(0xA, 0xF)
+        self.assertEqual(self.cpu.PC, 0x202)
+
+    def test_opcode_FX0A_should_ignore_key_released_before(self):
+        self.keyboard.send_key(0x3)
+        self.cpu.write_register_pc(0x202)
+
+        self.cpu.opcode_FX0A(0x1)
+
+        self.assertEqual(self.cpu.waiting_key_register, 0x1)
+        self.assertEqual(self.cpu.PC, 0x200)
 
     def test_opcode_FX15_should_set_delay_timer_using_register_value(self):
         self.cpu.write_V(0x9, 0xA)
@@ -729,17 +940,46 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.cpu.opcode_FX18(0x9)
 
         self.assert_memory_address_8bit_value(Cpu.REGISTER_ST_ADDRESS, 0x3)
+        self.assertTrue(self.sound.playing)
+
+    def test_sound_should_stop_when_sound_timer_ends(self):
+        self.cpu.write_V(0x9, 0x3)
+        self.cpu.opcode_FX18(0x9)
+
+        self.cpu.tick_timers(2)
+        self.assertTrue(self.sound.playing)
+
+        self.cpu.tick_timers()
+        self.assertFalse(self.sound.playing)
+
+    def test_opcode_FX3A_should_set_pitch(self):
+        self.cpu.write_V(0x2, 0x70)
+
+        self.cpu.opcode_FX3A(0x2)
+
+        self.assertEqual(self.cpu.pitch, 0x70)
+        self.assertEqual(self.sound.pitch, 0x70)
+
+    def test_opcode_F002_should_load_audio_pattern(self):
+        pattern = bytes(range(0x10, 0x20))
+        self.memory.write_range(0x300, pattern)
+        self.cpu.I = 0x300
+
+        self.cpu.opcode_F002()
+
+        self.assertEqual(bytes(self.cpu.audio_pattern), pattern)
+        self.assertEqual(self.sound.pattern, pattern)
 
     def test_opcode_FX1E_should_add_register_value_to_register_I(self):
         self.cpu.write_V(0x5, 0x4)
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x300)
+        self.cpu.I = 0x300
 
         self.cpu.opcode_FX1E(0x5)
 
         self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x304)
 
     def test_opcode_FX29_should_set_register_I_to_font_sprite_defined_in_register(self):
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x200)
+        self.cpu.I = 0x200
 
         self.cpu.write_V(0xA, 0x1)
         self.cpu.opcode_FX29(0xA)
@@ -757,13 +997,27 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.cpu.opcode_FX29(0xA)
         self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x4B)
 
+    def test_opcode_FX30_should_set_register_I_to_big_font_sprite_defined_in_register(self):
+        self.cpu.write_V(0xA, 0x0)
+        self.cpu.opcode_FX30(0xA)
+        self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x50)
+        self.assertEqual(self.memory.read_range(self.cpu.I, 10), bytes([0x3C, 0x7E, 0xE7, 0xC3, 0xC3, 0xC3, 0xC3, 0xE7, 0x7E, 0x3C]))
+
+        self.cpu.write_V(0xA, 0x9)
+        self.cpu.opcode_FX30(0xA)
+        self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0xAA)
+
+        self.cpu.write_V(0xA, 0xF)
+        self.cpu.opcode_FX30(0xA)
+        self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0xE6)
+
     def test_opcode_FX33_store_BCD(self):
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x500)
+        self.cpu.I = 0x500
         self.cpu.write_V(0xD, 0xF2) # 242
 
         self.cpu.opcode_FX33(0xD)
 
-        addr = self.memory.read_16bit(Cpu.REGISTER_I_ADDRESS)
+        addr = self.cpu.I
         self.assert_memory_address_8bit_value(addr, 0x2)
         self.assert_memory_address_8bit_value(addr + 1, 0x4)
         self.assert_memory_address_8bit_value(addr + 2, 0x2)
@@ -771,7 +1025,7 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x500)
 
     def test_opcode_FX55_should_copy_data_registers_values_into_memory(self):
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x700)
+        self.cpu.I = 0x700
         self.cpu.write_V(0x0, 0xAA)
         self.cpu.write_V(0x1, 0xBB)
         self.cpu.write_V(0x2, 0xCC)
@@ -786,10 +1040,10 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_memory_address_8bit_value(0x703, 0x19)
         self.assert_memory_address_8bit_value(0x704, 0x20)
         # COSMAC VIP changes I
-        self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x705)
+        self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, self.expected_I_after_load_store(0x700, 0x4))
 
     def test_opcode_FX65_should_copy_range_memory_value_into_data_registers(self):
-        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x700)
+        self.cpu.I = 0x700
         self.memory.write_8bit(0x700, 0xAA)
         self.memory.write_8bit(0x701, 0xBB)
         self.memory.write_8bit(0x702, 0xCC)
@@ -804,5 +1058,5 @@ class CpuOpcodesTestCase(unittest.TestCase):
         self.assert_data_register_value(0x3, 0x19)
         self.assert_data_register_value(0x4, 0x20)
         # COSMAC VIP changes I
-        self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, 0x705)
+        self.assert_memory_address_16bit_value(Cpu.REGISTER_I_ADDRESS, self.expected_I_after_load_store(0x700, 0x4))
 
@@ -12,7 +12,7 @@ from Sound import Sound
 class CpuRegistersTestCase(unittest.TestCase):
     def setUp(self):
         self.memory = Memory()
-        self.display = Display(self.memory)
+        self.display = Display()
         self.keyboard = Keyboard()
         self.sound = Sound(mocked=True)
 
@@ -34,46 +34,83 @@ class CpuRegistersTestCase(unittest.TestCase):
     def test_data_register_write(self):
         self.cpu.write_V(0, 0x100)
         self.assertEqual(0x0, self.cpu.read_V(0))
-        self.assertEqual(0x0, self.memory.read_8bit(0xEF0))
 
         self.cpu.write_V(0xA, 0x1F0)
         self.assertEqual(0xF0, self.cpu.read_V(0xA))
-        self.assertEqual(0xF0, self.memory.read_8bit(0xEFA))
 
         self.cpu.write_V(0xF, 0x1FF)
         self.assertEqual(0xFF, self.cpu.read_V(0xF))
+
+        self.cpu.sync_registers_to_memory()
+        self.assertEqual(0x0, self.memory.read_8bit(0xEF0))
+        self.assertEqual(0xF0, self.memory.read_8bit(0xEFA))
         self.assertEqual(0xFF, self.memory.read_8bit(0xEFF))
 
 
     def test_pc_register_write(self):
         self.cpu.write_register_pc(0x200)
 
-        self.assertEqual(self.memory.read_16bit(0xED0), 0x200)
+        self.assertEqual(self.cpu.PC, 0x200)
+
+    def test_registers_should_not_be_written_into_memory_by_default(self):
+        self.memory.write_16bit(0x200, 0x6A42) # VA = 0x42
+        self.cpu.write_register_pc(0x200)
+
+        self.cpu.execute_cpu_cycle()
+
+        self.assertEqual(self.cpu.read_V(0xA), 0x42)
+        self.assertEqual(self.memory.read_8bit(0xEFA), 0x0)
+
+    def test_registers_should_be_mirrored_into_memory(self):
+        cpu = Cpu(self.memory, self.display, self.keyboard, self.sound, mirror_registers=True)
+        self.memory.write_16bit(0x200, 0x6A42) # VA = 0x42
+        self.memory.write_16bit(0x202, 0xA123) # I = 0x123
+        cpu.write_register_pc(0x200)
+
+        cpu.execute_cpu_cycle()
+        cpu.execute_cpu_cycle()
+
+        self.assertEqual(self.memory.read_8bit(0xEFA), 0x42)
+        self.assertEqual(self.memory.read_16bit(Cpu.REGISTER_I_ADDRESS), 0x123)
+        self.assertEqual(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x204)
+
+    def test_registers_should_be_loaded_from_memory(self):
+        self.memory.write_8bit(0xEF3, 0x33)
+        self.memory.write_16bit(Cpu.REGISTER_I_ADDRESS, 0x456)
+        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x300)
+        self.memory.write_8bit(Cpu.REGISTER_DT_ADDRESS, 0x10)
+
+        self.cpu.load_registers_from_memory()
+
+        self.assertEqual(self.cpu.read_V(0x3), 0x33)
+        self.assertEqual(self.cpu.I, 0x456)
+        self.assertEqual(self.cpu.PC, 0x300)
+        self.assertEqual(self.cpu.DT, 0x10)
 
     def test_sp_register_read_address(self):
         # Fake stack
         self.memory.write_16bit(0xEA0, 0x200)
         self.memory.write_16bit(0xEA2, 0x202)
         # Set initial SP
-        self.memory.write_8bit(Cpu.REGISTER_SP_ADDRESS, 0x2)
+        self.cpu.SP = 0x2
 
         popped_address = self.cpu.read_top_address_in_stack()
 
         self.assertEqual(popped_address, 0x202)
-        self.assertEqual(self.memory.read_8bit(Cpu.REGISTER_SP_ADDRESS), 0x2)
+        self.assertEqual(self.cpu.SP, 0x2)
 
     def test_pc_register_increment(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
 
         self.cpu.step_pc()
 
-        self.assertEqual(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x202)
+        self.assertEqual(self.cpu.PC, 0x202)
 
     def test_pc_register_increments(self):
-        self.memory.write_16bit(Cpu.REGISTER_PC_ADDRESS, 0x200)
+        self.cpu.write_register_pc(0x200)
 
         self.cpu.step_pc()
         self.cpu.step_pc()
 
-        self.assertEqual(self.memory.read_16bit(Cpu.REGISTER_PC_ADDRESS), 0x204)
+        self.assertEqual(self.cpu.PC, 0x204)
 
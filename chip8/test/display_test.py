@@ -0,0 +1,323 @@
+import unittest
+import sys
+
+from unittest.mock import patch
+
+import pygame
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Display import *
+from Keyboard import Keyboard
+from Memory import Memory
+from Sound import Sound
+
+class DisplayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.memory = Memory()
+        self.display = Display()
+        self.display.screen = pygame.Surface(SCREEN_SIZE)
+        self.cpu = Cpu(self.memory, self.display, Keyboard(), Sound(mocked=True))
+
+    def render(self):
+        with patch('pygame.display.update') as update:
+            self.display.render()
+        return update
+
+    def pixel(self, x, y):
+        return tuple(self.display.screen.get_at((x * PIXEL_SCALE, y * PIXEL_SCALE)))[:3]
+
+    def test_clear_screen_should_mark_all_rows(self):
+        self.display.dirty_rows.clear()
+
+        self.cpu.opcode_00E0()
+
+        self.assertEqual(self.display.dirty_rows, set(range(32)))
+
+    def test_draw_should_mark_written_rows(self):
+        self.display.dirty_rows.clear()
+        self.cpu.write_V(0x0, 0xC) # x
+        self.cpu.write_V(0x1, 0x2) # y
+        self.cpu.I = 0x0 # font 0, 5 rows
+
+        self.cpu.opcode_DXYK(0x0, 0x1, 0x5)
+
+        self.assertEqual(self.display.dirty_rows, set(range(2, 7)))
+
+    def test_draw_wrapped_should_mark_rows_at_top(self):
+        self.display.dirty_rows.clear()
+        self.cpu.write_V(0x0, 0x0)
+        self.cpu.write_V(0x1, 0x1E) # y = 30
+        self.cpu.I = 0x0
+
+        self.cpu.opcode_DXYK(0x0, 0x1, 0x5)
+
+        self.assertEqual(self.display.dirty_rows, {30, 31, 0, 1, 2})
+
+    def test_memory_writes_should_not_mark(self):
+        self.display.dirty_rows.clear()
+
+        self.memory.write_16bit(0xEFF, 0xFFFF)
+        self.memory.write_range(0xF00, bytes([0xFF] * 0x100))
+
+        self.assertEqual(self.display.dirty_rows, set())
+        self.assertEqual(self.display.framebuffer(), bytes(DISPLAY_SIZE))
+
+    def test_render_should_update_only_dirty_rows(self):
+        self.render()
+
+        self.display.draw_sprite(16, 1, bytes([0xA0]))
+        self.display.draw_sprite(39, 1, bytes([0x80]))
+        update = self.render()
+
+        rects = update.call_args.args[0]
+        self.assertEqual(rects, [pygame.Rect(0, PIXEL_SCALE, SCREEN_SCALED_WIDTH, PIXEL_SCALE)])
+        self.assertEqual(self.pixel(16, 1), PIXEL_ON)
+        self.assertEqual(self.pixel(17, 1), PIXEL_OFF)
+        self.assertEqual(self.pixel(18, 1), PIXEL_ON)
+        self.assertEqual(self.pixel(39, 1), PIXEL_ON)
+        self.assertEqual(len(self.display.dirty_rows), 0)
+
+    def test_render_without_changes_should_not_update(self):
+        self.render()
+
+        update = self.render()
+
+        update.assert_not_called()
+
+    def test_render_hires(self):
+        self.display.set_hires(True)
+        self.display.draw_sprite(127, 63, bytes([0x80]))
+
+        update = self.render()
+
+        self.assertEqual(len(update.call_args.args[0]), 64)
+        hires_scale = PIXEL_SCALE // 2
+        self.assertEqual(tuple(self.display.screen.get_at((127 * hires_scale, 63 * hires_scale)))[:3], PIXEL_ON)
+        self.assertEqual(tuple(self.display.screen.get_at((126 * hires_scale, 63 * hires_scale)))[:3], PIXEL_OFF)
+
+    def test_pixels(self):
+        self.display.buffer[0x09] = 0xA0 # row 1, byte 1
+
+        pixels = self.display.pixels()
+
+        self.assertEqual(pixels.shape, (32, 64))
+        self.assertEqual(pixels.sum(), 2)
+        self.assertEqual(pixels[1, 8], 1)
+        self.assertEqual(pixels[1, 10], 1)
+
+    def test_planes_should_pick_the_palette_colors(self):
+        self.display.select_planes(0x3)
+        self.display.draw_sprite(0, 0, bytes([0xC0, 0xA0]))
+        self.render()
+
+        self.assertEqual(list(self.display.pixels()[0, :4]), [3, 1, 2, 0])
+        self.assertEqual(self.display.to_text().split('\n')[0][:4], '%#+.')
+        self.assertEqual([self.pixel(x, 0) for x in range(4)], [PALETTE[3], PALETTE[1], PALETTE[2], PALETTE[0]])
+
+    def test_scroll_should_move_the_selected_planes(self):
+        self.display.planes[0][0x00] = 0xFF
+        self.display.planes[1][0x00] = 0xFF
+
+        self.display.select_planes(0x2)
+        self.display.scroll_down(1)
+
+        self.assertEqual(self.display.framebuffer()[0x00], 0xFF)
+        self.assertEqual(self.display.framebuffer(1)[0x00:0x09], bytes([0, 0, 0, 0, 0, 0, 0, 0, 0xFF]))
+
+        self.display.select_planes(0x0)
+        self.display.scroll_up(1)
+        self.display.clear()
+
+        self.assertEqual(self.display.framebuffer(1)[0x08], 0xFF)
+
+    def test_reset_should_clear_every_plane(self):
+        self.display.select_planes(0x3)
+        self.display.set_hires(True)
+        self.display.draw_sprite(0, 0, bytes([0xFF, 0xFF]))
+
+        self.display.reset()
+
+        self.assertFalse(self.display.hires)
+        self.assertEqual(self.display.selected_planes, [self.display.buffer])
+        self.assertEqual(self.display.pixels().sum(), 0)
+
+    def test_headless_display_should_not_track_rows(self):
+        display = Display(headless=True)
+
+        display.draw_sprite(0, 0, bytes([0xFF]))
+        display.render()
+
+        self.assertEqual(len(display.dirty_rows), 0)
+        self.assertEqual(display.framebuffer()[0], 0xFF)
+
+    def test_set_hires_should_clear_and_resize(self):
+        self.display.draw_sprite(0, 0, bytes([0xFF]))
+
+        self.display.set_hires(True)
+
+        self.assertEqual((self.display.width, self.display.height), (128, 64))
+        self.assertEqual(self.display.framebuffer(), bytes(HIRES_DISPLAY_SIZE))
+        self.assertEqual(self.display.pixels().shape, (64, 128))
+        self.assertEqual(len(self.display.to_text().splitlines()), 64)
+
+        self.display.set_hires(False)
+        self.assertEqual(len(self.display.framebuffer()), DISPLAY_SIZE)
+
+    def test_draw_should_wrap_in_the_current_resolution(self):
+        self.display.set_hires(True)
+
+        # x = 0x82 is 2 in 128 columns, y = 0x41 is 1 in 64 rows
+        self.display.draw_sprite(0x82, 0x41, bytes([0xFF]))
+
+        self.assertEqual(self.display.buffer[HIRES_ROW_WIDTH_OFFSET:(HIRES_ROW_WIDTH_OFFSET + 2)], bytes([0x3F, 0xC0]))
+
+    def test_scroll_down(self):
+        self.display.draw_sprite(0, 0, bytes([0xFF, 0x81]))
+
+        self.display.scroll_down(3)
+
+        framebuffer = self.display.framebuffer()
+        self.assertEqual(framebuffer[3 * ROW_WIDTH_OFFSET], 0xFF)
+        self.assertEqual(framebuffer[4 * ROW_WIDTH_OFFSET], 0x81)
+        self.assertEqual(sum(framebuffer), 0xFF + 0x81)
+
+    def test_scroll_down_should_drop_the_bottom_rows(self):
+        self.display.draw_sprite(0, 31, bytes([0xFF]))
+
+        self.display.scroll_down(1)
+
+        self.assertEqual(self.display.framebuffer(), bytes(DISPLAY_SIZE))
+
+    def test_scroll_right_should_cross_bytes(self):
+        self.display.draw_sprite(6, 2, bytes([0xC3]))
+
+        self.display.scroll_right(4)
+
+        row = self.display.framebuffer()[2 * ROW_WIDTH_OFFSET:3 * ROW_WIDTH_OFFSET]
+        self.assertEqual(row, bytes([0x00, 0x30, 0xC0, 0, 0, 0, 0, 0]))
+
+    def test_scroll_left_should_drop_the_left_columns(self):
+        self.display.draw_sprite(0, 0, bytes([0xFF]))
+        self.display.draw_sprite(60, 0, bytes([0xF0]))
+
+        self.display.scroll_left(4)
+
+        row = self.display.framebuffer()[:ROW_WIDTH_OFFSET]
+        self.assertEqual(row, bytes([0xF0, 0, 0, 0, 0, 0, 0, 0xF0]))
+
+    def test_scroll_hires(self):
+        self.display.set_hires(True)
+        self.display.draw_sprite(120, 63, bytes([0x01]))
+
+        self.display.scroll_right(4)
+        self.assertEqual(sum(self.display.framebuffer()), 0)
+
+        self.display.draw_sprite(0, 0, bytes([0x80]))
+        self.display.scroll_right(4)
+        self.display.scroll_down(10)
+        self.assertEqual(self.display.buffer[10 * HIRES_ROW_WIDTH_OFFSET], 0x08)
+
+    def test_draw_large_sprite(self):
+        self.display.set_hires(True)
+        sprite = bytes([0xFF, 0x01] * 16)
+
+        collision = self.display.draw_large_sprite(4, 60, sprite)
+
+        self.assertFalse(collision)
+        # 16 rows from 60, wrapped to the top
+        for y in list(range(60, 64)) + list(range(12)):
+            offset = y * HIRES_ROW_WIDTH_OFFSET
+            self.assertEqual(self.display.buffer[offset:(offset + 3)], bytes([0x0F, 0xF0, 0x10]))
+        self.assertEqual(sum(self.display.framebuffer()), 16 * (0x0F + 0xF0 + 0x10))
+
+        self.assertTrue(self.display.draw_large_sprite(4, 60, sprite))
+        self.assertEqual(self.display.framebuffer(), bytes(HIRES_DISPLAY_SIZE))
+
+    def test_snapshot_restore(self):
+        self.display.set_hires(True)
+        self.display.draw_sprite(100, 50, bytes([0xAA]))
+        data = self.display.snapshot()
+
+        display = Display(headless=True)
+        display.restore(data)
+
+        self.assertTrue(display.hires)
+        self.assertEqual(display.framebuffer(), self.display.framebuffer())
+        self.assertEqual(len(data), Display.SNAPSHOT.size)
+
+    def test_snapshot_restore_planes(self):
+        self.display.select_planes(0x2)
+        self.display.draw_sprite(8, 4, bytes([0x3C]))
+
+        display = Display(headless=True)
+        display.restore(self.display.snapshot())
+
+        self.assertEqual(display.plane_mask, 0x2)
+        self.assertEqual(display.selected_planes, [display.planes[1]])
+        self.assertEqual(display.framebuffer(1), self.display.framebuffer(1))
+        self.assertEqual(display.framebuffer(), bytes(DISPLAY_SIZE))
+
+class DrawSpriteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.buffer = bytearray(0x100)
+
+    def test_draw_in_the_middle_of_bytes(self):
+        collision = draw_sprite(self.buffer, 0, 8, 32, 13, 1, bytes([0xFF, 0x81]))
+
+        self.assertFalse(collision)
+        self.assertEqual(self.buffer[8:11], bytes([0x00, 0x07, 0xF8]))
+        self.assertEqual(self.buffer[16:19], bytes([0x00, 0x04, 0x08]))
+
+    def test_draw_should_wrap_in_x_and_y(self):
+        draw_sprite(self.buffer, 0, 8, 32, 60, 31, bytes([0xFF, 0xFF]))
+
+        self.assertEqual(self.buffer[31 * 8 + 7], 0x0F)
+        self.assertEqual(self.buffer[31 * 8], 0xF0)
+        self.assertEqual(self.buffer[7], 0x0F)
+        self.assertEqual(self.buffer[0], 0xF0)
+        self.assertEqual(sum(self.buffer), 2 * 0xFF)
+
+    def test_collision_should_be_kept_by_following_rows(self):
+        self.buffer[0] = 0x80
+        self.buffer[8] = 0x01
+
+        # first row erases a pixel, the second one only draws over an unrelated lit pixel
+        collision = draw_sprite(self.buffer, 0, 8, 32, 0, 0, bytes([0x80, 0x80]))
+
+        self.assertTrue(collision)
+        self.assertEqual(self.buffer[0], 0x00)
+        self.assertEqual(self.buffer[8], 0x81)
+
+    def test_draw_at_base_address(self):
+        memory = bytearray(0x1000)
+
+        draw_sprite(memory, 0xF00, 8, 32, 0, 0, bytes([0xAA]))
+
+        self.assertEqual(memory[0xF00], 0xAA)
+        self.assertEqual(sum(memory), 0xAA)
+
+class DrawWideSpriteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.buffer = bytearray(0x400)
+
+    def test_draw_should_span_three_bytes(self):
+        collision = draw_wide_sprite(self.buffer, 0, 16, 64, 3, 2, bytes([0x80, 0x01, 0xFF, 0xFF]))
+
+        self.assertFalse(collision)
+        self.assertEqual(self.buffer[32:35], bytes([0x10, 0x00, 0x20]))
+        self.assertEqual(self.buffer[48:51], bytes([0x1F, 0xFF, 0xE0]))
+
+    def test_draw_should_wrap_in_x(self):
+        draw_wide_sprite(self.buffer, 0, 16, 64, 120, 0, bytes([0xFF, 0xFF]))
+
+        self.assertEqual(self.buffer[15], 0xFF)
+        self.assertEqual(self.buffer[0], 0xFF)
+        self.assertEqual(self.buffer[1], 0x00)
+
+    def test_collision(self):
+        self.buffer[2] = 0x01 # pixel 23
+
+        self.assertTrue(draw_wide_sprite(self.buffer, 0, 16, 64, 8, 0, bytes([0x00, 0x01])))
+        self.assertEqual(self.buffer[1:3], bytes([0x00, 0x00]))
@@ -0,0 +1,127 @@
+import unittest
+import sys
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Emulator import Emulator
+
+class EmulatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.emulator = Emulator(headless=True)
+        self.memory = self.emulator.memory
+
+    def load_program(self, opcodes):
+        address = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+        for opcode in opcodes:
+            self.memory.write_16bit(address, opcode)
+            address += 2
+
+    def test_run_should_execute_the_given_number_of_instructions(self):
+        self.load_program([0x6A01, 0x7A01, 0x1202])
+
+        state = self.emulator.run(11)
+
+        self.assertEqual(state['V'][0xA], 0x6)
+        self.assertEqual(state['PC'], 0x202)
+        self.assertEqual(state['instructions_executed'], 11)
+
+    def test_timers_should_follow_the_virtual_clock(self):
+        self.load_program([0x6A3C, 0xFA15, 0x1204]) # DT = 60 and loop
+
+        state = self.emulator.run(300, clock_hz=600)
+        self.assertEqual(state['DT'], 30)
+
+        state = self.emulator.run(600, clock_hz=600)
+        self.assertEqual(state['DT'], 0)
+
+    def test_wait_key_should_not_block(self):
+        self.load_program([0xF50A, 0x1202])
+
+        state = self.emulator.run(10)
+        self.assertEqual(state['PC'], 0x200)
+
+        self.emulator.keyboard.send_key(0x7)
+        state = self.emulator.run(1)
+        self.assertEqual(state['PC'], 0x202)
+        self.assertEqual(state['V'][0x5], 0x7)
+
+    def test_wait_key_should_fast_forward_the_timers(self):
+        self.load_program([0x6A3C, 0xFA15, 0xF50A, 0x1206]) # DT = 60 and wait a key
+
+        state = self.emulator.run(303, clock_hz=600)
+        self.assertEqual(state['DT'], 30)
+        self.assertEqual(state['PC'], 0x204)
+        self.assertEqual(state['instructions_executed'], 303)
+
+        state = self.emulator.run(None, clock_hz=600)
+        self.assertEqual(state['instructions_executed'], 303)
+
+        state = self.emulator.run(10000, clock_hz=600)
+        self.assertEqual(state['DT'], 0)
+
+    def test_state_should_list_the_stack(self):
+        self.load_program([0x2204, 0x0000, 0x2208, 0x0000, 0x1208])
+
+        state = self.emulator.run(3)
+
+        self.assertEqual(state['stack'], [0x202, 0x206])
+
+    def test_xochip_should_run_in_64KB(self):
+        emulator = Emulator(headless=True, quirks='xochip')
+        # calls a subroutine at 0x2000 which loads I from a long address and stores V0 there
+        program = [0x22FE, 0x1202]
+        emulator.memory.write_range(Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS, b''.join(op.to_bytes(2, 'big') for op in program))
+        emulator.memory.write_range(0x2FE, bytes([0x60, 0x42, 0xF0, 0x00, 0xFF, 0xF0, 0xF0, 0x55, 0x00, 0xEE]))
+
+        state = emulator.run(3)
+
+        self.assertEqual(emulator.memory.size, 0x10000)
+        self.assertEqual(state['I'], 0xFFF0)
+        self.assertEqual(state['stack'], [0x202])
+
+        emulator.run(2)
+        self.assertEqual(emulator.memory.read_8bit(0xFFF0), 0x42)
+        # the stack is at the top of the memory, out of the program area
+        self.assertEqual(emulator.memory.read_16bit(0xFEA2), 0x202)
+        self.assertEqual(emulator.memory.read_16bit(0xEA2), 0x0000)
+
+    def test_reset_should_return_to_the_power_on_state(self):
+        power_on = self.emulator.snapshot()
+        self.emulator.load_rom('roms/test_opcode.ch8')
+        self.emulator.run_frames(10)
+
+        self.emulator.reset()
+
+        self.assertEqual(self.emulator.snapshot(), power_on)
+        self.assertEqual(self.emulator.state()['instructions_executed'], 0)
+        self.assertEqual(self.emulator.scheduler.frames, 0)
+
+    def test_framebuffer(self):
+        self.load_program([0x6000, 0xF029, 0x613C, 0xD105]) # font 0 at (60, 0)
+
+        self.emulator.run(4)
+
+        framebuffer = self.emulator.framebuffer()
+        self.assertEqual(len(framebuffer), 0x100)
+        self.assertEqual(framebuffer[7], 0x0F)
+        self.assertEqual(self.emulator.display.to_text().split('\n')[1], '.' * 60 + '#..#')
+
+    def test_run_rom(self):
+        self.emulator.load_rom('roms/test_opcode.ch8')
+
+        self.emulator.run(1000)
+
+        self.assertNotEqual(self.emulator.framebuffer(), bytes(0x100))
+
+    def test_framebuffer_hires(self):
+        self.load_program([0x00FF, 0x6008, 0xF030, 0x6170, 0x6201, 0xD12A, 0x00FB]) # big font 8 at (112, 1), scrolled right
+
+        self.emulator.run(7)
+
+        framebuffer = self.emulator.framebuffer()
+        self.assertEqual(len(framebuffer), 0x400)
+        self.assertEqual(framebuffer[0x10 + 14:0x10 + 16], bytes([0x03, 0xC0]))
+        lines = self.emulator.display.to_text().split('\n')
+        self.assertEqual(len(lines), 64)
+        self.assertEqual(lines[1], '.' * 118 + '####' + '.' * 6)
@@ -0,0 +1,145 @@
+import unittest
+import sys
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Emulator import Emulator
+from IdleLoop import IdleLoop
+from Memory import Memory
+
+class IdleLoopTestCase(unittest.TestCase):
+    # waits 20 ticks of the delay timer, draws a digit and jumps to itself
+    PROGRAM = [
+        0x6014, # V0 = 20
+        0xF015, # DT = V0
+        0xF107, # V1 = DT
+        0x3100, # skip if V1 == 0
+        0x1204, # loop
+        0xA00A, # I = font 2
+        0xD015, # draw
+        0x120E, # jump to itself
+    ]
+
+    def load_program(self, emulator, opcodes=PROGRAM):
+        address = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+        for opcode in opcodes:
+            emulator.memory.write_16bit(address, opcode)
+            address += 2
+
+    def run_reference(self, emulator, number_instructions, clock_hz):
+        """ Execute instruction by instruction, ticking the timers with the virtual clock. """
+
+        instructions_per_tick = clock_hz / Cpu.TIMERS_CLOCK_SPEED
+        next_tick = instructions_per_tick
+        for executed in range(1, number_instructions + 1):
+            emulator.cpu.execute_cpu_cycle()
+            if executed >= next_tick:
+                emulator.cpu.tick_timers()
+                next_tick += instructions_per_tick
+
+    def test_detect_loops(self):
+        memory = Memory()
+        for address, opcode in [(0x200, 0x1200), (0x210, 0xE39E), (0x212, 0x1210), (0x220, 0xF507), (0x222, 0x4503),
+                                (0x224, 0x1220), (0x230, 0xF507), (0x232, 0x3605), (0x234, 0x1230)]:
+            memory.write_16bit(address, opcode)
+
+        self.assertEqual(vars(IdleLoop.detect(memory, 0x200)), { 'start': 0x200, 'length': 1, 'kind': IdleLoop.JUMP })
+        self.assertEqual(vars(IdleLoop.detect(memory, 0x210)), { 'start': 0x210, 'length': 2, 'kind': IdleLoop.KEY })
+        self.assertEqual(vars(IdleLoop.detect(memory, 0x220)), { 'start': 0x220, 'length': 3, 'kind': IdleLoop.DELAY_TIMER })
+        # the test is on another register
+        self.assertIsNone(IdleLoop.detect(memory, 0x230))
+        self.assertIsNone(IdleLoop.detect(memory, 0x202))
+
+        self.assertEqual(IdleLoop.find(memory, 0x224).start, 0x220)
+        self.assertEqual(IdleLoop.find(memory, 0x212).start, 0x210)
+        self.assertIsNone(IdleLoop.find(memory, 0x226))
+
+    def test_detect_should_ignore_loops_past_0xFFF(self):
+        memory = Memory(Memory.XOCHIP_MEMORY_SIZE)
+        # jumps to 0x200, not to itself
+        memory.write_16bit(0x1200, 0x1200)
+
+        self.assertIsNone(IdleLoop.detect(memory, 0x1200))
+        self.assertIsNone(IdleLoop.find(memory, 0x1200))
+
+    def test_fast_forward_should_match_the_execution(self):
+        emulator, reference = Emulator(headless=True, seed=0), Emulator(headless=True, seed=0)
+        for machine in (emulator, reference):
+            self.load_program(machine)
+            for _ in range(3):
+                machine.cpu.execute_cpu_cycle()
+
+        cpu = emulator.cpu
+        loop = cpu.find_idle_loop()
+        self.assertEqual(loop.start, 0x204)
+
+        for number_instructions in (100, 7, 11):
+            self.assertEqual(cpu.fast_forward_idle_loop(loop, number_instructions), number_instructions)
+            for _ in range(number_instructions):
+                reference.cpu.execute_cpu_cycle()
+            self.assertEqual(emulator.snapshot(), reference.snapshot())
+
+    def test_fast_forward_should_stop_when_the_loop_is_left(self):
+        emulator = Emulator(headless=True)
+        self.load_program(emulator)
+        cpu = emulator.cpu
+        cpu.write_register_pc(0x204)
+
+        executed = cpu.fast_forward_idle_loop(cpu.find_idle_loop(), 100)
+
+        self.assertEqual(executed, 2)
+        self.assertEqual(cpu.PC, 0x20A)
+
+    def test_idle_loops_should_be_dropped_when_written(self):
+        emulator = Emulator(headless=True)
+        self.load_program(emulator)
+        cpu = emulator.cpu
+        cpu.write_register_pc(0x208)
+        self.assertEqual(cpu.find_idle_loop().start, 0x204)
+
+        emulator.memory.write_16bit(0x206, 0x3101)
+        self.assertEqual(cpu.find_idle_loop().start, 0x204)
+
+        emulator.memory.write_16bit(0x204, 0x6100)
+        self.assertFalse(cpu.find_idle_loop())
+
+    def test_scheduler_should_give_the_same_frames(self):
+        emulator, reference = Emulator(headless=True, seed=0), Emulator(headless=True, seed=0)
+        reference.scheduler.skip_idle_loops = False
+
+        for machine in (emulator, reference):
+            self.load_program(machine)
+            machine.run_frames(30)
+
+        self.assertEqual(emulator.snapshot(), reference.snapshot())
+        self.assertEqual(emulator.state(), reference.state())
+        self.assertIn('#', emulator.display.to_text())
+
+    def test_run_should_give_the_same_state(self):
+        for clock_hz in (600, 1000, 6000):
+            emulator, reference = Emulator(headless=True, seed=0), Emulator(headless=True, seed=0)
+            for machine in (emulator, reference):
+                self.load_program(machine)
+
+            emulator.run(clock_hz, clock_hz)
+            self.run_reference(reference, clock_hz, clock_hz)
+
+            self.assertEqual(emulator.snapshot(), reference.snapshot())
+
+    def test_run_should_end_in_endless_loops(self):
+        emulator = Emulator(headless=True)
+        self.load_program(emulator)
+
+        state = emulator.run(None, clock_hz=600)
+
+        self.assertEqual(state['PC'], 0x20E)
+        self.assertEqual(state['DT'], 0)
+        self.assertLess(state['instructions_executed'], 600)
+
+        executed = state['instructions_executed']
+        state = emulator.run(10 ** 9, clock_hz=600)
+        self.assertEqual(state['instructions_executed'], executed + 10 ** 9)
+
+if __name__ == '__main__':
+    unittest.main()
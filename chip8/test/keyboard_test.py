@@ -37,13 +37,6 @@ class KeyboardTest(unittest.TestCase):
         handled = self.keyboard.handle_pygame_event(event)
         self.assertFalse(handled)
 
-    def test_should_wait_for_key_press(self):
-        mocked_event = lambda: self.generate_keyboad_keypressed_events(pygame.K_c)
-
-        key_pressed = self.keyboard.wait_key_press(mocked_event)
-        self.assertEqual(key_pressed, 0xB)
-
-
     def test_should_set_last_pressed_key(self):
         self.generate_keyboad_keypressed_events(pygame.K_z)
 
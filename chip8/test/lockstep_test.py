@@ -0,0 +1,192 @@
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Display import Display
+from Keyboard import Keyboard
+from Lockstep import Lockstep
+from Memory import Memory
+from Sound import Sound
+
+# ROMs running without random numbers or key presses for the first instructions
+ROMS = ['test_opcode.ch8', 'flags_test.ch8', 'PONG', 'heart_monitor.ch8']
+
+def read_rom(name):
+    with open(f'roms/{name}', 'rb') as f:
+        return f.read()
+
+def create_cpu(rom):
+    memory = Memory()
+    cpu = Cpu(memory, Display(headless=True), Keyboard(), Sound(headless=True), headless=True)
+    memory.write_range(Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS, rom)
+    return cpu
+
+class LockstepTestCase(unittest.TestCase):
+    def assert_machine_matches_cpu(self, lockstep, machine, cpu):
+        self.assertEqual(lockstep.PC[machine], cpu.PC)
+        self.assertEqual(lockstep.I[machine], cpu.I)
+        self.assertEqual(lockstep.SP[machine], cpu.SP)
+        self.assertEqual(lockstep.DT[machine], cpu.DT)
+        self.assertEqual(bytes(lockstep.V[machine]), bytes(cpu.V))
+        self.assertEqual(bytes(lockstep.memory[machine]), bytes(cpu.memory.memory))
+        self.assertEqual(bytes(lockstep.display[machine]), cpu.display.framebuffer())
+
+    def test_should_match_cpu_running_roms(self):
+        lockstep = Lockstep(len(ROMS) * 2)
+        cpus = []
+        for machine in range(lockstep.number_machines):
+            rom = read_rom(ROMS[machine % len(ROMS)])
+            lockstep.load_rom(rom, machine)
+            cpus.append(create_cpu(rom))
+
+        for frame in range(60):
+            lockstep.run_frames(1, 10)
+            for cpu in cpus:
+                for _ in range(10):
+                    cpu.execute_cpu_cycle()
+                cpu.tick_timers()
+
+        self.assertEqual(lockstep.instructions_executed, 600 * len(cpus))
+        self.assertFalse(lockstep.fault.any())
+        for machine, cpu in enumerate(cpus):
+            self.assert_machine_matches_cpu(lockstep, machine, cpu)
+
+    def test_should_match_cpu_opcodes(self):
+        program = [
+            0x6A7F, 0x6B81, 0x8AB4, # carry
+            0x6C05, 0x6D07, 0x8CD5, # borrow
+            0x6E03, 0x8EE6, 0x8EEE, 0x8F07, # shifts, VF as X
+            0x8AB1, 0x8AB2, 0x8AB3, 0x8AB0,
+            0x3A00, 0x6001, 0x4A00, 0x6002, 0x5AB0, 0x6003, 0x9AB0, 0x6004,
+            0x2260, # call
+            0xA300, 0xF333, 0xF265, 0xFA1E, 0xF029,
+            0x6F0C, 0x6E1E, 0xDEF5, 0xDEF5, # sprite wrapped, drawn twice
+            0xA320, 0xFF55,
+            0x6004, 0xB248, 0x0000, 0x0000, # jump to the loop at 0x248 + V0
+        ]
+        # loop at the end
+        program.append(0x1000 | (Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS + len(program) * 2))
+        # subroutine at 0x260
+        subroutine = [0x7105, 0xFA15, 0xFB18, 0xF407, 0x00EE]
+
+        rom = bytearray(0x70)
+        for i, opcode in enumerate(program):
+            rom[i * 2:(i * 2) + 2] = opcode.to_bytes(2, 'big')
+        for i, opcode in enumerate(subroutine):
+            rom[0x60 + i * 2:0x60 + (i * 2) + 2] = opcode.to_bytes(2, 'big')
+
+        lockstep = Lockstep(1)
+        lockstep.load_rom(bytes(rom))
+        cpu = create_cpu(bytes(rom))
+
+        for _ in range(len(program) + len(subroutine) + 5):
+            lockstep.step()
+            cpu.execute_cpu_cycle()
+            self.assert_machine_matches_cpu(lockstep, 0, cpu)
+
+    def test_wait_key(self):
+        lockstep = Lockstep(3)
+        lockstep.load_rom(bytes([0xF5, 0x0A, 0x12, 0x02]))
+
+        lockstep.run(5)
+        lockstep.release_key(0xB, [1])
+        lockstep.run(2)
+
+        self.assertEqual(list(lockstep.PC), [0x200, 0x202, 0x200])
+        self.assertEqual(lockstep.V[1, 5], 0xB)
+        self.assertEqual(lockstep.released_key[1], -1)
+
+    def test_wait_key_should_ignore_a_key_released_before(self):
+        rom = bytes([0xF3, 0x0A, 0x12, 0x02])
+        lockstep = Lockstep(1)
+        lockstep.load_rom(rom)
+        cpu = create_cpu(rom)
+
+        lockstep.release_key(0x5)
+        cpu.keyboard.release_key(0x5)
+        for _ in range(3):
+            lockstep.step()
+            cpu.execute_cpu_cycle()
+            self.assert_machine_matches_cpu(lockstep, 0, cpu)
+        self.assertEqual(lockstep.PC[0], 0x200)
+
+        lockstep.release_key(0x7)
+        cpu.keyboard.release_key(0x7)
+        for _ in range(3):
+            lockstep.step()
+            cpu.execute_cpu_cycle()
+            self.assert_machine_matches_cpu(lockstep, 0, cpu)
+        self.assertEqual(lockstep.V[0, 3], 0x7)
+
+    def test_keys(self):
+        lockstep = Lockstep(2)
+        lockstep.load_rom(bytes([0x60, 0x04, 0xE0, 0x9E, 0x61, 0x01, 0xE0, 0xA1, 0x62, 0x01]))
+        lockstep.press_key(0x4, [0])
+
+        lockstep.run(4)
+
+        self.assertEqual(list(lockstep.V[:, 1]), [0, 1])
+        self.assertEqual(list(lockstep.V[:, 2]), [1, 0])
+
+    def test_random_numbers(self):
+        lockstep = Lockstep(64, seed=1)
+        lockstep.load_rom(bytes([0xC0, 0x0F]))
+
+        lockstep.step()
+
+        self.assertTrue((lockstep.V[:, 0] <= 0x0F).all())
+        self.assertGreater(len(np.unique(lockstep.V[:, 0])), 1)
+        self.assertTrue((lockstep.random_number == lockstep.V[:, 0]).all())
+
+    def test_faults_should_halt_machines(self):
+        lockstep = Lockstep(3)
+        lockstep.load_rom(bytes([0x00, 0xEE]), [0]) # stack underflow
+        lockstep.load_rom(bytes([0x22, 0x00]), [1]) # stack overflow
+        lockstep.load_rom(bytes([0x12, 0x00]), [2])
+
+        lockstep.run(20)
+
+        self.assertEqual(list(lockstep.fault), [True, True, False])
+        self.assertEqual(lockstep.SP[1], Cpu.MEMORY_STACK_END_ADDRESS - Cpu.MEMORY_STACK_START_ADDRESS - 1)
+
+    def test_xochip_opcodes_should_halt_machines(self):
+        lockstep = Lockstep(5)
+        lockstep.load_rom(bytes([0xF0, 0x00, 0x03, 0x00]), [0]) # long load
+        lockstep.load_rom(bytes([0xF3, 0x01]), [1]) # both planes
+        lockstep.load_rom(bytes([0x00, 0xD2]), [2]) # scroll up
+        lockstep.load_rom(bytes([0x50, 0x32]), [3]) # save V0 to V3
+        # the default profile has no long load, F000 is skipped as 2 bytes
+        lockstep.load_rom(bytes([0x30, 0x00, 0xF0, 0x00, 0x12, 0x04]), [4])
+
+        lockstep.run(4)
+
+        self.assertEqual(list(lockstep.fault), [True, True, True, True, False])
+        self.assertEqual(lockstep.PC[4], 0x204)
+
+    def test_audio_and_unknown_fxkk_opcodes_should_halt_machines(self):
+        lockstep = Lockstep(4)
+        lockstep.load_rom(bytes([0xF3, 0x00]), [0]) # pitch
+        lockstep.load_rom(bytes([0xF3, 0x3A]), [1]) # pitch
+        lockstep.load_rom(bytes([0xF0, 0x02]), [2]) # audio pattern
+        lockstep.load_rom(bytes([0xF3, 0x99]), [3])
+
+        lockstep.run(1)
+
+        self.assertTrue(lockstep.fault.all())
+        self.assertEqual(list(lockstep.PC), [0x202] * 4)
+
+    def test_pixels(self):
+        lockstep = Lockstep(2)
+        lockstep.load_rom(bytes([0xD0, 0x05]), [1]) # font 0 at (0, 0)
+        lockstep.I[:] = 0
+
+        lockstep.step()
+
+        pixels = lockstep.pixels()
+        self.assertEqual(pixels.shape, (2, 32, 64))
+        self.assertEqual(pixels[0].sum(), 0)
+        self.assertEqual(list(pixels[1, 0, :4]), [1, 1, 1, 1])
@@ -43,3 +43,59 @@ class MemoryIOTestCase(unittest.TestCase):
         self.memory.write_16bit(0x200, 0xAFF00)
         self.assertEqual(self.memory.read_16bit(0x200), 0xFF00)
 
+
+    def test_read_range_should_not_copy(self):
+        data = self.memory.read_range(0x200, 4)
+        self.memory.write_16bit(0x202, 0xABCD)
+
+        self.assertListEqual(list(data), [0x0, 0x0, 0xAB, 0xCD])
+
+    def test_write_range(self):
+        written = []
+        self.memory.add_write_listener(lambda address, number_bytes: written.append((address, number_bytes)))
+
+        self.memory.write_range(0x300, bytes([0x12, 0x34, 0x56]))
+
+        self.assertEqual(self.memory.read_16bit(0x300), 0x1234)
+        self.assertEqual(self.memory.read_8bit(0x302), 0x56)
+        self.assertListEqual(written, [(0x300, 3)])
+
+    def test_range_out_of_memory(self):
+        with self.assertRaises(Exception):
+            self.memory.read_range(0xFFE, 3)
+        with self.assertRaises(Exception):
+            self.memory.write_range(0xFFF, bytes(2))
+        self.assertEqual(len(self.memory.memory), Memory.MEMORY_SIZE)
+
+    def test_xochip_memory(self):
+        memory = Memory(Memory.XOCHIP_MEMORY_SIZE)
+        memory.write_16bit(0xFFFE, 0xABCD)
+
+        self.assertEqual(memory.size, 0x10000)
+        self.assertEqual(memory.read_16bit(0xFFFE), 0xABCD)
+        self.assertEqual(memory.read_range(0x050, 0xA0), self.memory.read_range(0x050, 0xA0))
+        with self.assertRaises(Exception):
+            memory.read_range(0xFFFF, 2)
+        with self.assertRaises(Exception):
+            Memory(0x1234)
+
+    def test_area_views(self):
+        self.assertEqual(len(self.memory.font_view()), 0x50)
+        self.assertEqual(len(self.memory.program_view()), 0xEA0 - 0x200)
+        self.assertEqual(len(self.memory.stack_view()), 0x20)
+        self.assertEqual(len(self.memory.registers_view()), 0x30)
+        self.assertEqual(len(self.memory.big_font_view()), 0xA0)
+
+        self.memory.write_8bit(0x058, 0x81)
+        self.assertEqual(self.memory.big_font_view()[8], 0x81)
+
+    def test_area_views_should_be_at_the_top_of_64KB(self):
+        memory = Memory(Memory.XOCHIP_MEMORY_SIZE)
+        memory.write_8bit(0xFEA0, 0x12)
+        memory.write_8bit(0xFEFF, 0x34)
+        memory.write_8bit(0xFE9F, 0x56)
+
+        self.assertEqual(len(memory.program_view()), 0xFEA0 - 0x200)
+        self.assertEqual(memory.program_view()[-1], 0x56)
+        self.assertEqual(memory.stack_view()[0], 0x12)
+        self.assertEqual(memory.registers_view()[-1], 0x34)
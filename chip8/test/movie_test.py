@@ -0,0 +1,130 @@
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Emulator import Emulator
+from Keyboard import Keyboard
+from Movie import Movie
+
+class MovieTestCase(unittest.TestCase):
+    # waits a key, then draws a random digit at the column of the key and loops back
+    PROGRAM = [0xF30A, 0xC40F, 0xF429, 0x00E0, 0xD345, 0x1200]
+
+    def create_emulator(self, engine='interpreter', seed=None, quirks=None):
+        emulator = Emulator(headless=True, engine=engine, seed=seed, quirks=quirks)
+        address = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+        for opcode in MovieTestCase.PROGRAM:
+            emulator.memory.write_16bit(address, opcode)
+            address += 2
+        return emulator
+
+    def record(self, emulator, keys_by_frame, seed=42):
+        frames = iter(keys_by_frame)
+        keyboard = emulator.keyboard
+
+        def handle_events():
+            keys = next(frames)
+            for key in range(0x10):
+                if key in keys:
+                    keyboard.press_key(key)
+                elif keyboard.is_key_pressing_down(key):
+                    keyboard.release_key(key)
+
+        movie = emulator.record_movie(seed, handle_events)
+        emulator.run_frames(len(keys_by_frame))
+        return movie
+
+    def test_should_record_the_keys_of_each_frame(self):
+        emulator = self.create_emulator()
+        movie = self.record(emulator, [[], [0x1], [0x1, 0x3], []])
+
+        self.assertEqual(list(movie.masks), [0b0, 0b10, 0b1010, 0b0])
+        self.assertEqual(movie.seed, 42)
+
+    def test_replay_should_be_bit_identical(self):
+        keys_by_frame = [[key % 16] if key % 3 else [] for key in range(60)]
+
+        for engine in Emulator.ENGINES:
+            emulator = self.create_emulator(engine, seed=1)
+            movie = self.record(emulator, keys_by_frame)
+            expected = emulator.state()
+            expected_snapshot = emulator.snapshot()
+
+            other = self.create_emulator(engine, seed=2)
+            state = other.replay(Movie.from_bytes(movie.to_bytes()))
+
+            self.assertEqual(state, expected)
+            self.assertEqual(other.snapshot(), expected_snapshot)
+
+    def test_save_and_load(self):
+        movie = Movie(-5, bytes(range(20)), 12, [0x0000, 0x8001, 0xFFFF], engine='recompiler', quirks='superchip')
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'run.c8m')
+            movie.save(filename)
+            loaded = Movie.load(filename)
+
+        self.assertEqual((loaded.seed, loaded.memory_hash, loaded.instructions_per_frame), (-5, bytes(range(20)), 12))
+        self.assertEqual(list(loaded.masks), [0x0000, 0x8001, 0xFFFF])
+        self.assertEqual((loaded.engine, loaded.quirks), ('recompiler', 'superchip'))
+
+    def test_version_2_movies_should_keep_the_doubled_jump(self):
+        data = bytearray(Movie(0, bytes(20), 10, [1, 2], quirks='cosmac_vip').to_bytes())
+        data[4:6] = Movie.LEGACY_VERSION.to_bytes(2, 'big')
+
+        self.assertEqual(Movie.from_bytes(bytes(data)).quirks, 'legacy')
+        self.assertEqual(Movie.from_bytes(Movie(0, bytes(20), 10, [1, 2], quirks='cosmac_vip').to_bytes()).quirks, 'cosmac_vip')
+
+    def test_should_reject_invalid_movies(self):
+        data = Movie(0, bytes(20), 10, [1, 2]).to_bytes()
+
+        with self.assertRaises(Exception):
+            Movie.from_bytes(b'XXXX' + data[4:])
+        with self.assertRaises(Exception):
+            Movie.from_bytes(data[:4] + bytes([0x00, 0x09]) + data[6:])
+        with self.assertRaises(Exception):
+            Movie.from_bytes(data[:10])
+
+    def test_replay_should_require_the_same_memory(self):
+        movie = self.record(self.create_emulator(), [[]])
+
+        emulator = self.create_emulator()
+        emulator.memory.write_8bit(0x300, 0x1)
+        with self.assertRaises(Exception):
+            emulator.replay(movie)
+
+    def test_replay_should_require_the_same_engine_and_quirks(self):
+        movie = self.record(self.create_emulator('recompiler', quirks='superchip'), [[]])
+        self.assertEqual((movie.engine, movie.quirks), ('recompiler', 'superchip'))
+
+        for engine, quirks in (('interpreter', 'superchip'), ('recompiler', None)):
+            with self.assertRaises(Exception):
+                self.create_emulator(engine, quirks=quirks).replay(movie)
+
+        self.create_emulator('recompiler', quirks='superchip').replay(movie)
+
+class KeyboardMaskTestCase(unittest.TestCase):
+    def test_apply_keys_mask_should_press_and_release(self):
+        keyboard = Keyboard()
+        keyboard.apply_keys_mask(0b1001)
+        self.assertEqual(keyboard.pressed_keys_mask(), 0b1001)
+        self.assertIsNone(keyboard.last_key_pressed)
+
+        keyboard.apply_keys_mask(0b1000)
+        self.assertEqual(keyboard.pressed_keys_mask(), 0b1000)
+        self.assertEqual(keyboard.last_key_pressed, 0x0)
+
+    def test_set_pressed_keys_mask_should_keep_the_latch(self):
+        keyboard = Keyboard()
+        keyboard.send_key(0x5)
+        keyboard.set_pressed_keys_mask(0x8000)
+
+        self.assertTrue(keyboard.is_key_pressing_down(0xF))
+        self.assertEqual(keyboard.last_key_pressed, 0x5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import sys
+
+sys.path.append('src')
+
+import cpu_opcodes_test
+import recompiler_test
+
+from Cpu import Cpu
+from Emulator import Emulator
+from Memory import Memory
+from Quirks import Quirks, PROFILES, DEFAULT_PROFILE
+
+class DispatchedOpcodesCpu(recompiler_test.RecompiledOpcodesCpu):
+    """ Cpu proxy that runs each `opcode_*` call as an instruction decoded by the dispatch table. """
+
+    def __init__(self, cpu):
+        object.__setattr__(self, 'cpu', cpu)
+
+    def execute(self, opcode):
+        address = self.cpu.PC - 2
+        if address < 0 or address + 1 >= Memory.MEMORY_SIZE:
+            address = DispatchedOpcodesCpu.SCRATCH_ADDRESS
+
+        self.cpu.memory.write_16bit(address, opcode)
+        self.cpu.write_register_pc(address)
+        self.cpu.execute_cpu_cycle()
+
+class DispatchedOpcodesTests:
+    """ The opcodes test suite executed through the dispatch table, so the quirks handlers are used. """
+
+    def setUp(self):
+        super().setUp()
+        self.cpu = DispatchedOpcodesCpu(self.cpu)
+
+# the opcodes test suite for every profile, interpreted and recompiled (the recompiler test
+# already runs it with the default profile)
+for profile in PROFILES:
+    class_name = ''.join(part.capitalize() for part in profile.split('_'))
+    globals()[f'{class_name}DispatchedOpcodesTestCase'] = type(
+        f'{class_name}DispatchedOpcodesTestCase', (DispatchedOpcodesTests, cpu_opcodes_test.CpuOpcodesTestCase),
+        { 'QUIRKS': profile })
+    if profile != DEFAULT_PROFILE:
+        globals()[f'{class_name}RecompiledOpcodesTestCase'] = type(
+            f'{class_name}RecompiledOpcodesTestCase', (recompiler_test.RecompilerOpcodesTestCase,), { 'QUIRKS': profile })
+
+class QuirksTestCase(unittest.TestCase):
+    PROGRAM = [
+        0x6AF1, # VA = 0xF1
+        0x6B0F, # VB = 0x0F
+        0x6C81, # VC = 0x81
+        0x8CA6, # VC = VA >> 1 (or VC >> 1)
+        0x8DCE, # VD = VC << 1 (or VD << 1)
+        0x6F07, # VF = 7
+        0x8AB1, # VA = VA | VB, resetting VF or not
+        0xA300, # I = 0x300
+        0xF355, # store V0 to V3
+        0x6002, # V0 = 2
+        0xB218, # jump to 0x218 + V0, 0x218 + 2 * V0 or 0x218 + V2
+        0x1216,
+        0x7E01, # 0x218: VE += 1
+        0x7E01, # 0x21A: VE += 1
+        0x7E01, # 0x21C: VE += 1
+        0x121E, # 0x21E: loop
+    ]
+
+    def load_program(self, emulator):
+        for offset, opcode in enumerate(QuirksTestCase.PROGRAM):
+            emulator.memory.write_16bit(Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS + 2 * offset, opcode)
+
+    def test_get(self):
+        self.assertIs(Quirks.get(None), PROFILES[DEFAULT_PROFILE])
+        self.assertIs(Quirks.get('superchip'), PROFILES['superchip'])
+
+        quirks = Quirks('custom', vf_reset=False)
+        self.assertIs(Quirks.get(quirks), quirks)
+
+        with self.assertRaises(Exception):
+            Quirks.get('unknown')
+        with self.assertRaises(Exception):
+            Quirks('custom', jump='v1')
+        with self.assertRaises(Exception):
+            Quirks('custom', load_store='decrement')
+
+    def test_dispatch_table_should_bind_the_quirks_handlers(self):
+        cpu = Emulator(headless=True, quirks='superchip').cpu
+
+        self.assertEqual(cpu.decode_opcode(0x8AB1).func, Cpu.opcode_8XY1_keep_vf)
+        self.assertEqual(cpu.decode_opcode(0x8AB6).func, Cpu.opcode_8XY6_shift_vx)
+        self.assertEqual(cpu.decode_opcode(0x8ABE).func, Cpu.opcode_8XYE_shift_vx)
+        self.assertEqual(cpu.decode_opcode(0xB218).func, Cpu.opcode_BXNN)
+        self.assertEqual(cpu.decode_opcode(0xB218).args, (cpu, 0x2, 0x18))
+        self.assertEqual(cpu.decode_opcode(0xF355).func, Cpu.opcode_FX55_keep_i)
+        self.assertEqual(cpu.decode_opcode(0xF365).func, Cpu.opcode_FX65_keep_i)
+
+        cpu = Emulator(headless=True).cpu
+        self.assertEqual(cpu.decode_opcode(0x8AB1).func, Cpu.opcode_8XY1)
+        self.assertEqual(cpu.decode_opcode(0xB218).func, Cpu.opcode_BNNN_V0)
+        self.assertEqual(cpu.decode_opcode(0xF355).func, Cpu.opcode_FX55)
+        self.assertEqual(cpu.decode_opcode(0x3A05).func, Cpu.opcode_3XKK)
+        self.assertEqual(cpu.decode_opcode(0xF000).func, Cpu.opcode_FX00)
+
+        cpu = Emulator(headless=True, quirks='legacy').cpu
+        self.assertEqual(cpu.decode_opcode(0xB218).func, Cpu.opcode_BNNN)
+
+        cpu = Emulator(headless=True, quirks='xochip').cpu
+        self.assertEqual(cpu.decode_opcode(0x3A05).func, Cpu.skip_over_long_load)
+        self.assertEqual(cpu.decode_opcode(0x3A05).args, (cpu, 0xA, 0x05))
+        self.assertEqual(cpu.decode_opcode(0x3A05).keywords, { 'skip_handler': Cpu.opcode_3XKK })
+        self.assertEqual(cpu.decode_opcode(0xF000).func, Cpu.opcode_F000)
+
+    def test_program_should_follow_the_profile(self):
+        expected = {
+            'cosmac_vip': { 'VC': 0x78, 'VD': 0xF0, 'VE': 2, 'VF': 0, 'I': 0x304 },
+            'legacy': { 'VC': 0x78, 'VD': 0xF0, 'VE': 1, 'VF': 0, 'I': 0x304 },
+            'chip48': { 'VC': 0x40, 'VD': 0x00, 'VE': 3, 'VF': 7, 'I': 0x303 },
+            'superchip': { 'VC': 0x40, 'VD': 0x00, 'VE': 3, 'VF': 7, 'I': 0x300 },
+            'xochip': { 'VC': 0x78, 'VD': 0xF0, 'VE': 2, 'VF': 7, 'I': 0x304 },
+        }
+
+        for profile in PROFILES:
+            states = []
+            for engine in Emulator.ENGINES:
+                with self.subTest(profile=profile, engine=engine):
+                    emulator = Emulator(headless=True, engine=engine, seed=0, quirks=profile)
+                    self.load_program(emulator)
+                    state = emulator.run_frames(3)
+
+                    V = state['V']
+                    self.assertEqual({ 'VC': V[0xC], 'VD': V[0xD], 'VE': V[0xE], 'VF': V[0xF], 'I': state['I'] },
+                                     expected[profile])
+                    states.append(emulator.snapshot())
+
+            self.assertEqual(states[0], states[1])
+
+    def test_long_load_should_only_be_decoded_by_xochip(self):
+        program = [
+            0x6001, # V0 = 1
+            0x3001, # skip F000 NNNN (xochip) or F000
+            0xF000, # long load (xochip) or pitch = V0
+            0x6A22, # the address (xochip) or VA = 0x22
+            0x7A01, # VA += 1
+            0xF000, # I = 0x6B05 (xochip) or pitch = V0
+            0x6B05, # the address (xochip) or VB = 5
+            0x120E, # loop
+        ]
+        long_load = { 'VA': 0x01, 'VB': 0x00, 'I': 0x6B05 }
+        # I keeps its initial value without the long load
+        pitch = { 'VA': 0x23, 'VB': 0x05, 'I': 0x200 }
+
+        for profile in PROFILES:
+            for engine in Emulator.ENGINES:
+                with self.subTest(profile=profile, engine=engine):
+                    emulator = Emulator(headless=True, engine=engine, seed=0, quirks=profile)
+                    for offset, opcode in enumerate(program):
+                        emulator.memory.write_16bit(Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS + 2 * offset, opcode)
+                    state = emulator.run_frames(1)
+
+                    V = state['V']
+                    self.assertEqual({ 'VA': V[0xA], 'VB': V[0xB], 'I': state['I'] },
+                                     long_load if profile == 'xochip' else pitch)
+
+if __name__ == '__main__':
+    unittest.main()
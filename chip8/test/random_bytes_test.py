@@ -0,0 +1,52 @@
+import unittest
+import sys
+
+sys.path.append('src')
+
+from RandomBytes import RandomBytes
+
+class RandomBytesTestCase(unittest.TestCase):
+    def draw(self, generator, number_bytes):
+        return [generator.next_byte() for _ in range(number_bytes)]
+
+    def test_same_seed_should_give_the_same_bytes(self):
+        self.assertEqual(self.draw(RandomBytes(7), 3000), self.draw(RandomBytes(7), 3000))
+
+    def test_different_seeds_should_give_different_bytes(self):
+        self.assertNotEqual(self.draw(RandomBytes(7), 64), self.draw(RandomBytes(8), 64))
+
+    def test_seed_should_restart_the_sequence(self):
+        generator = RandomBytes(7)
+        expected = self.draw(generator, 100)
+
+        generator.seed(7)
+        self.assertEqual(self.draw(generator, 100), expected)
+
+    def test_bytes_should_cover_all_values(self):
+        self.assertEqual(set(self.draw(RandomBytes(1), 8 * RandomBytes.BUFFER_SIZE)), set(range(0x100)))
+
+    def test_state_should_continue_the_sequence(self):
+        generator = RandomBytes(3)
+        for drawn in (0, 10, RandomBytes.BUFFER_SIZE - 1, RandomBytes.BUFFER_SIZE, RandomBytes.BUFFER_SIZE + 5):
+            generator.seed(3)
+            self.draw(generator, drawn)
+            state = generator.getstate()
+            expected = self.draw(generator, 2 * RandomBytes.BUFFER_SIZE)
+
+            other = RandomBytes(99)
+            other.setstate(state)
+            self.assertEqual(len(state), RandomBytes.STATE.size)
+            self.assertEqual(self.draw(other, 2 * RandomBytes.BUFFER_SIZE), expected)
+
+    def test_state_should_reject_a_position_past_the_buffer(self):
+        generator = RandomBytes(3)
+        expected = self.draw(RandomBytes(3), 10)
+        state = bytearray(generator.getstate())
+        state[-2:] = (RandomBytes.BUFFER_SIZE + 1).to_bytes(2, 'big')
+
+        with self.assertRaises(Exception):
+            generator.setstate(bytes(state))
+        self.assertEqual(self.draw(generator, 10), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,252 @@
+import unittest
+import sys
+
+sys.path.append('src')
+
+import cpu_opcodes_test
+
+from Cpu import Cpu
+from Display import Display
+from Emulator import Emulator
+from Keyboard import Keyboard
+from Memory import Memory
+from Recompiler import Recompiler
+from Scheduler import Scheduler
+from Sound import Sound
+
+def assemble_opcode(opcode_name, args):
+    """ Build the opcode from a handler name (like `opcode_8XY4`) and its arguments. """
+
+    template = opcode_name[len('opcode_'):]
+    opcode = 0
+    args = list(args)
+    i = 0
+    while i < len(template):
+        symbol = template[i]
+        size = 1
+        if symbol in 'XYKN':
+            # argument nibbles, like KK or NNN
+            while i + size < len(template) and template[i + size] == symbol:
+                size += 1
+            value = args.pop(0)
+        else:
+            value = int(symbol, 16)
+
+        shift = (len(template) - i - size) * 4
+        opcode |= (value & ((1 << (size * 4)) - 1)) << shift
+        i += size
+
+    return opcode
+
+def execute_block(recompiler):
+    """ Execute only the first block of the region compiled at PC, returning its number of instructions. """
+
+    pc = recompiler.cpu.PC
+    region = recompiler.regions.get(pc) or recompiler.compile_region(pc)
+    block = next(block for block in region.blocks if block.start == pc)
+    return region.function(pc, block.number_instructions)
+
+class RecompiledOpcodesCpu:
+    """ Cpu proxy that runs each `opcode_*` call as a single-instruction block.
+
+    The instruction is written just before PC and executed from there, so PC ends
+    as if the handler was called after the interpreter stepped it.
+    """
+
+    SCRATCH_ADDRESS = 0x1FE
+
+    def __init__(self, cpu):
+        object.__setattr__(self, 'cpu', cpu)
+        object.__setattr__(self, 'recompiler', Recompiler(cpu, max_block_instructions=1))
+
+    def __getattr__(self, name):
+        if not name.startswith('opcode_'):
+            return getattr(self.cpu, name)
+        return lambda *args: self.execute(assemble_opcode(name, args))
+
+    def __setattr__(self, name, value):
+        setattr(self.cpu, name, value)
+
+    def execute(self, opcode):
+        address = self.cpu.PC - 2
+        if address < 0 or address + 1 >= Memory.MEMORY_SIZE:
+            address = RecompiledOpcodesCpu.SCRATCH_ADDRESS
+
+        self.cpu.memory.write_16bit(address, opcode)
+        self.cpu.write_register_pc(address)
+        execute_block(self.recompiler)
+
+class RecompilerOpcodesTestCase(cpu_opcodes_test.CpuOpcodesTestCase):
+    """ The opcodes test suite executed by compiled blocks. """
+
+    def setUp(self):
+        super().setUp()
+        self.cpu = RecompiledOpcodesCpu(self.cpu)
+
+    def test_assemble_opcode(self):
+        self.assertEqual(assemble_opcode('opcode_00E0', ()), 0x00E0)
+        self.assertEqual(assemble_opcode('opcode_1NNN', (0x8FF,)), 0x18FF)
+        self.assertEqual(assemble_opcode('opcode_3XKK', (0x2, 0x0F)), 0x320F)
+        self.assertEqual(assemble_opcode('opcode_8XYE', (0xA, 0xC)), 0x8ACE)
+        self.assertEqual(assemble_opcode('opcode_DXYK', (0x1, 0x2, 0x5)), 0xD125)
+        self.assertEqual(assemble_opcode('opcode_FX55', (0x4,)), 0xF455)
+        self.assertEqual(assemble_opcode('opcode_FX1E', (0x5,)), 0xF51E)
+
+class RecompilerTestCase(unittest.TestCase):
+    def create_cpu(self, quirks=None):
+        memory = Memory()
+        return Cpu(memory, Display(), Keyboard(), Sound(mocked=True), quirks=quirks)
+
+    def load_program(self, memory, opcodes, address=Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS):
+        for opcode in opcodes:
+            memory.write_16bit(address, opcode)
+            address += 2
+
+    def setUp(self, quirks=None):
+        self.cpu = self.create_cpu(quirks)
+        self.memory = self.cpu.memory
+        self.recompiler = Recompiler(self.cpu, compile_threshold=1)
+
+    def test_should_compile_block_until_jump(self):
+        self.load_program(self.memory, [0x6A05, 0x7A01, 0xA300, 0x8AB4, 0x1200, 0x6A00])
+
+        executed = execute_block(self.recompiler)
+
+        self.assertEqual(executed, 5)
+        self.assertEqual(self.cpu.read_V(0xA), 0x06)
+        self.assertEqual(self.cpu.I, 0x300)
+        self.assertEqual(self.cpu.PC, 0x200)
+
+        block = self.recompiler.regions[0x200].blocks[0]
+        self.assertEqual((block.start, block.end, block.number_instructions), (0x200, 0x20A, 5))
+
+    def test_should_end_block_at_skip(self):
+        self.load_program(self.memory, [0x6A05, 0x3A05, 0x6B01, 0x6C01])
+
+        execute_block(self.recompiler)
+
+        self.assertEqual(self.cpu.PC, 0x206)
+        self.assertEqual(self.cpu.read_V(0xB), 0x00)
+
+    def test_should_call_handlers_inside_block(self):
+        self.load_program(self.memory, [0x6005, 0xF029, 0x6A3F, 0x6B1F, 0xDAB1, 0x7F10, 0x1200])
+
+        execute_block(self.recompiler)
+
+        self.assertEqual(self.cpu.I, 0x19)
+        self.assertEqual(self.cpu.display.framebuffer()[0xFF], 0x01)
+        self.assertEqual(self.cpu.read_V(0xF), 0x10)
+
+    def test_should_end_block_at_long_load(self):
+        self.setUp(quirks='xochip')
+        self.load_program(self.memory, [0x6A05, 0xF000, 0x0ABC, 0x6B01])
+
+        executed = execute_block(self.recompiler)
+
+        self.assertEqual(executed, 2)
+        self.assertEqual(self.cpu.I, 0xABC)
+        self.assertEqual(self.cpu.PC, 0x206)
+
+    def test_skip_should_step_over_long_load(self):
+        self.setUp(quirks='xochip')
+        self.load_program(self.memory, [0x6A05, 0x3A05, 0xF000, 0x0ABC, 0x6B01])
+
+        execute_block(self.recompiler)
+        self.assertEqual(self.cpu.PC, 0x208)
+
+        # the skipped instruction is part of the block
+        self.memory.write_16bit(0x204, 0x6C01)
+        self.assertNotIn(0x200, self.recompiler.regions)
+
+        self.cpu.PC = 0x200
+        execute_block(self.recompiler)
+        self.assertEqual(self.cpu.PC, 0x206)
+
+    def test_skip_should_step_over_f000_as_2_bytes_without_long_load(self):
+        self.load_program(self.memory, [0x6A05, 0x3A05, 0xF000, 0x6B01])
+
+        execute_block(self.recompiler)
+
+        self.assertEqual(self.cpu.PC, 0x206)
+
+    def test_should_invalidate_block_when_its_memory_is_written(self):
+        self.load_program(self.memory, [0x6A05, 0x1200])
+        execute_block(self.recompiler)
+
+        self.memory.write_8bit(0x201, 0x07)
+        self.assertNotIn(0x200, self.recompiler.regions)
+
+        execute_block(self.recompiler)
+        self.assertEqual(self.cpu.read_V(0xA), 0x07)
+
+    def test_should_compile_executed_successors_into_the_region(self):
+        self.recompiler = Recompiler(self.cpu, compile_threshold=2)
+        self.load_program(self.memory, [
+            0x7A01, # VA += 1
+            0x3A10, # skip if VA == 0x10
+            0x1200,
+            0x6B01, # VB = 1, not executed yet when the region is compiled
+            0x1208,
+        ])
+
+        self.assertEqual(self.recompiler.run(48), 48)
+
+        self.assertEqual((self.cpu.read_V(0xA), self.cpu.read_V(0xB)), (0x10, 0x01))
+        self.assertEqual(self.cpu.PC, 0x208)
+        region = self.recompiler.regions[0x200]
+        self.assertEqual([block.start for block in region.blocks], [0x200, 0x204])
+        self.assertIs(self.recompiler.regions[0x204], region)
+
+    def test_should_run_self_modifying_code(self):
+        self.load_program(self.memory, [
+            0x6070, # V0 = 0x70
+            0x61AB, # V1 = 0xAB
+            0xA20A, # I = 0x20A
+            0xF155, # store V0 and V1 at 0x20A => 0x70AB (V0 += 0xAB)
+            0x6200, # V2 = 0
+            0x6000, # V0 = 0, replaced by FX55
+            0x120C,
+        ])
+
+        self.recompiler.run(7)
+
+        self.assertEqual(self.memory.read_16bit(0x20A), 0x70AB)
+        self.assertEqual(self.cpu.read_V(0x0), 0x1B)
+
+    def test_run_should_execute_exactly_the_given_number_of_instructions(self):
+        # a block of 4 instructions looping on itself
+        self.load_program(self.memory, [0x7A01, 0x7B01, 0x7C01, 0x1200])
+
+        self.assertEqual(self.recompiler.run(6), 6)
+
+        self.assertEqual(self.recompiler.instructions_executed, 6)
+        self.assertEqual(self.cpu.PC, 0x204)
+        self.assertEqual((self.cpu.read_V(0xA), self.cpu.read_V(0xB), self.cpu.read_V(0xC)), (2, 2, 1))
+
+    def test_frames_should_match_interpreter(self):
+        snapshots = []
+        for engine in Emulator.ENGINES:
+            emulator = Emulator(headless=True, engine=engine, seed=1)
+            emulator.load_rom('roms/PONG', verbose=False)
+
+            state = emulator.run_frames(300)
+
+            self.assertEqual(state['instructions_executed'], 300 * Scheduler.INSTRUCTIONS_PER_FRAME)
+            snapshots.append(emulator.snapshot())
+
+        self.assertEqual(snapshots[0], snapshots[1])
+
+    def test_should_match_interpreter_running_rom(self):
+        interpreted_cpu = self.create_cpu()
+
+        with open('roms/test_opcode.ch8', 'rb') as f:
+            rom = f.read()
+        for cpu in (self.cpu, interpreted_cpu):
+            for i, byte in enumerate(rom):
+                cpu.memory.write_8bit(Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS + i, byte)
+
+        executed = self.recompiler.run(5000)
+        for _ in range(executed):
+            interpreted_cpu.execute_cpu_cycle()
+
+        self.assertEqual(self.memory.memory, interpreted_cpu.memory.memory)
@@ -0,0 +1,101 @@
+import unittest
+import sys
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Emulator import Emulator
+from Rewind import RewindBuffer
+
+class RewindBufferTestCase(unittest.TestCase):
+    def setUp(self):
+        self.emulator = Emulator(headless=True, seed=3)
+        self.emulator.enable_rewind(keyframe_interval=4)
+        self.buffer = self.emulator.rewind_buffer
+
+        address = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+        # counts the frames in V0 and draws a random digit each frame
+        for opcode in [0x7001, 0xC10F, 0xF129, 0x00E0, 0xD235, 0x1200]:
+            self.emulator.memory.write_16bit(address, opcode)
+            address += 2
+
+    def run_frames(self, number_frames):
+        snapshots = []
+        for _ in range(number_frames):
+            self.emulator.run_frames(1)
+            snapshots.append(self.emulator.snapshot())
+        return snapshots
+
+    def test_should_capture_one_frame_per_scheduler_frame(self):
+        self.run_frames(10)
+
+        stats = self.buffer.stats()
+        self.assertEqual(len(self.buffer), 10)
+        self.assertEqual(stats['keyframes'], 3)
+        self.assertGreater(stats['memory_used'], 0)
+
+    def test_should_restore_previous_frames(self):
+        snapshots = self.run_frames(10)
+
+        self.assertEqual(self.emulator.rewind(1), 1)
+        self.assertEqual(self.emulator.snapshot(), snapshots[8])
+
+        self.assertEqual(self.emulator.rewind(5), 5)
+        self.assertEqual(self.emulator.snapshot(), snapshots[3])
+        self.assertEqual(len(self.buffer), 4)
+
+    def test_should_continue_after_rewind_like_the_original(self):
+        snapshots = self.run_frames(9)
+
+        self.emulator.rewind(4)
+        replayed = self.run_frames(4)
+
+        self.assertEqual(replayed, snapshots[5:])
+        self.assertEqual(len(self.buffer), 9)
+
+    def test_should_stop_at_the_oldest_frame(self):
+        snapshots = self.run_frames(3)
+
+        self.assertEqual(self.emulator.rewind(10), 2)
+        self.assertEqual(self.emulator.snapshot(), snapshots[0])
+        self.assertEqual(self.emulator.rewind(1), 0)
+
+    def test_deltas_should_be_smaller_than_keyframes(self):
+        self.run_frames(4)
+
+        keyframe, *deltas = self.buffer.groups[0]
+        for delta in deltas:
+            self.assertLess(len(delta), len(keyframe))
+
+    def test_should_drop_oldest_groups_over_the_limit(self):
+        self.buffer.max_bytes = 1
+        snapshots = self.run_frames(10)
+
+        # only the current group is kept
+        self.assertEqual(len(self.buffer), 2)
+        self.assertEqual(self.buffer.stats()['keyframes'], 1)
+        self.assertEqual(self.buffer.memory_used, sum(len(frame) for frame in self.buffer.groups[0]))
+
+        self.emulator.rewind(5)
+        self.assertEqual(self.emulator.snapshot(), snapshots[8])
+
+    def test_should_start_a_keyframe_when_the_snapshot_size_changes(self):
+        self.run_frames(2)
+        # a write in another memory page makes the snapshot larger
+        self.emulator.memory.write_8bit(0xD00, 0x01)
+        snapshots = self.run_frames(2)
+
+        self.assertEqual(self.buffer.stats()['keyframes'], 2)
+        self.assertEqual(self.emulator.rewind(1), 1)
+        self.assertEqual(self.emulator.snapshot(), snapshots[0])
+
+    def test_rewind_should_require_enabling(self):
+        with self.assertRaises(Exception):
+            Emulator(headless=True).rewind()
+
+    def test_invalid_keyframe_interval(self):
+        with self.assertRaises(Exception):
+            RewindBuffer(self.emulator.cpu, keyframe_interval=0)
+
+if __name__ == '__main__':
+    unittest.main()
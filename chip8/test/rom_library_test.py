@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.append('src')
+
+from RomLibrary import RomLibrary
+
+class RomLibraryTestCase(unittest.TestCase):
+    CHIP8_ROM = bytes([0x60, 0x01, 0x12, 0x00])
+    # calls a subroutine switching to hi-res, the sprite data after it looks like 00FF
+    SCHIP_ROM = bytes([0x22, 0x06, 0x12, 0x02, 0x00, 0xFF, 0x00, 0xFF, 0x00, 0xEE])
+    XOCHIP_ROM = bytes([0xF0, 0x00, 0x12, 0x34, 0x12, 0x04])
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.write_rom('GAME', RomLibraryTestCase.CHIP8_ROM)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_rom(self, name, rom, mtime_ns=None):
+        filename = os.path.join(self.directory.name, name)
+        with open(filename, 'wb') as f:
+            f.write(rom)
+        if mtime_ns is not None:
+            os.utime(filename, ns=(mtime_ns, mtime_ns))
+
+    def test_detect_platform(self):
+        self.assertEqual(RomLibrary.detect_platform(RomLibraryTestCase.CHIP8_ROM), 'chip8')
+        self.assertEqual(RomLibrary.detect_platform(RomLibraryTestCase.SCHIP_ROM), 'schip')
+        self.assertEqual(RomLibrary.detect_platform(RomLibraryTestCase.XOCHIP_ROM), 'xochip')
+        self.assertEqual(RomLibrary.detect_platform(bytes(4096)), 'xochip')
+
+    def test_data_should_not_be_read_as_opcodes(self):
+        # jumps over 00FF
+        self.assertEqual(RomLibrary.detect_platform(bytes([0x12, 0x04, 0x00, 0xFF, 0x12, 0x04])), 'chip8')
+
+    def test_skip_should_step_over_long_load(self):
+        # the address of the skipped long load looks like 00FF, it is not read as an opcode
+        self.assertEqual(RomLibrary.detect_platform(bytes([0x30, 0x00, 0xF0, 0x00, 0x00, 0xFF, 0x12, 0x06])), 'xochip')
+        self.assertEqual(RomLibrary.reachable_opcodes(bytes([0x30, 0x00, 0xF0, 0x00, 0x00, 0xFF, 0x12, 0x06])),
+                         [0x3000, 0xF000, 0x1206])
+
+    def test_detect_bundled_roms(self):
+        library = RomLibrary('roms', index_filename=os.path.join(self.directory.name, 'index.json'))
+        self.assertEqual(library.get('PONG')['platform'], 'chip8')
+        self.assertEqual(library.get('SPACE_INVADERS')['platform'], 'chip8')
+        self.assertEqual(library.get('scrolling_test.ch8')['platform'], 'schip')
+
+    def test_get_should_describe_the_rom(self):
+        entry = RomLibrary(self.directory.name).get('GAME')
+
+        self.assertEqual(entry['size'], 4)
+        self.assertEqual(entry['sha1'], '416cce54cd5ace25a26afcb67c2d191702f28d22')
+        self.assertEqual(entry['platform'], 'chip8')
+        self.assertEqual(entry['quirks'], 'cosmac_vip')
+        self.assertEqual(entry['instructions_per_frame'], 10)
+
+    def test_index_should_be_cached(self):
+        RomLibrary(self.directory.name).get('GAME')
+
+        library = RomLibrary(self.directory.name)
+        self.assertIn('GAME', library.entries)
+        # a cached entry is returned without reading the ROM
+        library.entries['GAME']['platform'] = 'cached'
+        self.assertEqual(library.get('GAME')['platform'], 'cached')
+
+    def test_index_should_be_invalidated_on_change(self):
+        self.write_rom('GAME', RomLibraryTestCase.CHIP8_ROM, mtime_ns=10 ** 18)
+        RomLibrary(self.directory.name).get('GAME')
+
+        self.write_rom('GAME', RomLibraryTestCase.XOCHIP_ROM[:4], mtime_ns=2 * 10 ** 18)
+        entry = RomLibrary(self.directory.name).get('GAME')
+
+        self.assertEqual(entry['platform'], 'xochip')
+        self.assertEqual(RomLibrary(self.directory.name).entries['GAME']['platform'], 'xochip')
+
+    def test_refresh_should_index_the_directory(self):
+        self.write_rom('HIRES', RomLibraryTestCase.SCHIP_ROM)
+        library = RomLibrary(self.directory.name)
+        entries = library.refresh()
+
+        self.assertEqual(sorted(entries), ['GAME', 'HIRES'])
+        self.assertEqual(library.find_by_hash(entries['HIRES']['sha1']), 'HIRES')
+        self.assertIsNone(library.find_by_hash('0' * 40))
+
+        os.remove(os.path.join(self.directory.name, 'HIRES'))
+        self.assertEqual(list(library.refresh()), ['GAME'])
+        self.assertEqual(list(RomLibrary(self.directory.name).entries), ['GAME'])
+
+    def test_invalid_index_should_be_ignored(self):
+        with open(os.path.join(self.directory.name, RomLibrary.INDEX_FILENAME), 'w') as f:
+            f.write('{ not json')
+
+        self.assertEqual(RomLibrary(self.directory.name).get('GAME')['platform'], 'chip8')
+
+    def test_unwritable_index_should_not_be_saved(self):
+        index_filename = os.path.join(self.directory.name, 'missing', RomLibrary.INDEX_FILENAME)
+        library = RomLibrary(self.directory.name, index_filename=index_filename)
+
+        self.assertEqual(library.get('GAME')['platform'], 'chip8')
+        self.assertEqual(list(library.refresh()), ['GAME'])
+        self.assertFalse(os.path.exists(index_filename))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Memory import Memory
+from Rom import MAX_ROM_SIZE, load_rom_bytes_into_memory, load_rom_file_into_memory, load_rom_into_memory
+
+class RomTestCase(unittest.TestCase):
+    def setUp(self):
+        self.memory = Memory()
+
+    def read_program(self, number_bytes):
+        start = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+        return bytes(self.memory.read_8bit(start + i) for i in range(number_bytes))
+
+    def test_load_bytes(self):
+        rom = bytes(range(0x100)) * 4
+        load_rom_bytes_into_memory(rom, self.memory)
+        self.assertEqual(self.read_program(len(rom)), rom)
+        self.assertEqual(self.memory.read_8bit(Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS + len(rom)), 0)
+
+    def test_load_odd_length(self):
+        load_rom_bytes_into_memory(bytes([0x12, 0x34, 0x56]), self.memory)
+        self.assertEqual(self.read_program(4), bytes([0x12, 0x34, 0x56, 0x00]))
+
+    def test_load_whole_program_area(self):
+        rom = bytes([0xAB]) * MAX_ROM_SIZE
+        load_rom_bytes_into_memory(rom, self.memory)
+        self.assertEqual(self.memory.read_8bit(Cpu.MEMORY_PROGRAM_CODE_AREA_END_ADDRESS), 0xAB)
+        self.assertEqual(self.memory.read_8bit(Cpu.MEMORY_PROGRAM_CODE_AREA_END_ADDRESS + 1), 0)
+
+    def test_too_big_rom_should_raise(self):
+        with self.assertRaises(Exception):
+            load_rom_bytes_into_memory(bytes(MAX_ROM_SIZE + 1), self.memory)
+
+    def test_load_xochip_rom(self):
+        memory = Memory(Memory.XOCHIP_MEMORY_SIZE)
+        rom = bytes([0xCD]) * (MAX_ROM_SIZE + 0xF000)
+
+        load_rom_bytes_into_memory(rom, memory)
+
+        self.assertEqual(memory.read_8bit(0xFE9F), 0xCD)
+        self.assertEqual(memory.read_8bit(0xFEA0), 0)
+        with self.assertRaises(Exception):
+            load_rom_bytes_into_memory(rom + bytes(1), memory)
+
+    def test_load_file(self):
+        rom = bytes([0x60, 0x0A, 0xF0, 0x29, 0x00])
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'test.ch8')
+            with open(filename, 'wb') as f:
+                f.write(rom)
+            load_rom_file_into_memory(filename, self.memory, verbose=False)
+
+        self.assertEqual(self.read_program(len(rom)), rom)
+
+    def test_load_hex_text(self):
+        load_rom_into_memory('\n    600A\n    F029\n', self.memory, verbose=False)
+        self.assertEqual(self.read_program(4), bytes([0x60, 0x0A, 0xF0, 0x29]))
+
+if __name__ == '__main__':
+    unittest.main()
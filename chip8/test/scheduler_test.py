@@ -0,0 +1,145 @@
+import time
+import unittest
+import sys
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Display import Display
+from Emulator import Emulator
+from Keyboard import Keyboard
+from Memory import Memory
+from Scheduler import Scheduler, TimerClock
+from Sound import Sound
+
+class CountingDisplay(Display):
+    renders = 0
+
+    def render(self):
+        self.renders += 1
+
+class SchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.memory = Memory()
+        self.display = CountingDisplay(headless=True)
+        self.cpu = Cpu(self.memory, self.display, Keyboard(), Sound(headless=True), headless=True)
+
+        # V0 += 1 forever
+        self.memory.write_16bit(0x200, 0x7001)
+        self.memory.write_16bit(0x202, 0x1200)
+
+    def test_run_frame(self):
+        scheduler = Scheduler(self.cpu, self.display, instructions_per_frame=8, realtime=False)
+        self.cpu.DT = 10
+
+        scheduler.run_frame()
+
+        self.assertEqual(self.cpu.read_V(0x0), 4)
+        self.assertEqual(self.cpu.DT, 9)
+        self.assertEqual(self.display.renders, 1)
+        self.assertEqual(scheduler.instructions_executed, 8)
+
+    def test_frames_waiting_a_key_should_only_tick_timers_and_render(self):
+        self.memory.write_16bit(0x202, 0xF10A) # V0 += 1, wait a key in V1
+        scheduler = Scheduler(self.cpu, self.display, instructions_per_frame=8, realtime=False)
+        self.cpu.DT = 10
+
+        scheduler.run(3)
+
+        self.assertEqual(self.cpu.read_V(0x0), 1)
+        self.assertEqual(self.cpu.DT, 7)
+        self.assertEqual(self.display.renders, 3)
+        self.assertEqual(scheduler.instructions_executed, 8)
+
+        self.cpu.keyboard.send_key(0x4)
+        scheduler.run_frame()
+
+        self.assertEqual(self.cpu.read_V(0x1), 0x4)
+        self.assertIsNone(self.cpu.waiting_key_register)
+        self.assertEqual(scheduler.instructions_executed, 16)
+
+    def test_run_frames_as_fast_as_possible(self):
+        scheduler = Scheduler(self.cpu, self.display, instructions_per_frame=20, realtime=False)
+        self.cpu.DT = 100
+
+        scheduler.run(30)
+
+        self.assertEqual(scheduler.frames, 30)
+        self.assertEqual(self.cpu.DT, 70)
+        self.assertEqual(self.display.renders, 30)
+        self.assertEqual(self.cpu.read_V(0x0), 300 & 0xFF)
+
+    def test_run_frames_in_realtime(self):
+        scheduler = Scheduler(self.cpu, self.display, instructions_per_frame=1)
+
+        start = time.monotonic()
+        scheduler.run(6)
+        elapsed = time.monotonic() - start
+
+        self.assertGreaterEqual(elapsed, 5 * Scheduler.FRAME_DURATION)
+
+    def test_events_are_handled_once_per_frame(self):
+        events = []
+        scheduler = Scheduler(self.cpu, self.display, realtime=False, handle_events=lambda: events.append(1))
+
+        scheduler.run(3)
+
+        self.assertEqual(len(events), 3)
+
+    def test_stop(self):
+        scheduler = Scheduler(self.cpu, self.display, realtime=False)
+        scheduler.handle_events = lambda: scheduler.frames == 4 and scheduler.stop()
+
+        scheduler.run()
+
+        self.assertEqual(scheduler.frames, 5)
+
+    def test_late_frames_should_only_tick_the_timers_once_per_frame(self):
+        class SlowDisplay(CountingDisplay):
+            def render(self):
+                super().render()
+                time.sleep(10 * Scheduler.FRAME_DURATION)
+
+        display = SlowDisplay(headless=True)
+        scheduler = Scheduler(self.cpu, display, instructions_per_frame=1)
+        self.cpu.DT = 200
+
+        scheduler.run(3)
+
+        # the dropped frames don't tick the timers, as in headless mode
+        self.assertEqual(self.cpu.DT, 200 - 3)
+        self.assertEqual(display.renders, 3)
+
+    def test_tick_timers_in_bulk(self):
+        self.cpu.DT = 10
+        self.cpu.ST = 3
+
+        self.cpu.tick_timers(4)
+        self.assertEqual((self.cpu.DT, self.cpu.ST), (6, 0))
+
+        self.cpu.tick_timers(100)
+        self.assertEqual((self.cpu.DT, self.cpu.ST), (0, 0))
+
+    def test_timer_clock_should_count_elapsed_ticks(self):
+        clock = TimerClock()
+        self.assertEqual(clock.elapsed_ticks(), 0)
+
+        # as if the clock started half a second ago
+        clock.start -= 0.5
+        self.assertEqual(clock.elapsed_ticks(), 30)
+        self.assertEqual(clock.elapsed_ticks(), 0)
+        self.assertLessEqual(clock.time_to_next_tick(), 1 / 60)
+
+    def test_invalid_instructions_per_frame(self):
+        with self.assertRaises(Exception):
+            Scheduler(self.cpu, self.display, instructions_per_frame=0)
+
+    def test_emulator_engines_should_match(self):
+        states = []
+        for engine in Emulator.ENGINES:
+            emulator = Emulator(headless=True, engine=engine)
+            emulator.load_rom('roms/test_opcode.ch8')
+            state = emulator.run_frames(60)
+            states.append((emulator.framebuffer(), state['V'], state['I']))
+
+        self.assertEqual(states[0], states[1])
@@ -0,0 +1,192 @@
+import unittest
+import sys
+
+sys.path.append('src')
+
+from Cpu import Cpu
+from Emulator import Emulator
+from Memory import Memory
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.emulator = Emulator(headless=True, seed=7)
+        self.cpu = self.emulator.cpu
+        self.memory = self.emulator.memory
+
+    def load_program(self, emulator, opcodes):
+        address = Cpu.MEMORY_PROGRAM_CODE_AREA_START_ADDRESS
+        for opcode in opcodes:
+            emulator.memory.write_16bit(address, opcode)
+            address += 2
+
+    def random_program(self):
+        # draws the font digit of a random number, with the stack and timers in use
+        return [0x6A3C, 0xFA15, 0x2210, 0xC00F, 0xF029, 0x6100, 0xD115, 0x1204, 0x00E0, 0x00EE]
+
+    def test_memory_snapshot_should_copy_the_memory(self):
+        snapshot = self.memory.snapshot()
+        self.memory.write_8bit(0x300, 0xAB)
+
+        self.memory.restore(snapshot)
+        self.assertEqual(self.memory.read_8bit(0x300), 0x00)
+
+    def test_memory_snapshot_should_only_hold_the_used_pages(self):
+        memory = Memory(Memory.XOCHIP_MEMORY_SIZE)
+        memory.write_range(0xF000, bytes(range(1, 0x80)))
+        memory.write_8bit(0xFFFF, 0xCD)
+        expected = bytes(memory.memory)
+
+        snapshot = memory.snapshot()
+        # header, bitmap of the 256 pages, the font page and the 2 written pages
+        self.assertEqual(len(snapshot), 2 + 32 + 3 * Memory.PAGE_SIZE)
+
+        other = Memory(Memory.XOCHIP_MEMORY_SIZE)
+        other.write_range(0x8000, bytes([0xFF] * 0x10))
+        other.restore(snapshot)
+        self.assertEqual(bytes(other.memory), expected)
+
+        with self.assertRaises(Exception):
+            self.memory.restore(snapshot)
+
+    def test_memory_restore_should_only_write_the_changed_pages(self):
+        memory = Memory(Memory.XOCHIP_MEMORY_SIZE)
+        memory.write_range(0x1000, bytes([0xAA] * 0x200))
+        snapshot = memory.snapshot()
+        expected = bytes(memory.memory)
+
+        memory.write_8bit(0x1150, 0x00)
+        memory.write_8bit(0x1250, 0xBB)
+        memory.write_8bit(0x8000, 0xCC)
+        writes = []
+        memory.add_write_listener(lambda address, number_bytes: writes.append((address, number_bytes)))
+        memory.restore(snapshot)
+
+        self.assertEqual(bytes(memory.memory), expected)
+        self.assertEqual(writes, [(0x1100, 2 * Memory.PAGE_SIZE), (0x8000, Memory.PAGE_SIZE)])
+
+    def test_memory_restore_should_reject_wrong_size(self):
+        with self.assertRaises(Exception):
+            self.memory.restore(bytes(10))
+
+    def test_snapshot_should_restore_registers_keyboard_and_memory(self):
+        self.load_program(self.emulator, self.random_program())
+        self.emulator.run(20)
+        self.emulator.keyboard.press_key(0x3)
+        self.emulator.keyboard.send_key(0x9)
+        state = self.emulator.state()
+        memory = bytes(self.memory.memory)
+
+        snapshot = self.emulator.snapshot()
+        self.assertEqual(len(snapshot), Cpu.SNAPSHOT_STATE_SIZE + len(self.memory.snapshot()))
+
+        other = Emulator(headless=True)
+        other.restore(snapshot)
+
+        other.instructions_executed = self.emulator.instructions_executed
+        self.assertEqual(other.state(), state)
+        self.assertEqual(bytes(other.memory.memory), memory)
+        self.assertEqual(other.keyboard.pressed_keys_mask(), 0b1000)
+        self.assertEqual(other.keyboard.last_key_pressed, 0x9)
+
+    def test_restore_should_continue_like_the_original(self):
+        self.load_program(self.emulator, self.random_program())
+        self.emulator.run(10)
+        snapshot = self.emulator.snapshot()
+
+        expected = self.emulator.run(200, clock_hz=600)
+        expected_framebuffer = self.emulator.framebuffer()
+
+        for engine in Emulator.ENGINES:
+            other = Emulator(headless=True, engine=engine, seed=99)
+            other.restore(snapshot)
+            other.instructions_executed = expected['instructions_executed'] - 200
+
+            self.assertEqual(other.run(200, clock_hz=600), expected)
+            self.assertEqual(other.framebuffer(), expected_framebuffer)
+
+    def test_snapshot_should_restore_the_hires_display(self):
+        # hi-res, 16x16 sprite of the font memory and a scroll
+        self.load_program(self.emulator, [0x00FF, 0xA000, 0x6A70, 0x6B38, 0xDAB0, 0x00C2, 0x120C])
+        self.emulator.run(7)
+        framebuffer = self.emulator.framebuffer()
+
+        other = Emulator(headless=True)
+        other.restore(self.emulator.snapshot())
+
+        self.assertTrue(other.display.hires)
+        self.assertEqual(len(other.framebuffer()), 0x400)
+        self.assertEqual(other.framebuffer(), framebuffer)
+        self.assertNotEqual(framebuffer, bytes(0x400))
+
+    def test_snapshot_should_restore_the_xochip_memory_and_planes(self):
+        emulator = Emulator(headless=True, quirks='xochip')
+        # long load of a sprite at 0x8000, drawn on both planes
+        self.load_program(emulator, [0xF000, 0x8000, 0xF301, 0x6005, 0xD002, 0x120A])
+        emulator.memory.write_range(0x8000, bytes([0xFF, 0x81, 0x3C, 0x18]))
+        emulator.run(5)
+        state = emulator.state()
+
+        snapshot = emulator.snapshot()
+        self.assertLess(len(snapshot), Cpu.SNAPSHOT_STATE_SIZE + 8 * Memory.PAGE_SIZE)
+
+        other = Emulator(headless=True, quirks='xochip')
+        other.restore(snapshot)
+        other.instructions_executed = emulator.instructions_executed
+
+        self.assertEqual(other.state(), state)
+        self.assertEqual(bytes(other.memory.memory), bytes(emulator.memory.memory))
+        self.assertEqual(other.display.plane_mask, 0x3)
+        self.assertEqual(other.display.to_text(), emulator.display.to_text())
+
+    def test_restore_should_drop_cached_instructions(self):
+        self.load_program(self.emulator, [0x6A01, 0x1200])
+        snapshot = self.emulator.snapshot()
+
+        self.load_program(self.emulator, [0x6A02, 0x1200])
+        self.emulator.run(2)
+        self.assertEqual(self.cpu.read_V(0xA), 0x02)
+
+        self.emulator.restore(snapshot)
+        self.emulator.run(2)
+        self.assertEqual(self.cpu.read_V(0xA), 0x01)
+
+    def test_restore_should_reject_invalid_snapshots(self):
+        snapshot = self.emulator.snapshot()
+
+        with self.assertRaises(Exception):
+            self.emulator.restore(b'XXXX' + snapshot[4:])
+        with self.assertRaises(Exception):
+            self.emulator.restore(snapshot[:4] + bytes([0xFF, 0xFF]) + snapshot[6:])
+        with self.assertRaises(Exception):
+            self.emulator.restore(snapshot[:-1])
+
+    def test_restore_should_leave_the_state_unchanged_on_a_memory_size_mismatch(self):
+        xochip = Emulator(headless=True, quirks='xochip')
+        self.load_program(xochip, [0x6A05, 0xA123, 0xF00A])
+        xochip.run(3)
+
+        self.load_program(self.emulator, self.random_program())
+        self.emulator.run(20)
+        snapshot = self.emulator.snapshot()
+
+        with self.assertRaises(Exception):
+            self.emulator.restore(xochip.snapshot())
+
+        self.assertEqual(self.emulator.snapshot(), snapshot)
+
+    def test_restore_should_leave_the_state_unchanged_on_an_invalid_random_position(self):
+        self.load_program(self.emulator, self.random_program())
+        self.emulator.run(20)
+        snapshot = self.emulator.snapshot()
+
+        invalid = bytearray(snapshot)
+        position = Cpu.SNAPSHOT_STATE_SIZE - Cpu.SNAPSHOT_DISPLAY.size - 2
+        invalid[position:(position + 2)] = b'\xFF\xFF'
+        invalid[Cpu.SNAPSHOT_HEADER.size:(Cpu.SNAPSHOT_HEADER.size + 2)] = b'\x03\x00'
+        with self.assertRaises(Exception):
+            self.emulator.restore(bytes(invalid))
+
+        self.assertEqual(self.emulator.snapshot(), snapshot)
+
+if __name__ == '__main__':
+    unittest.main()
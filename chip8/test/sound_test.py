@@ -0,0 +1,44 @@
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.append('src')
+
+from Sound import Sound, DEFAULT_AUDIO_PATTERN, DEFAULT_PITCH
+
+class SoundTestCase(unittest.TestCase):
+    def test_pattern_rate(self):
+        self.assertEqual(Sound.pattern_rate(64), 4000)
+        self.assertAlmostEqual(Sound.pattern_rate(64 + 48), 8000)
+        self.assertAlmostEqual(Sound.pattern_rate(64 - 48), 2000)
+
+    def test_render_pattern_should_hold_whole_patterns(self):
+        samples = Sound.render_pattern(DEFAULT_AUDIO_PATTERN, DEFAULT_PITCH, sample_rate=8000, duration=0.25)
+
+        # 4000 bits per second, 7.8 patterns of 128 bits in 0.25s rounded to 8 patterns of 256 samples
+        self.assertEqual(len(samples), 8 * 256)
+        self.assertEqual(samples.dtype, np.int16)
+        # the 0xF0 bytes give 8 samples high then 8 low (500Hz)
+        self.assertEqual(list(samples[:16]), [Sound.AMPLITUDE] * 8 + [-Sound.AMPLITUDE] * 8)
+        self.assertEqual(list(samples[-16:]), list(samples[:16]))
+
+    def test_render_pattern_should_follow_the_pattern_bits(self):
+        pattern = bytes([0x80] + [0x00] * 15)
+
+        samples = Sound.render_pattern(pattern, DEFAULT_PITCH, sample_rate=4000, duration=128 / 4000)
+
+        self.assertEqual(len(samples), 128)
+        self.assertEqual(samples[0], Sound.AMPLITUDE)
+        self.assertTrue((samples[1:] == -Sound.AMPLITUDE).all())
+
+    def test_gate_should_track_the_state(self):
+        sound = Sound(headless=True)
+
+        sound.gate(True)
+        self.assertTrue(sound.playing)
+        sound.gate(False)
+        self.assertFalse(sound.playing)
+
+if __name__ == '__main__':
+    unittest.main()